@@ -0,0 +1,103 @@
+"""
+Benchmark of the batch stitch-string parser against the per-item regex
+parsing the components used before. The batch parser is timed without its
+cache (first solve) and with it (re-solve with unchanged stitches). For
+reference it also times passing a StitchBuffer along directly, which skips
+the string round trip entirely.
+
+Usage:
+    python benchmarks/bench_parse.py [count]
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division, print_function
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pyembroiderygh import (LRUCache,
+                            StitchBuffer,
+                            coerce_stitches,
+                            format_stitch,
+                            parse_stitch_columns)
+
+
+def regex_parse(stitches):
+    # the per-item parsing of the original ConstructStitchBlock component
+    regex = re.compile(r'^([+-]?(\d+([.]\d*)?([eE][+-]?\d+)?|[.]\d+([eE][+-]?\d+)?)[,]){2}[-+]?[0-9]+$')
+    valid_stitches = []
+    invalid = []
+    for i, stitch in enumerate(stitches):
+        if bool(regex.match(stitch)):
+            stitch = stitch.split(",")
+            stitch = (float(stitch[0]), float(stitch[1]), int(stitch[2]))
+            valid_stitches.append(stitch)
+        else:
+            invalid.append(i)
+    return valid_stitches, invalid
+
+
+def make_stitches(count, invalid_every=0):
+    # random coordinates with full float precision
+    rnd = random.Random(0)
+    stitches = [format_stitch(rnd.uniform(-2000, 2000),
+                              rnd.uniform(-2000, 2000),
+                              rnd.choice((0, 0, 0, 1, 2)))
+                for _ in range(count)]
+    if invalid_every:
+        for i in range(0, count, invalid_every):
+            stitches[i] = "not a stitch"
+    return stitches
+
+
+def make_pattern_buffer(count):
+    # coordinates on the 1/10 mm grid of an imported embroidery file
+    rnd = random.Random(0)
+    return StitchBuffer.from_stitches((rnd.randint(-2000, 2000),
+                                       rnd.randint(-2000, 2000),
+                                       rnd.choice((0, 0, 0, 1, 2)))
+                                      for _ in range(count))
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench(label, stitches):
+    t_regex = best_of(lambda: regex_parse(stitches))
+    t_batch = best_of(lambda: parse_stitch_columns(stitches, None))
+    cache = LRUCache(1)
+    parse_stitch_columns(stitches, cache)
+    t_cached = best_of(lambda: parse_stitch_columns(stitches, cache))
+    print("{:<34} regex {:8.1f} ms   batch {:8.1f} ms   speedup {:5.1f}x   "
+          "re-solve {:7.1f} ms   speedup {:5.1f}x"
+          .format(label, t_regex * 1000, t_batch * 1000, t_regex / t_batch,
+                  t_cached * 1000, t_regex / t_cached))
+    return t_regex
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    stitches = make_stitches(count)
+    # both parsers have to agree
+    valid, invalid = regex_parse(stitches)
+    xs, ys, cmds, binvalid = parse_stitch_columns(stitches, None)
+    assert invalid == binvalid and list(zip(xs, ys, cmds)) == valid
+    bench("{} random stitches".format(count), stitches)
+    bench("{} random, 1% invalid".format(count),
+          make_stitches(count, invalid_every=100))
+    buf = make_pattern_buffer(count)
+    t_regex = bench("{} imported stitches".format(count),
+                    buf.to_strings(True))
+    t_buffer = best_of(lambda: coerce_stitches([buf]))
+    print("{:<34} regex {:8.1f} ms   buffer {:7.1f} ms   speedup {:5.0f}x"
+          .format("{} as StitchBuffer".format(count), t_regex * 1000,
+                  t_buffer * 1000, t_regex / t_buffer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Throughput benchmark of the batch reader of the PatternRead component in
+files per second, reading a mixed job sheet of DST, PES and JEF files one
+after another like before and as one batch on a pool of worker processes.
+Finally the batch is read again from a warm PatternCache, and only the
+metadata of the files is read by counting the stitches while streaming.
+
+Usage:
+    python benchmarks/bench_read.py [files] [stitches]
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division, print_function
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pyembroidery
+
+from pyembroiderygh import (PatternCache,
+                            colorblock_ranges,
+                            cpu_count,
+                            normalize_path,
+                            read_infos,
+                            read_patterns)
+
+WRITERS = (("dst", pyembroidery.write_dst),
+           ("pes", pyembroidery.write_pes),
+           ("jef", pyembroidery.write_jef))
+
+
+def make_design(stitches, seed):
+    # a few colorblocks of satin-like zigzags with trims in between
+    rnd = random.Random(seed)
+    pattern = pyembroidery.EmbPattern()
+    blocks = 4
+    for b in range(blocks):
+        pattern.add_thread(pyembroidery.EmbThread(rnd.randint(0, 0xffffff)))
+        cx = rnd.uniform(-500, 500)
+        cy = rnd.uniform(-500, 500)
+        radius = rnd.uniform(100, 400)
+        for i in range(stitches // blocks):
+            a = i * 0.01
+            r = radius + (i % 2) * 30
+            pattern.add_stitch_absolute(pyembroidery.STITCH,
+                                        cx + r * math.cos(a),
+                                        cy + r * math.sin(a))
+            if i % 500 == 499:
+                pattern.add_command(pyembroidery.TRIM)
+        pattern.add_command(pyembroidery.COLOR_BREAK)
+    return pattern
+
+
+def legacy_read(filepaths):
+    # one pyembroidery.read per path, like the component before
+    patterns = []
+    for filepath in filepaths:
+        try:
+            patterns.append(pyembroidery.read(normalize_path(filepath)))
+        except Exception:
+            patterns.append(None)
+    return patterns
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    stitches = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    workdir = tempfile.mkdtemp()
+    try:
+        paths = []
+        for i in range(files):
+            extension, writer = WRITERS[i % len(WRITERS)]
+            path = os.path.join(workdir, "job_{:04d}.{}".format(i, extension))
+            writer(make_design(stitches, i), path)
+            paths.append(path)
+        workers = cpu_count()
+
+        # both readers have to agree
+        legacy = legacy_read(paths)
+        batch = read_patterns(paths, workers)
+        for pattern, (batch_pattern, error) in zip(legacy, batch):
+            assert error is None
+            assert pattern.stitches == batch_pattern.stitches
+
+        cache = PatternCache(os.path.join(workdir, "cache"))
+        read_patterns(paths, workers, cache=cache)
+        for pattern, (cached, error) in zip(legacy, read_patterns(
+                paths, workers, cache=cache)):
+            assert error is None
+            assert pattern.stitches == cached.stitches
+        assert cache.hits == files
+
+        for pattern, (info, error) in zip(legacy, read_infos(paths, workers)):
+            assert error is None
+            assert info.color_count == len(list(colorblock_ranges(pattern)))
+            assert info.extents == pattern.extents()
+
+        t_legacy = best_of(lambda: legacy_read(paths)) / files
+        t_batch = best_of(lambda: read_patterns(paths, workers)) / files
+        t_cached = best_of(lambda: read_patterns(paths, workers,
+                                                 cache=cache)) / files
+        t_info = best_of(lambda: read_infos(paths, workers)) / files
+        print("{} files (dst/pes/jef), {} stitches each, {} workers".format(
+            files, stitches, workers))
+        print("legacy  {:8.1f} files/s".format(1 / t_legacy))
+        print("batch   {:8.1f} files/s   speedup {:5.1f}x".format(
+            1 / t_batch, t_legacy / t_batch))
+        print("cached  {:8.1f} files/s   speedup {:5.1f}x".format(
+            1 / t_cached, t_legacy / t_cached))
+        print("info    {:8.1f} files/s   speedup {:5.1f}x".format(
+            1 / t_info, t_legacy / t_info))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark of the row segmentation of the grid fill with bisection of the
+grid parameters against filtering the whole row for every pair of
+intersections like before. The boundary is a plate with many holes, so
+every row crosses the boundary many times.
+
+Usage:
+    python benchmarks/bench_segment.py [resolution_x]
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division, print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pyembroiderygh import GridFrame, Plane, PolylineBoundary
+from pyembroiderygh.grid import build_grid, segment_row
+from pyembroiderygh.scanline import plane_edges, row_crossings
+
+
+def legacy_segment_row(intparams, params):
+    # the even case of the segmentation before bisection was used
+    branches = []
+    for k in range(0, len(intparams), 2):
+        t0 = intparams[k]
+        t1 = intparams[k + 1]
+        sequence = [t for t in params if t > t0 and t < t1]
+        sequence.insert(0, t0)
+        sequence.append(t1)
+        branches.append(sequence)
+    return branches
+
+
+class Plate(object):
+    # a rectangular plate with a grid of square holes, only as much of the
+    # boundary protocol as needed here
+    def __init__(self, holes_x, holes_y, size=1.0, gap=1.0):
+        pitch = size + gap
+        width = holes_x * pitch + gap
+        height = holes_y * pitch + gap
+        self.rings = [[(0, 0), (width, 0), (width, height), (0, height)]]
+        for i in range(holes_x):
+            for j in range(holes_y):
+                x = gap + i * pitch
+                y = gap + j * pitch
+                self.rings.append([(x, y), (x, y + size),
+                                   (x + size, y + size), (x + size, y)])
+
+    def get_bounding_box(self, plane=None):
+        return PolylineBoundary(self.rings[0]).get_bounding_box(plane)
+
+    def polygonize(self, tol=0.0):
+        return self.rings
+
+
+def row_intparams(plate, frame):
+    # normalized intersection parameters of all rows
+    width = frame.maxx - frame.minx
+    crossings = row_crossings(plane_edges(plate.rings, frame.plane),
+                              frame.row_values())
+    return [[(x - frame.minx) / width for x in xs] for xs in crossings]
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench(resolution_x, holes):
+    plate = Plate(holes, 10)
+    frame = GridFrame(plate, Plane.WorldXY, resolution_x, 100)
+    gridlines, gridparams = build_grid(frame)
+    rows = row_intparams(plate, frame)
+
+    def legacy():
+        return [legacy_segment_row(ip, gridparams[j])
+                for j, ip in enumerate(rows)]
+
+    def bisected():
+        return [segment_row(ip, gridparams[j], gridlines[j], plate, 0.0)
+                for j, ip in enumerate(rows)]
+
+    # both segmentations have to agree
+    assert legacy() == bisected()
+    events = sum(len(ip) for ip in rows)
+    t_legacy = best_of(legacy)
+    t_bisect = best_of(bisected)
+    print("resolution {:>6}, {:>6} intersections   legacy {:8.1f} ms   "
+          "bisect {:7.1f} ms   speedup {:6.1f}x"
+          .format(resolution_x, events, t_legacy * 1000, t_bisect * 1000,
+                  t_legacy / t_bisect))
+
+
+def main():
+    resolution_x = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for holes in (10, 50, 200):
+        bench(resolution_x, holes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of the row sequencing of the grid fill with the spatial branch
+index and the non-empty row tracking against the brute force searches used
+before. The boundaries are combs whose teeth split every row into many
+branches and stacks of small islands spread over many sparse rows.
+
+Usage:
+    python benchmarks/bench_sequence.py [teeth]
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division, print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pyembroidery
+
+from pyembroiderygh import GridFrame, Plane, PolylineBoundary
+from pyembroiderygh.scanline import scanline_branch_rows
+from pyembroiderygh.grid import (build_grid,
+                                 find_closest_branch,
+                                 get_first_nonzero,
+                                 sequence_rows)
+
+
+def legacy_sequence_rows(branched_rows, gridlines):
+    # the sequencing loop before the branch index was introduced
+    j = 0
+    lastidx = -1
+    rowcount = len(branched_rows)
+    total_sequence = []
+    commands = []
+    while j < rowcount:
+        row = branched_rows[j]
+        if len(row) >= 1:
+            branch = row.popleft()
+            stitchpts = [gridlines[j].PointAt(t) for t in branch]
+            cmds = [pyembroidery.STITCH] * len(stitchpts)
+            if lastidx != j - 1 and total_sequence:
+                stitchpts.insert(0, total_sequence[-1])
+                cmds.insert(0, pyembroidery.TRIM)
+            total_sequence.extend(stitchpts)
+            commands.extend(cmds)
+            if j == rowcount - 1:
+                if get_first_nonzero(branched_rows) != -1:
+                    cb = find_closest_branch(stitchpts[-1],
+                                             gridlines,
+                                             branched_rows)
+                    lastidx = j
+                    j = cb[0]
+                    continue
+                break
+        else:
+            nzi = get_first_nonzero(branched_rows)
+            if nzi != -1:
+                lastidx = j
+                j = nzi
+                continue
+            break
+        lastidx = j
+        j += 1
+    if total_sequence:
+        total_sequence.append(total_sequence[-1])
+        commands.append(pyembroidery.TRIM)
+    return total_sequence, commands
+
+
+def make_comb(teeth, width=1.0, height=40.0):
+    # a comb with its spine at the bottom and teeth pointing up
+    pts = [(0.0, 0.0)]
+    for k in range(teeth):
+        x = k * 2 * width
+        pts.append((x, height))
+        pts.append((x + width, height))
+        pts.append((x + width, 2.0))
+        pts.append((x + 2 * width, 2.0))
+    pts[-1] = (teeth * 2 * width - width, 0.0)
+    return PolylineBoundary(pts)
+
+
+class Islands(object):
+    # several square islands, only as much of the boundary protocol as the
+    # scanline engine needs
+    def __init__(self, count, size=2.0, gap=0.5):
+        self.rings = []
+        for k in range(count):
+            x = (k % 2) * (size + gap)
+            y = k * (size + gap) / 2
+            self.rings.append([(x, y), (x + size, y), (x + size, y + size / 4),
+                               (x, y + size / 4)])
+
+    def get_bounding_box(self, plane=None):
+        pts = [pt for ring in self.rings for pt in ring]
+        return PolylineBoundary(pts).get_bounding_box(plane)
+
+    def polygonize(self, tol=0.0):
+        return self.rings
+
+
+def best_of(func, setup, repeat=3):
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        times.append(timeit.timeit(lambda: func(*args), number=1))
+    return min(times)
+
+
+def bench(boundary, resolution_x, resolution_y):
+    frame = GridFrame(boundary, Plane.WorldXY, resolution_x, resolution_y)
+    gridlines, gridparams = build_grid(frame)
+    branched = scanline_branch_rows(boundary.polygonize(), frame)
+    count = sum(len(row) for row in branched)
+
+    def setup():
+        return [[type(row)(row) for row in branched], gridlines]
+
+    # both sequencings have to agree
+    legacy = legacy_sequence_rows(*setup())
+    indexed = sequence_rows(*setup())
+    assert legacy[1] == list(indexed[3])
+    assert ([(p.X, p.Y) for p in legacy[0]] ==
+            list(zip(indexed[0], indexed[1])))
+    t_legacy = best_of(legacy_sequence_rows, setup)
+    t_index = best_of(sequence_rows, setup)
+    print("{:>6} branches, {:>5} rows   legacy {:9.1f} ms   index {:8.1f} ms"
+          "   speedup {:6.1f}x".format(count, resolution_y, t_legacy * 1000,
+                                       t_index * 1000, t_legacy / t_index))
+
+
+def main():
+    teeth = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    for t in (teeth // 8, teeth // 4, teeth // 2, teeth):
+        t = max(t, 1)
+        bench(make_comb(t), t * 8, 20)
+    # many sparse rows with few branches each
+    for count in (200, 1000):
+        bench(Islands(count), 20, 10000)
+
+
+if __name__ == "__main__":
+    main()
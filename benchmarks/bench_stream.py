@@ -0,0 +1,100 @@
+"""
+Benchmark of the streaming DST decoder against pyembroidery.read() for a
+very large file: wall time and peak memory of the decoded stitches, read
+completely into a BufferedPattern and chunk by chunk.
+
+Usage:
+    python benchmarks/bench_stream.py [stitches]
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division, print_function
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pyembroidery
+
+from pyembroiderygh import iter_dst_chunks, read_buffered
+
+
+def make_design(path, stitches):
+    # a large multi-color satin spiral with jumps and trims
+    rnd = random.Random(0)
+    pattern = pyembroidery.EmbPattern()
+    for i in range(stitches):
+        a = i * 0.002
+        r = 200 + a * 40 + (i % 2) * 30
+        pattern.add_stitch_absolute(pyembroidery.STITCH, r * math.cos(a),
+                                    r * math.sin(a))
+        if i % 5000 == 4999:
+            pattern.add_command(pyembroidery.TRIM)
+        if i % 50000 == 49999:
+            thread = pyembroidery.EmbThread(rnd.randint(0, 0xffffff))
+            pattern.add_thread(thread)
+            pattern.add_command(pyembroidery.COLOR_CHANGE)
+    pyembroidery.write_dst(pattern, path)
+
+
+def legacy_read(path):
+    return pyembroidery.read(path)
+
+
+def chunked_count(path):
+    # consume the stitches chunk by chunk without keeping them
+    return sum(len(chunk) for chunk in iter_dst_chunks(path))
+
+
+def peak_memory(func, *args):
+    tracemalloc.start()
+    result = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    stitches = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "large.dst")
+        make_design(path, stitches)
+
+        # the streamed stitches have to equal the decoded ones
+        legacy = legacy_read(path)
+        buffered = read_buffered(path)
+        assert [list(s) for s in buffered.stitches] == legacy.stitches
+        assert chunked_count(path) == len(legacy.stitches)
+        del legacy, buffered
+
+        print("{} stitches, {:.1f} MB file".format(
+            stitches, os.path.getsize(path) / 1e6))
+        t_legacy = best_of(lambda: legacy_read(path))
+        m_legacy = peak_memory(legacy_read, path)
+        print("pyembroidery.read {:8.1f} ms   peak {:7.1f} MB".format(
+            t_legacy * 1000, m_legacy / 1e6))
+        for name, func in (("read_buffered", read_buffered),
+                           ("chunked", chunked_count)):
+            t = best_of(lambda: func(path))
+            m = peak_memory(func, path)
+            print("{:17} {:8.1f} ms   peak {:7.1f} MB   speedup {:5.1f}x   "
+                  "memory {:5.1f}x less".format(name, t * 1000, m / 1e6,
+                                                t_legacy / t, m_legacy / m))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput benchmark of the headless thumbnail renderer in files per
+second, rendering a library of synthetic embroidery files serially and on a
+pool of worker processes. For reference it also times the PNG writer of
+pyembroidery, which draws the full size pattern.
+
+Usage:
+    python benchmarks/bench_thumbnail.py [files] [stitches]
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division, print_function
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pyembroidery
+
+from pyembroiderygh import cpu_count, render_thumbnails
+
+
+def make_design(path, stitches, seed):
+    # a few colorblocks of satin-like zigzags with trims in between
+    rnd = random.Random(seed)
+    pattern = pyembroidery.EmbPattern()
+    blocks = 4
+    for b in range(blocks):
+        pattern.add_thread(pyembroidery.EmbThread(rnd.randint(0, 0xffffff)))
+        cx = rnd.uniform(-500, 500)
+        cy = rnd.uniform(-500, 500)
+        radius = rnd.uniform(100, 400)
+        for i in range(stitches // blocks):
+            a = i * 0.01
+            r = radius + (i % 2) * 30
+            pattern.add_stitch_absolute(pyembroidery.STITCH,
+                                        cx + r * math.cos(a),
+                                        cy + r * math.sin(a))
+            if i % 500 == 499:
+                pattern.add_command(pyembroidery.TRIM)
+        pattern.add_command(pyembroidery.COLOR_BREAK)
+    pyembroidery.write_dst(pattern, path)
+
+
+def best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    stitches = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    workdir = tempfile.mkdtemp()
+    try:
+        library = os.path.join(workdir, "library")
+        os.mkdir(library)
+        paths = []
+        for i in range(files):
+            path = os.path.join(library, "design_{:04d}.dst".format(i))
+            make_design(path, stitches, i)
+            paths.append(path)
+
+        serial_dir = os.path.join(workdir, "serial")
+        pool_dir = os.path.join(workdir, "pool")
+        os.mkdir(serial_dir)
+        os.mkdir(pool_dir)
+        workers = cpu_count()
+
+        # serial and pooled rendering have to agree
+        results = render_thumbnails(paths, serial_dir, workers=1)
+        assert all(error is None for _, _, error in results)
+        render_thumbnails(paths, pool_dir, workers=workers)
+        for _, target, _ in results:
+            with open(target, "rb") as f:
+                serial = f.read()
+            with open(os.path.join(pool_dir, os.path.basename(target)),
+                      "rb") as f:
+                assert serial == f.read()
+
+        def reference():
+            for path in paths[:8]:
+                pattern = pyembroidery.read(path)
+                pyembroidery.write_png(pattern, os.path.join(
+                    workdir, "reference.png"))
+
+        t_reference = best_of(reference, 1) / min(8, files)
+        t_serial = best_of(lambda: render_thumbnails(
+            paths, serial_dir, workers=1)) / files
+        t_pool = best_of(lambda: render_thumbnails(
+            paths, pool_dir, workers=workers)) / files
+        print("{} files, {} stitches each, {} workers".format(
+            files, stitches, workers))
+        print("pyembroidery png   {:8.1f} files/s".format(1 / t_reference))
+        print("thumbnail serial   {:8.1f} files/s".format(1 / t_serial))
+        print("thumbnail pool     {:8.1f} files/s   speedup {:5.1f}x"
+              .format(1 / t_pool, t_serial / t_pool))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
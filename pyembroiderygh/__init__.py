@@ -0,0 +1,97 @@
+"""
+pyembroideryGH core package.
+
+All logic of the pyembroideryGH Grasshopper components that does not need a
+running Rhino session lives here. The components are thin wrappers around
+this package, which makes it possible to run, benchmark and profile the
+core on any CPython build box. Inside Rhino the real RhinoCommon and
+Grasshopper types are used, elsewhere small local stand-ins take their place
+(see geometry and datatree modules).
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+from .geometry import (Point3d,
+                       Vector3d,
+                       Plane,
+                       BoundingBox,
+                       HAS_RHINO)
+from .datatree import (DataTree,
+                       GH_Path,
+                       HAS_GRASSHOPPER,
+                       new_tree)
+from .stitches import (COMMAND_TYPECODE,
+                       PARSE_CACHE,
+                       STITCH_REGEX,
+                       is_stitch_string,
+                       parse_stitch_string,
+                       parse_stitch_strings,
+                       parse_stitch_columns,
+                       format_stitch,
+                       point_to_stitch,
+                       points_to_stitches,
+                       block_to_strings)
+from .buffer import (StitchBuffer,
+                     StitchView,
+                     coerce_stitches,
+                     is_stitch_container)
+from .stitchblock import StitchBlock
+from .cache import (LRUCache,
+                    geometry_hash)
+from .grid import (FILL_CACHE,
+                   BranchIndex,
+                   GridFill,
+                   GridFrame,
+                   MultiBoundary,
+                   PolylineBoundary,
+                   fill_region,
+                   fill_regions)
+from .stats import FillStats
+from .travel import TravelRouter
+from .diskcache import (PatternCache,
+                        dump_pattern,
+                        load_pattern,
+                        pattern_key,
+                        user_cache_directory)
+from .reader import (PATTERN_CACHE,
+                     READ_ERROR,
+                     normalize_path,
+                     read_pattern,
+                     read_patterns)
+from .info import (PatternInfo,
+                   StitchCounter,
+                   read_info,
+                   read_infos)
+from .stream import (BufferedPattern,
+                     iter_dst_chunks,
+                     iter_stitch_chunks,
+                     read_buffered,
+                     read_buffered_pattern,
+                     read_buffered_patterns)
+from .thumbnail import (FILLER_COLORS,
+                        Raster,
+                        render_thumbnail,
+                        render_thumbnails,
+                        thumbnail_file,
+                        thumbnail_targets)
+from .pattern import (LOD_TOLERANCES,
+                      add_block,
+                      colorblock_ranges,
+                      decimate_indices,
+                      decimate_polyline,
+                      stitchblock_ranges,
+                      stitch_range,
+                      pattern_colorblocks,
+                      pattern_stitchblocks,
+                      merge_patterns,
+                      select_level,
+                      render_batches,
+                      render_blocks,
+                      render_levels,
+                      thread_rgb)
+from .utils import (cpu_count,
+                    match_longest,
+                    parallel_map,
+                    process_map)
@@ -0,0 +1,345 @@
+"""
+The StitchBuffer class, a compact array-backed container of stitches.
+
+A StitchBuffer stores stitches in three parallel typed columns (x and y as
+array('d'), commands as 64 bit integer array) in pyembroidery units (1/10
+mm, y axis pointing down). It is passed between components directly, so the
+"x,y,cmd" string round trip is only needed if somebody actually wants to
+look at the strings.
+
+Iterating a StitchBuffer yields (x, y, cmd) tuples, so it can be used
+wherever pyembroidery expects a block of stitches.
+
+A StitchView references a range of a parent StitchBuffer or of the stitch
+list of an EmbPattern without copying it. Views reflect later changes of
+their parent.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from array import array
+
+from .geometry import Point3d
+from .stitches import (COMMAND_TYPECODE,
+                       format_stitch,
+                       parse_stitch_columns,
+                       parse_stitch_string)
+
+__all__ = [
+    "StitchBuffer",
+    "StitchView",
+    "coerce_stitches",
+    "is_stitch_container",
+]
+
+try:
+    _string_types = (str, unicode)
+except NameError:
+    _string_types = (str,)
+
+
+def _column(typecode, values):
+    # arrays of the right type are used as they are, everything else is
+    # copied
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values if values is not None else ())
+
+
+class StitchBuffer(object):
+
+    __slots__ = ("xs", "ys", "cmds")
+
+    def __init__(self, xs=None, ys=None, cmds=None):
+        self.xs = _column("d", xs)
+        self.ys = _column("d", ys)
+        self.cmds = _column(COMMAND_TYPECODE, cmds)
+        if not len(self.xs) == len(self.ys) == len(self.cmds):
+            raise ValueError("Columns of a StitchBuffer need to have the " +
+                             "same length!")
+
+    # CONSTRUCTORS ------------------------------------------------------------
+
+    @classmethod
+    def from_stitches(cls, stitches):
+        """
+        Creates a buffer from an iterable of (x, y, cmd) stitches, e.g. a
+        block of an EmbPattern.
+        """
+        buf = cls()
+        buf.extend(stitches)
+        return buf
+
+    @classmethod
+    def from_points(cls, pts, cmds):
+        """
+        Creates a buffer from Rhino points and commands using longest list
+        matching. Coordinates are converted to pyembroidery units.
+        """
+        buf = cls()
+        if not pts or not cmds:
+            return buf
+        count = max(len(pts), len(cmds))
+        if len(pts) < count:
+            pts = list(pts) + [pts[-1]] * (count - len(pts))
+        if len(cmds) < count:
+            cmds = list(cmds) + [cmds[-1]] * (count - len(cmds))
+        buf.xs.extend(pt.X * 10 for pt in pts)
+        buf.ys.extend(pt.Y * -10 for pt in pts)
+        buf.cmds.extend(int(c) for c in cmds)
+        return buf
+
+    @classmethod
+    def from_strings(cls, stitches):
+        """
+        Creates a buffer from stitch strings using the batch parser. Returns
+        the buffer and a list of the indices of all invalid stitch strings.
+        """
+        xs, ys, cmds, invalid = parse_stitch_columns(stitches)
+        return cls(xs, ys, cmds), invalid
+
+    # CONTAINER PROTOCOL ------------------------------------------------------
+
+    def __len__(self):
+        return len(self.cmds)
+
+    def __iter__(self):
+        xs, ys, cmds = self.xs, self.ys, self.cmds
+        for i in range(len(cmds)):
+            yield (xs[i], ys[i], cmds[i])
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.__class__(self.xs[item], self.ys[item], self.cmds[item])
+        return (self.xs[item], self.ys[item], self.cmds[item])
+
+    def view(self, start=0, stop=None):
+        """
+        Returns a StitchView of a range of this buffer without copying it.
+        """
+        return StitchView(self, start, stop)
+
+    def __eq__(self, other):
+        if not isinstance(other, StitchBuffer):
+            return False
+        return (self.xs == other.xs and
+                self.ys == other.ys and
+                self.cmds == other.cmds)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "StitchBuffer({} Stitches)".format(len(self))
+
+    def ToString(self):
+        return repr(self)
+
+    # MODIFICATION ------------------------------------------------------------
+
+    def append(self, x, y, cmd):
+        self.xs.append(x)
+        self.ys.append(y)
+        self.cmds.append(int(cmd))
+
+    def extend(self, stitches):
+        if isinstance(stitches, StitchView):
+            stitches = stitches.to_buffer()
+        if isinstance(stitches, StitchBuffer):
+            self.xs.extend(stitches.xs)
+            self.ys.extend(stitches.ys)
+            self.cmds.extend(stitches.cmds)
+            return
+        xs, ys, cmds = self.xs, self.ys, self.cmds
+        for s in stitches:
+            xs.append(s[0])
+            ys.append(s[1])
+            cmds.append(int(s[2]))
+
+    def copy(self):
+        return self.__class__(array("d", self.xs),
+                              array("d", self.ys),
+                              array(COMMAND_TYPECODE, self.cmds))
+
+    # VIEWS -------------------------------------------------------------------
+
+    def to_list(self):
+        """
+        Returns the stitches as a list of (x, y, cmd) tuples.
+        """
+        return list(zip(self.xs, self.ys, self.cmds))
+
+    def to_strings(self, rhino_units=False):
+        """
+        Returns the stitches as stitch strings. By default the strings use
+        pyembroidery units like the ConstructStitch component, if rhino_units
+        is True they are scaled back to Rhino units like the strings
+        extracted from a pattern.
+        """
+        if rhino_units:
+            return [format_stitch(x * 0.1, y * -0.1, c) for x, y, c
+                    in zip(self.xs, self.ys, self.cmds)]
+        return [format_stitch(x, y, c) for x, y, c
+                in zip(self.xs, self.ys, self.cmds)]
+
+    def to_points(self):
+        """
+        Returns the stitch coordinates as points in Rhino units.
+        """
+        return [Point3d(x * 0.1, y * -0.1, 0.0) for x, y
+                in zip(self.xs, self.ys)]
+
+
+class StitchView(object):
+
+    __slots__ = ("parent", "start", "stop")
+
+    def __init__(self, parent, start=0, stop=None):
+        # views of views reference the original parent directly
+        if isinstance(parent, StitchView):
+            offset = parent.start
+            length = len(parent)
+            stop = length if stop is None else min(stop, length)
+            start, stop = offset + start, offset + stop
+            parent = parent.parent
+        length = len(parent)
+        if stop is None or stop > length:
+            stop = length
+        if start < 0 or start > stop:
+            raise ValueError("Invalid range [{}:{}] for a StitchView!"
+                             .format(start, stop))
+        self.parent = parent
+        self.start = start
+        self.stop = stop
+
+    # CONTAINER PROTOCOL ------------------------------------------------------
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        parent = self.parent
+        if isinstance(parent, StitchBuffer):
+            xs, ys, cmds = parent.xs, parent.ys, parent.cmds
+            for i in range(self.start, self.stop):
+                yield (xs[i], ys[i], cmds[i])
+        else:
+            for i in range(self.start, self.stop):
+                s = parent[i]
+                yield (s[0], s[1], s[2])
+
+    def __getitem__(self, item):
+        length = self.stop - self.start
+        if isinstance(item, slice):
+            start, stop, step = item.indices(length)
+            if step != 1:
+                return StitchBuffer.from_stitches(self)[item]
+            return StitchView(self, start, max(start, stop))
+        if item < 0:
+            item += length
+        if item < 0 or item >= length:
+            raise IndexError("StitchView index out of range")
+        s = self.parent[self.start + item]
+        return (s[0], s[1], s[2])
+
+    def __repr__(self):
+        return "StitchView({} Stitches)".format(len(self))
+
+    def ToString(self):
+        return repr(self)
+
+    # COLUMNS -----------------------------------------------------------------
+
+    def _column(self, index, typecode):
+        parent = self.parent
+        if isinstance(parent, StitchBuffer):
+            column = (parent.xs, parent.ys, parent.cmds)[index]
+            return column[self.start:self.stop]
+        return array(typecode, (parent[i][index] for i
+                                in range(self.start, self.stop)))
+
+    @property
+    def xs(self):
+        """
+        The x column of the viewed range (a copy).
+        """
+        return self._column(0, "d")
+
+    @property
+    def ys(self):
+        """
+        The y column of the viewed range (a copy).
+        """
+        return self._column(1, "d")
+
+    @property
+    def cmds(self):
+        """
+        The command column of the viewed range (a copy).
+        """
+        return self._column(2, COMMAND_TYPECODE)
+
+    # VIEWS -------------------------------------------------------------------
+
+    def to_buffer(self):
+        """
+        Returns a StitchBuffer holding a copy of the viewed stitches.
+        """
+        return StitchBuffer(self.xs, self.ys, self.cmds)
+
+    copy = to_buffer
+
+    def to_list(self):
+        return list(self)
+
+    def to_strings(self, rhino_units=False):
+        return self.to_buffer().to_strings(rhino_units)
+
+    def to_points(self):
+        return self.to_buffer().to_points()
+
+
+def is_stitch_container(obj):
+    """
+    Returns True if obj is a StitchBuffer or a StitchView.
+    """
+    return isinstance(obj, (StitchBuffer, StitchView))
+
+
+def coerce_stitches(data):
+    """
+    Converts the items of a Grasshopper list or branch into a single
+    StitchBuffer. Items can be StitchBuffers, StitchViews, stitch strings or
+    (x, y, cmd) sequences and may be mixed. Returns the buffer and a list of
+    the indices of all items that are no valid stitches. A single
+    StitchBuffer or StitchView is returned as is, without copying it.
+    """
+    data = list(data)
+    if len(data) == 1 and is_stitch_container(data[0]):
+        return data[0], []
+    # plain lists of stitch strings go through the batch parser
+    if all(issubclass(t, _string_types) for t in set(map(type, data))):
+        return StitchBuffer.from_strings(data)
+    buf = StitchBuffer()
+    invalid = []
+    for i, item in enumerate(data):
+        if isinstance(item, (StitchBuffer, StitchView)):
+            buf.extend(item)
+        elif isinstance(item, _string_types):
+            parsed = parse_stitch_string(item)
+            if parsed is None:
+                invalid.append(i)
+            else:
+                buf.append(*parsed)
+        else:
+            try:
+                buf.append(float(item[0]), float(item[1]), int(item[2]))
+            except (TypeError, ValueError, IndexError):
+                invalid.append(i)
+    return buf, invalid
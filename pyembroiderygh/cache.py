@@ -0,0 +1,105 @@
+"""
+Caching helpers of the pyembroideryGH core: a bounded LRU cache with hit and
+miss counters and a stable hash for geometry described by numbers.
+
+Grasshopper re-solves a component whenever any of its inputs changes, so
+results that only depend on unchanged inputs can be reused across solves.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from array import array
+from collections import OrderedDict
+import hashlib
+import threading
+
+__all__ = [
+    "LRUCache",
+    "geometry_hash",
+]
+
+
+def geometry_hash(values):
+    """
+    Returns a stable hex digest of a sequence of numbers, e.g. the control
+    points, weights and knots of a curve. Equal values always result in the
+    same digest, also across sessions.
+    """
+    data = array("d", values)
+    data = data.tobytes() if hasattr(data, "tobytes") else data.tostring()
+    return hashlib.sha1(data).hexdigest()
+
+
+class LRUCache(object):
+    """
+    A bounded mapping that evicts the least recently used entry once more
+    than maxsize entries are stored. Counts hits and misses of get().
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "_data", "_lock")
+
+    def __init__(self, maxsize=128):
+        if maxsize < 1:
+            raise ValueError("Size of a LRUCache has to be at least 1!")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored for key and marks it as most recently used.
+        Returns default and counts a miss if key is not stored.
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores value for key, evicting the least recently used entries if
+        the cache is full.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Returns (hits, misses, maxsize, currsize) like functools.lru_cache.
+        """
+        return (self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __repr__(self):
+        return ("LRUCache(hits={}, misses={}, maxsize={}, currsize={})"
+                .format(*self.info()))
+
+    def ToString(self):
+        return repr(self)
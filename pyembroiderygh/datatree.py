@@ -0,0 +1,158 @@
+"""
+Minimal Grasshopper DataTree / GH_Path types used by the pyembroideryGH core.
+
+Inside Grasshopper the real Grasshopper.DataTree and
+Grasshopper.Kernel.Data.GH_Path are used. Everywhere else small local
+stand-ins with the same interface are provided.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+__all__ = [
+    "DataTree",
+    "GH_Path",
+    "HAS_GRASSHOPPER",
+    "new_tree",
+]
+
+
+class _GH_Path(object):
+    """
+    Stand-in for Grasshopper.Kernel.Data.GH_Path.
+    """
+
+    __slots__ = ("Indices",)
+
+    def __init__(self, *indices):
+        if len(indices) == 1 and isinstance(indices[0], _GH_Path):
+            indices = indices[0].Indices
+        self.Indices = tuple(int(i) for i in indices)
+
+    def __iter__(self):
+        return iter(self.Indices)
+
+    def __len__(self):
+        return len(self.Indices)
+
+    def __getitem__(self, item):
+        return self.Indices[item]
+
+    def __eq__(self, other):
+        return (isinstance(other, _GH_Path) and
+                self.Indices == other.Indices)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.Indices < other.Indices
+
+    def __hash__(self):
+        return hash(self.Indices)
+
+    @property
+    def Length(self):
+        return len(self.Indices)
+
+    def ToString(self):
+        return "{" + ";".join(str(i) for i in self.Indices) + "}"
+
+    __str__ = ToString
+
+    def __repr__(self):
+        return "GH_Path" + self.ToString()
+
+
+class _DataTreeMeta(type):
+    """
+    Allows the Grasshopper-style generic syntax DataTree[object]().
+    """
+
+    def __getitem__(cls, item):
+        return cls
+
+
+_DataTreeBase = _DataTreeMeta("_DataTreeBase", (object,), {})
+
+
+class _DataTree(_DataTreeBase):
+    """
+    Stand-in for Grasshopper.DataTree[object]. Branches are kept in
+    insertion order.
+    """
+
+    def __init__(self):
+        self._paths = []
+        self._branches = {}
+
+    def EnsurePath(self, path):
+        if not isinstance(path, _GH_Path):
+            path = _GH_Path(*path)
+        branch = self._branches.get(path)
+        if branch is None:
+            branch = []
+            self._branches[path] = branch
+            self._paths.append(path)
+        return branch
+
+    def Add(self, data, path=None):
+        if path is None:
+            path = _GH_Path(0)
+        self.EnsurePath(path).append(data)
+
+    def AddRange(self, data, path=None):
+        if path is None:
+            path = _GH_Path(0)
+        self.EnsurePath(path).extend(data)
+
+    def Branch(self, path):
+        if isinstance(path, int):
+            return self._branches[self._paths[path]]
+        if not isinstance(path, _GH_Path):
+            path = _GH_Path(*path)
+        return self._branches.get(path)
+
+    def Path(self, index):
+        return self._paths[index]
+
+    @property
+    def Paths(self):
+        return list(self._paths)
+
+    @property
+    def Branches(self):
+        return [self._branches[p] for p in self._paths]
+
+    @property
+    def BranchCount(self):
+        return len(self._paths)
+
+    @property
+    def DataCount(self):
+        return sum(len(b) for b in self._branches.values())
+
+    def AllData(self):
+        data = []
+        for p in self._paths:
+            data.extend(self._branches[p])
+        return data
+
+
+# prefer the real Grasshopper types whenever they are available
+try:
+    from Grasshopper import DataTree
+    from Grasshopper.Kernel.Data import GH_Path
+    HAS_GRASSHOPPER = True
+except ImportError:
+    DataTree = _DataTree
+    GH_Path = _GH_Path
+    HAS_GRASSHOPPER = False
+
+
+def new_tree():
+    """
+    Returns a new, empty DataTree of objects.
+    """
+    return DataTree[object]()
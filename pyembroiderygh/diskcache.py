@@ -0,0 +1,421 @@
+"""
+Persistent on-disk cache of decoded embroidery patterns.
+
+Decoding embroidery formats is pure python and slow, while the same files
+are opened over and over again. The PatternCache stores every decoded
+pattern in a compact binary form in a cache directory, so later reads (also
+in later sessions) skip decoding entirely:
+    1. A header with the stitch count and the types of the columns.
+    2. The thread list, extras and metadata of the pattern as JSON.
+    3. The x, y and command columns of the stitches as raw arrays, the
+       commands as 64 bit integers, as they carry thread and needle bits
+       above 2^31.
+Nothing in an entry is ever executed when it is loaded. Patterns with
+metadata that JSON can not represent (after tagging tuples, bytes and
+threads) are not cached.
+Entries are keyed by the normalized path, size, modification time and
+content hash of the source file, so changed files are never served from the
+cache. The total size of the directory is bounded, the least recently used
+entries are evicted first.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from array import array
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+__all__ = [
+    "PatternCache",
+    "dump_pattern",
+    "load_pattern",
+    "pattern_key",
+    "user_cache_directory",
+]
+
+# magic, format version, column flags, stitch count, metadata length
+_HEADER = struct.Struct("<4sBBII")
+_MAGIC = b"PGHC"
+_VERSION = 3
+# flag of integer coordinate columns
+_INT_COORDS = 1
+_EXTENSION = ".pghc"
+# metadata values that are stored as they are
+try:
+    _PLAIN_TYPES = (bool, int, long, float, str, unicode)
+except NameError:
+    _PLAIN_TYPES = (bool, int, float, str)
+# attributes of an EmbThread
+_THREAD_FIELDS = ("color", "description", "catalog_number", "details",
+                  "brand", "chart", "weight")
+
+
+def _to_bytes(column):
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    if hasattr(column, "tobytes"):
+        return column.tobytes()
+    return column.tostring()
+
+
+def _from_bytes(typecode, data):
+    column = array(typecode)
+    if hasattr(column, "frombytes"):
+        column.frombytes(data)
+    else:
+        column.fromstring(data)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def _commands_to_bytes(commands):
+    return struct.pack("<{}q".format(len(commands)), *commands)
+
+
+def _commands_from_bytes(data):
+    return struct.unpack("<{}q".format(len(data) // 8), data)
+
+
+def _is_int32(values):
+    for v in values:
+        if not isinstance(v, int) or not -2147483648 <= v <= 2147483647:
+            return False
+    return True
+
+
+def user_cache_directory(*parts):
+    """
+    Returns a cache directory that only belongs to the current user:
+    %LOCALAPPDATA% (or %APPDATA%) on Windows, $XDG_CACHE_HOME or ~/.cache
+    elsewhere, with pyembroideryGH and parts appended.
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA")
+    if not base:
+        base = (os.environ.get("XDG_CACHE_HOME") or
+                os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "pyembroideryGH", *parts)
+
+
+def pattern_key(filepath, blocksize=1 << 20):
+    """
+    Returns the cache key of an embroidery file, a hex digest of its
+    normalized path, size, modification time and content hash. Raises
+    OSError (IOError) if the file can not be accessed.
+    """
+    filepath = os.path.normcase(os.path.abspath(os.path.normpath(filepath)))
+    stat = os.stat(filepath)
+    content = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        while True:
+            block = f.read(blocksize)
+            if not block:
+                break
+            content.update(block)
+    identity = "{}|{}|{!r}|{}".format(filepath, stat.st_size, stat.st_mtime,
+                                      content.hexdigest())
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+
+def _thread_classes():
+    # EmbThread and all of its subclasses in pyembroidery, by full name
+    classes = {}
+    pending = [pyembroidery.EmbThread]
+    while pending:
+        cls = pending.pop()
+        classes[cls.__module__ + "." + cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def _encode(value, classes):
+    """
+    Encodes a metadata value as JSON data. Everything besides numbers,
+    strings and lists is tagged as a single key object. Raises TypeError
+    for values that can not be stored without changing them.
+    """
+    if value is None or isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, list):
+        return [_encode(v, classes) for v in value]
+    if isinstance(value, tuple):
+        return {"tuple": [_encode(v, classes) for v in value]}
+    if isinstance(value, dict):
+        return {"dict": [[_encode(k, classes), _encode(v, classes)]
+                         for k, v in value.items()]}
+    if isinstance(value, (bytes, bytearray)):
+        data = base64.b64encode(bytes(value)).decode("ascii")
+        return {type(value).__name__: data}
+    if isinstance(value, pyembroidery.EmbThread):
+        name = type(value).__module__ + "." + type(value).__name__
+        fields = vars(value)
+        if name not in classes or set(fields) != set(_THREAD_FIELDS):
+            raise TypeError("Thread can not be cached!")
+        return {"thread": [name, [_encode(fields[f], classes)
+                                  for f in _THREAD_FIELDS]]}
+    raise TypeError("Metadata can not be cached!")
+
+
+def _decode(value, classes):
+    """
+    Restores a metadata value from its JSON data, see _encode(). Only
+    creates threads of the known classes, nothing is executed.
+    """
+    if isinstance(value, list):
+        return [_decode(v, classes) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if len(value) != 1:
+        raise ValueError("Cached pattern has invalid metadata!")
+    tag, content = list(value.items())[0]
+    if tag == "tuple":
+        return tuple(_decode(v, classes) for v in content)
+    if tag == "dict":
+        return dict((_decode(k, classes), _decode(v, classes))
+                    for k, v in content)
+    if tag == "bytes":
+        return bytes(base64.b64decode(content.encode("ascii")))
+    if tag == "bytearray":
+        return bytearray(base64.b64decode(content.encode("ascii")))
+    if tag == "thread":
+        name, fields = content
+        cls = classes[name]
+        thread = cls.__new__(cls)
+        if len(fields) != len(_THREAD_FIELDS):
+            raise ValueError("Cached pattern has invalid metadata!")
+        for field, v in zip(_THREAD_FIELDS, fields):
+            setattr(thread, field, _decode(v, classes))
+        return thread
+    raise ValueError("Cached pattern has invalid metadata!")
+
+
+def _dump_metadata(pattern):
+    classes = _thread_classes()
+    metadata = {"threadlist": _encode(list(pattern.threadlist), classes),
+                "extras": _encode(dict(pattern.extras), classes),
+                "previous": [pattern._previousX, pattern._previousY]}
+    return json.dumps(metadata, sort_keys=True).encode("utf-8")
+
+
+def _load_metadata(data):
+    try:
+        metadata = json.loads(data.decode("utf-8"))
+        classes = _thread_classes()
+        threadlist = _decode(metadata["threadlist"], classes)
+        extras = _decode(metadata["extras"], classes)
+        previousX, previousY = metadata["previous"]
+    except (KeyError, TypeError, AttributeError, UnicodeError):
+        raise ValueError("Cached pattern has invalid metadata!")
+    if not isinstance(threadlist, list) or not isinstance(extras, dict):
+        raise ValueError("Cached pattern has invalid metadata!")
+    return threadlist, extras, (previousX, previousY)
+
+
+def dump_pattern(pattern):
+    """
+    Returns the compact binary form of a pattern used by the PatternCache.
+    Raises TypeError if the metadata of the pattern can not be stored and
+    struct.error if a command does not fit into 64 bits.
+    """
+    stitches = pattern.stitches
+    xs = [s[0] for s in stitches]
+    ys = [s[1] for s in stitches]
+    flags = 0
+    if _is_int32(xs) and _is_int32(ys):
+        flags |= _INT_COORDS
+        coords = "i"
+    else:
+        coords = "d"
+    metadata = _dump_metadata(pattern)
+    return b"".join((_HEADER.pack(_MAGIC, _VERSION, flags, len(stitches),
+                                  len(metadata)),
+                     metadata,
+                     _to_bytes(array(coords, xs)),
+                     _to_bytes(array(coords, ys)),
+                     _commands_to_bytes([s[2] for s in stitches])))
+
+
+def load_pattern(data):
+    """
+    Restores a pattern from its compact binary form, see dump_pattern().
+    Raises ValueError if data is not a pattern of the current format.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Cached pattern is incomplete!")
+    magic, version, flags, count, metasize = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Cached pattern has an unknown format!")
+    coords = "i" if flags & _INT_COORDS else "d"
+    coordsize = array(coords).itemsize * count
+    cmdsize = 8 * count
+    pos = _HEADER.size
+    if len(data) != pos + metasize + 2 * coordsize + cmdsize:
+        raise ValueError("Cached pattern is incomplete!")
+    threadlist, extras, previous = _load_metadata(data[pos:pos + metasize])
+    pos += metasize
+    xs = _from_bytes(coords, data[pos:pos + coordsize])
+    pos += coordsize
+    ys = _from_bytes(coords, data[pos:pos + coordsize])
+    pos += coordsize
+    cmds = _commands_from_bytes(data[pos:pos + cmdsize])
+    pattern = pyembroidery.EmbPattern()
+    pattern.stitches = [[x, y, c] for x, y, c in zip(xs, ys, cmds)]
+    pattern.threadlist = threadlist
+    pattern.extras = extras
+    pattern._previousX, pattern._previousY = previous
+    return pattern
+
+
+class PatternCache(object):
+    """
+    A size bounded cache of decoded patterns in a directory. Every entry is
+    one file, its modification time tracks the last use. Once the entries
+    take more than maxbytes, the least recently used ones are removed.
+    Counts hits and misses of get().
+    """
+
+    __slots__ = ("directory", "maxbytes", "hits", "misses")
+
+    def __init__(self, directory, maxbytes=512 * 1024 * 1024):
+        if maxbytes < 1:
+            raise ValueError("Size of a PatternCache has to be at least 1 " +
+                             "byte!")
+        self.directory = directory
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _EXTENSION)
+
+    def _entries(self):
+        # (last use, size, path) of all entries
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(_EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get(self, key, default=None):
+        """
+        Returns the pattern stored for key and marks it as most recently
+        used. Returns default and counts a miss if key is not stored or the
+        entry can not be loaded.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pattern = load_pattern(f.read())
+            os.utime(path, None)
+        except (IOError, OSError, ValueError, UnicodeError):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pattern
+
+    def put(self, key, pattern):
+        """
+        Stores pattern for key, evicting the least recently used entries if
+        the cache is full. Returns False if the pattern can not be stored,
+        caching is only an optimization and never raises.
+        """
+        try:
+            data = dump_pattern(pattern)
+        except Exception:
+            return False
+        if len(data) > self.maxbytes:
+            return False
+        path = self._path(key)
+        # write to a temporary file first, so readers never see partial
+        # entries
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                # only readable and writable by the current user
+                os.makedirs(self.directory, 0o700)
+            with open(temp, "wb") as f:
+                f.write(data)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except Exception:
+            try:
+                if os.path.exists(temp):
+                    os.remove(temp)
+            except (IOError, OSError):
+                pass
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        Removes the least recently used entries until all entries together
+        take at most maxbytes.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.maxbytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries())
+
+    def info(self):
+        """
+        Returns (hits, misses, maxbytes, currbytes).
+        """
+        return (self.hits, self.misses, self.maxbytes,
+                sum(size for _, size, _ in self._entries()))
+
+    def __repr__(self):
+        return ("PatternCache(hits={}, misses={}, maxbytes={}, " +
+                "currbytes={})").format(*self.info())
+
+    def ToString(self):
+        return repr(self)
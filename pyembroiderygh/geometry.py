@@ -0,0 +1,208 @@
+"""
+Minimal geometry types used by the pyembroideryGH core.
+
+Inside Rhino the real RhinoCommon types are used. Everywhere else (CPython on
+a build box, benchmarks, profiling) small local stand-ins with the same
+attribute and method names are provided, so the core code never has to know
+in which environment it is running.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+import math
+
+__all__ = [
+    "Point3d",
+    "Vector3d",
+    "Plane",
+    "BoundingBox",
+    "HAS_RHINO",
+    "copy_plane",
+    "to_plane_coordinates",
+]
+
+
+class _Point3d(object):
+    """
+    Stand-in for Rhino.Geometry.Point3d.
+    """
+
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.X = x
+        self.Y = y
+        self.Z = z
+
+    def __add__(self, other):
+        return self.__class__(self.X + other.X,
+                              self.Y + other.Y,
+                              self.Z + other.Z)
+
+    def __sub__(self, other):
+        return self.__class__(self.X - other.X,
+                              self.Y - other.Y,
+                              self.Z - other.Z)
+
+    def __mul__(self, factor):
+        return self.__class__(self.X * factor,
+                              self.Y * factor,
+                              self.Z * factor)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        try:
+            return (self.X == other.X and
+                    self.Y == other.Y and
+                    self.Z == other.Z)
+        except AttributeError:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self.X, self.Y, self.Z))
+
+    def __getitem__(self, item):
+        return (self.X, self.Y, self.Z)[item]
+
+    def __repr__(self):
+        return "{}({}, {}, {})".format(self.__class__.__name__,
+                                       self.X, self.Y, self.Z)
+
+    def DistanceToSquared(self, other):
+        dx = self.X - other.X
+        dy = self.Y - other.Y
+        dz = self.Z - other.Z
+        return dx * dx + dy * dy + dz * dz
+
+    def DistanceTo(self, other):
+        return math.sqrt(self.DistanceToSquared(other))
+
+
+class _Vector3d(_Point3d):
+    """
+    Stand-in for Rhino.Geometry.Vector3d.
+    """
+
+    __slots__ = ()
+
+    @property
+    def Length(self):
+        return math.sqrt(self.X * self.X + self.Y * self.Y + self.Z * self.Z)
+
+
+class _Plane(object):
+    """
+    Stand-in for Rhino.Geometry.Plane. Can be constructed from another plane
+    (copy) or from an origin and two axis vectors.
+    """
+
+    __slots__ = ("Origin", "XAxis", "YAxis", "ZAxis")
+
+    def __init__(self, origin=None, xaxis=None, yaxis=None):
+        if isinstance(origin, _Plane):
+            other = origin
+            origin = other.Origin
+            xaxis = other.XAxis
+            yaxis = other.YAxis
+        if origin is None:
+            origin = _Point3d(0.0, 0.0, 0.0)
+        if xaxis is None:
+            xaxis = _Vector3d(1.0, 0.0, 0.0)
+        if yaxis is None:
+            yaxis = _Vector3d(0.0, 1.0, 0.0)
+        self.Origin = _Point3d(origin.X, origin.Y, origin.Z)
+        self.XAxis = _unitize(xaxis)
+        self.YAxis = _unitize(yaxis)
+        self.ZAxis = _unitize(_Vector3d(
+            self.XAxis.Y * self.YAxis.Z - self.XAxis.Z * self.YAxis.Y,
+            self.XAxis.Z * self.YAxis.X - self.XAxis.X * self.YAxis.Z,
+            self.XAxis.X * self.YAxis.Y - self.XAxis.Y * self.YAxis.X))
+
+    def PointAt(self, u, v, w=0.0):
+        o, x, y, z = self.Origin, self.XAxis, self.YAxis, self.ZAxis
+        return _Point3d(o.X + u * x.X + v * y.X + w * z.X,
+                        o.Y + u * x.Y + v * y.Y + w * z.Y,
+                        o.Z + u * x.Z + v * y.Z + w * z.Z)
+
+    def __repr__(self):
+        return "Plane(O={}, X={}, Y={})".format(self.Origin,
+                                               self.XAxis,
+                                               self.YAxis)
+
+
+def _unitize(vec):
+    length = math.sqrt(vec.X * vec.X + vec.Y * vec.Y + vec.Z * vec.Z)
+    if length == 0.0:
+        raise ValueError("Cannot unitize a zero-length vector!")
+    return _Vector3d(vec.X / length, vec.Y / length, vec.Z / length)
+
+
+_Plane.WorldXY = _Plane()
+
+
+class BoundingBox(object):
+    """
+    Axis-aligned bounding box with the same Min/Max/Center accessors as
+    Rhino.Geometry.BoundingBox.
+    """
+
+    __slots__ = ("Min", "Max")
+
+    def __init__(self, minpt, maxpt):
+        self.Min = minpt
+        self.Max = maxpt
+
+    @property
+    def Center(self):
+        return _Point3d((self.Min.X + self.Max.X) * 0.5,
+                        (self.Min.Y + self.Max.Y) * 0.5,
+                        (self.Min.Z + self.Max.Z) * 0.5)
+
+    @classmethod
+    def from_coordinates(cls, coords):
+        xs, ys, zs = zip(*coords)
+        return cls(_Point3d(min(xs), min(ys), min(zs)),
+                   _Point3d(max(xs), max(ys), max(zs)))
+
+
+# prefer the real RhinoCommon types whenever they are available
+try:
+    from Rhino.Geometry import Point3d, Vector3d, Plane
+    HAS_RHINO = True
+except ImportError:
+    Point3d = _Point3d
+    Vector3d = _Vector3d
+    Plane = _Plane
+    HAS_RHINO = False
+
+
+def copy_plane(plane, origin=None):
+    """
+    Returns a copy of the supplied plane, optionally moved to a new origin.
+    """
+    pln = Plane(plane)
+    if origin is not None:
+        pln.Origin = origin
+    return pln
+
+
+def to_plane_coordinates(plane, x, y, z=0.0):
+    """
+    Maps world coordinates into the (u, v, w) coordinate system of a plane.
+    Works for RhinoCommon planes as well as for the local stand-in.
+    """
+    o, xa, ya, za = plane.Origin, plane.XAxis, plane.YAxis, plane.ZAxis
+    dx = x - o.X
+    dy = y - o.Y
+    dz = z - o.Z
+    return (dx * xa.X + dy * xa.Y + dz * xa.Z,
+            dx * ya.X + dy * ya.Y + dz * ya.Z,
+            dx * za.X + dy * za.Y + dz * za.Z)
@@ -0,0 +1,922 @@
+"""
+Grid-based fill of a closed boundary, the core of the EmbroideryGrid
+component.
+
+The fill works in three stages:
+    1. A grid of rows is created inside the bounding box of the boundary,
+       aligned to the stitch plane.
+    2. Every row is intersected with the boundary, which splits it into
+       branches (runs of grid parameters that lie inside the boundary).
+    3. The branches are sequenced row by row into one continuous list of
+       stitches. Jumps between non-adjacent rows are trimmed, or replaced by
+       travel stitches inside the boundary if a TravelRouter is used.
+
+The boundary is supplied as any object implementing the boundary protocol:
+    get_bounding_box(plane): BoundingBox of the boundary in the coordinate
+                             system of the plane (world if plane is None).
+    intersect_line(start, end, tol): Sorted list of normalized line
+                                     parameters where the line from start
+                                     to end crosses the boundary.
+    contains(pt, tol): True if pt lies inside or on the boundary.
+    polygonize(tol): List of closed rings approximating the boundary within
+                     tol, each a list of points or (x, y, z) tuples. Only
+                     needed for the scanline engine.
+    geometry_key(): Stable hash of the geometry of the boundary. Optional,
+                    fills of boundaries without it are never cached.
+PolylineBoundary is the headless implementation of that protocol,
+MultiBoundary combines an outer boundary and its holes into a single region
+using the even-odd rule.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from array import array
+from collections import deque
+from functools import partial
+import heapq
+import threading
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .geometry import (BoundingBox,
+                       Point3d,
+                       copy_plane,
+                       to_plane_coordinates)
+from .buffer import StitchBuffer
+from .cache import LRUCache, geometry_hash
+from .scanline import PolygonIndex, params_between, scanline_branch_rows
+from .spatial import PointGrid
+from .stitches import COMMAND_TYPECODE
+from .stats import FillStats, clock
+from .travel import TravelRouter
+from .utils import cpu_count, parallel_map
+
+__all__ = [
+    "FILL_CACHE",
+    "BranchIndex",
+    "GridFill",
+    "GridFrame",
+    "GridLine",
+    "MultiBoundary",
+    "NonEmptyRows",
+    "PolylineBoundary",
+    "branch_rows",
+    "build_grid",
+    "fill_region",
+    "fill_key",
+    "fill_regions",
+    "grid_points",
+    "find_closest_branch",
+    "get_branch_counts",
+    "get_first_nonzero",
+    "segment_row",
+    "sequence_rows",
+]
+
+
+class GridLine(object):
+    """
+    A single row of the grid as a line with a normalized [0, 1] domain.
+    """
+
+    __slots__ = ("From", "To")
+
+    def __init__(self, start, end):
+        self.From = start
+        self.To = end
+
+    def PointAt(self, t):
+        a = self.From
+        b = self.To
+        return Point3d(a.X + (b.X - a.X) * t,
+                       a.Y + (b.Y - a.Y) * t,
+                       a.Z + (b.Z - a.Z) * t)
+
+
+class PolylineBoundary(object):
+    """
+    A closed polyline boundary. Intersections and containment are evaluated
+    in the XY projection of the polyline, like the WorldXY containment test
+    of the original component.
+    """
+
+    def __init__(self, points):
+        pts = [(p[0], p[1], p[2] if len(p) > 2 else 0.0)
+               if isinstance(p, (tuple, list)) else (p.X, p.Y, p.Z)
+               for p in points]
+        if len(pts) < 3:
+            raise ValueError("A boundary needs at least three points!")
+        if pts[0] != pts[-1]:
+            pts.append(pts[0])
+        self.points = pts
+
+    def __len__(self):
+        return len(self.points) - 1
+
+    def polygonize(self, tol=0.0):
+        """
+        Returns the rings of this boundary as lists of (x, y, z) tuples.
+        """
+        return [self.points]
+
+    def geometry_key(self):
+        return geometry_hash([c for pt in self.points for c in pt])
+
+    def get_bounding_box(self, plane=None):
+        if plane is None:
+            return BoundingBox.from_coordinates(self.points)
+        return BoundingBox.from_coordinates(
+            [to_plane_coordinates(plane, x, y, z) for x, y, z in self.points])
+
+    def intersect_line(self, start, end, tol=0.0):
+        """
+        Intersects the line from start to end with the boundary and returns
+        the parameters as pairs, every pair enclosing a part of the line
+        that lies inside or on the boundary.
+
+        Crossings are counted with the half-open rule: a vertex lying
+        exactly on the line counts as lying on its right side, so edges
+        collinear with the line never cross it and a tangent touch does not
+        change the parity. Collinear edges are merged into the inside parts
+        as overlaps instead. A single tangent vertex with nothing else on
+        the line is reported as one parameter (a corner hit).
+        """
+        px = start.X
+        py = start.Y
+        rx = end.X - px
+        ry = end.Y - py
+        rr = rx * rx + ry * ry
+        if rr == 0.0:
+            return []
+        pts = self.points
+        # side of every vertex relative to the line, > 0 is left
+        sides = [rx * (pt[1] - py) - ry * (pt[0] - px) for pt in pts]
+        crossings = []
+        overlaps = []
+        touches = []
+        for k in range(len(pts) - 1):
+            ax, ay = pts[k][0], pts[k][1]
+            sa = sides[k]
+            sb = sides[k + 1]
+            if sa == 0.0 and sb == 0.0:
+                # collinear edge, reported as overlap
+                t0 = ((ax - px) * rx + (ay - py) * ry) / rr
+                t1 = ((pts[k + 1][0] - px) * rx +
+                      (pts[k + 1][1] - py) * ry) / rr
+                if t0 > t1:
+                    t0, t1 = t1, t0
+                if t1 >= 0.0 and t0 <= 1.0:
+                    overlaps.append((max(t0, 0.0), min(t1, 1.0)))
+                continue
+            if sa == 0.0:
+                t = ((ax - px) * rx + (ay - py) * ry) / rr
+                if 0.0 <= t <= 1.0:
+                    touches.append(t)
+            if (sa > 0.0) == (sb > 0.0):
+                continue
+            # the edge crosses the line, its parameter along the line
+            sx = pts[k + 1][0] - ax
+            sy = pts[k + 1][1] - ay
+            t = ((ax - px) * sy - (ay - py) * sx) / (rx * sy - ry * sx)
+            if 0.0 <= t <= 1.0:
+                crossings.append(t)
+        crossings.sort()
+        intervals = [(crossings[k], crossings[k + 1])
+                     for k in range(0, len(crossings) - 1, 2)]
+        intervals.extend(overlaps)
+        if not intervals:
+            if len(touches) == 1:
+                return touches
+            return []
+        # union of the inside parts and the overlaps
+        intervals.sort()
+        params = list(intervals[0])
+        for t0, t1 in intervals[1:]:
+            if t0 <= params[-1]:
+                params[-1] = max(params[-1], t1)
+            else:
+                params.append(t0)
+                params.append(t1)
+        return params
+
+    def contains(self, pt, tol=0.0):
+        """
+        Crossing number containment test. Points within tol of an edge count
+        as inside (coincident).
+        """
+        x = pt.X
+        y = pt.Y
+        inside = False
+        tol2 = tol * tol
+        pts = self.points
+        for k in range(len(pts) - 1):
+            x0, y0 = pts[k][0], pts[k][1]
+            x1, y1 = pts[k + 1][0], pts[k + 1][1]
+            # coincidence check
+            dx = x1 - x0
+            dy = y1 - y0
+            seglen2 = dx * dx + dy * dy
+            if seglen2 > 0.0:
+                f = ((x - x0) * dx + (y - y0) * dy) / seglen2
+                f = 0.0 if f < 0.0 else (1.0 if f > 1.0 else f)
+                cx = x0 + f * dx - x
+                cy = y0 + f * dy - y
+                if cx * cx + cy * cy <= tol2:
+                    return True
+            # crossing check
+            if (y0 > y) != (y1 > y):
+                xint = x0 + (y - y0) * dx / dy
+                if x < xint:
+                    inside = not inside
+        return inside
+
+
+class MultiBoundary(object):
+    """
+    A region made of several boundaries, usually an outer boundary and the
+    holes inside of it. Points are inside the region if they are inside an
+    odd number of boundaries (even-odd rule). All boundaries are intersected
+    together, so the region is filled and sequenced in a single pass.
+    """
+
+    def __init__(self, boundaries):
+        self.boundaries = list(boundaries)
+        if not self.boundaries:
+            raise ValueError("A MultiBoundary needs at least one boundary!")
+
+    def __len__(self):
+        return len(self.boundaries)
+
+    def get_bounding_box(self, plane=None):
+        corners = []
+        for boundary in self.boundaries:
+            bbx = boundary.get_bounding_box(plane)
+            corners.append((bbx.Min.X, bbx.Min.Y, bbx.Min.Z))
+            corners.append((bbx.Max.X, bbx.Max.Y, bbx.Max.Z))
+        return BoundingBox.from_coordinates(corners)
+
+    def intersect_line(self, start, end, tol=0.0):
+        params = []
+        for boundary in self.boundaries:
+            params.extend(boundary.intersect_line(start, end, tol))
+        params.sort()
+        return params
+
+    def contains(self, pt, tol=0.0):
+        """
+        Even-odd containment test. Note that points on a hole count as
+        outside, the PolygonIndex used by the fill does not have this
+        limitation.
+        """
+        inside = False
+        for boundary in self.boundaries:
+            if boundary.contains(pt, tol):
+                inside = not inside
+        return inside
+
+    def polygonize(self, tol=0.0):
+        rings = []
+        for boundary in self.boundaries:
+            rings.extend(boundary.polygonize(tol))
+        return rings
+
+    def geometry_key(self):
+        keys = []
+        for boundary in self.boundaries:
+            if not hasattr(boundary, "geometry_key"):
+                return None
+            keys.append(boundary.geometry_key())
+        return tuple(keys)
+
+
+class GridFill(object):
+    """
+    The result of filling a single region.
+        xs, ys, zs: The world coordinates of the stitches as arrays.
+        buffer: The stitches as StitchBuffer in pyembroidery units.
+        frame: The GridFrame of the fill.
+        trims_avoided: Number of jumps that were replaced by travel
+                       stitches instead of a trim.
+    The stitch points, the stitch strings and the grid points are only
+    created on request.
+    """
+
+    __slots__ = ("xs", "ys", "zs", "buffer", "frame", "trims_avoided")
+
+    def __init__(self, xs, ys, zs, buffer, frame, trims_avoided=0):
+        self.xs = xs
+        self.ys = ys
+        self.zs = zs
+        self.buffer = buffer
+        self.frame = frame
+        self.trims_avoided = trims_avoided
+
+    @property
+    def stitches(self):
+        return self.buffer
+
+    @property
+    def points(self):
+        """
+        The stitch points as Point3d.
+        """
+        return [Point3d(x, y, z) for x, y, z in zip(self.xs, self.ys, self.zs)]
+
+    @property
+    def stitch_strings(self):
+        return self.buffer.to_strings()
+
+    @property
+    def rows(self):
+        """
+        All grid points of all rows (debugging output).
+        """
+        return grid_points(self.frame)
+
+
+class GridFrame(object):
+    """
+    The coordinate frame of the grid of a single region: the stitch plane
+    moved to the center of the boundary and the bounding box of the
+    boundary in the coordinates of that plane.
+    """
+
+    __slots__ = ("plane", "minx", "miny", "minz", "maxx", "maxy",
+                 "resolution_x", "resolution_y")
+
+    def __init__(self, boundary, plane, resolution_x, resolution_y):
+        resolution_x = int(resolution_x)
+        resolution_y = int(resolution_y)
+        if resolution_x < 1 or resolution_y < 1:
+            raise ValueError("Grid resolution has to be at least 1!")
+        self.resolution_x = resolution_x
+        self.resolution_y = resolution_y
+        # first get the boundingbox of the boundary, then move the plane to
+        # its center
+        bbx = boundary.get_bounding_box(None)
+        self.plane = copy_plane(plane,
+                                Point3d(bbx.Center.X, bbx.Center.Y, 0.0))
+        # get aligned bbx in plane coordinates
+        bbx = boundary.get_bounding_box(self.plane)
+        self.minx, self.miny, self.minz = bbx.Min.X, bbx.Min.Y, bbx.Min.Z
+        self.maxx, self.maxy = bbx.Max.X, bbx.Max.Y
+
+    def params(self):
+        """
+        The uniform grid parameters, identical for every row.
+        """
+        return [i / self.resolution_x for i in range(self.resolution_x + 1)]
+
+    def row_values(self):
+        """
+        The y coordinates of all rows in plane coordinates.
+        """
+        miny = self.miny
+        height = self.maxy - miny
+        resy = self.resolution_y
+        return [miny + height * (j / resy) for j in range(resy + 1)]
+
+
+def build_grid(frame):
+    """
+    Creates the grid of rows covering the bounding box of the boundary,
+    aligned to the plane of the supplied GridFrame. Returns the list of
+    gridlines and the list of grid parameters per row.
+    """
+    pln = frame.plane
+    minx, maxx, minz = frame.minx, frame.maxx, frame.minz
+    params = frame.params()
+    gridlines = []
+    gridparams = []
+    for y in frame.row_values():
+        gridlines.append(GridLine(pln.PointAt(minx, y, minz),
+                                  pln.PointAt(minx + (maxx - minx), y, minz)))
+        gridparams.append(params)
+    return gridlines, gridparams
+
+
+def grid_points(frame):
+    """
+    Returns all grid points of the GridFrame as one list of Point3d per
+    row. Only needed for debugging, the fill itself works on the gridlines.
+    """
+    pln = frame.plane
+    minx, maxx, minz = frame.minx, frame.maxx, frame.minz
+    xs = [minx + (maxx - minx) * t for t in frame.params()]
+    return [[pln.PointAt(x, y, minz) for x in xs]
+            for y in frame.row_values()]
+
+
+def segment_row(intparams, params, gridline, boundary, tol,
+                row_contains=None):
+    """
+    Splits a single row into branches based on its intersection parameters.
+    Returns a list of branches, each a list of row parameters.
+
+    Rows with an odd number of intersections need a containment test for
+    all of their candidate parameters. If supplied, row_contains(params) is
+    used for that instead of testing every point against the boundary.
+    """
+    branches = []
+    # ONE event means intersection is exactly at a corner
+    # create a new branch with a single point in this row
+    if len(intparams) == 1:
+        branches.append(list(intparams))
+    # >= TWO and EVEN number of intersections means there
+    # are defined domains of points inside the curve
+    elif len(intparams) >= 2 and (len(intparams) % 2) == 0:
+        for k in range(0, len(intparams), 2):
+            t0 = intparams[k]
+            t1 = intparams[k + 1]
+            sequence = [t0]
+            sequence.extend(params_between(params, t0, t1))
+            sequence.append(t1)
+            branches.append(sequence)
+    # >= THREE and UNEVEN number of intersections means we have
+    # to check point containment to find the domains inside
+    # the boundary curve
+    elif len(intparams) > 2:
+        tmin = min(intparams)
+        tmax = max(intparams)
+        protoseq = list(intparams) + params_between(params, tmin, tmax)
+        protoseq.sort()
+        if row_contains is not None:
+            inside = row_contains(protoseq)
+        else:
+            inside = [boundary.contains(gridline.PointAt(param), tol)
+                      for param in protoseq]
+        sequence = []
+        for param, isin in zip(protoseq, inside):
+            # if point is in, it is part of the current seq
+            if isin:
+                sequence.append(param)
+            elif sequence:
+                branches.append(sequence)
+                sequence = []
+        if sequence:
+            branches.append(sequence)
+    return branches
+
+
+def branch_rows(boundary, gridlines, gridparams, tol, frame=None,
+                stats=None, workers=1):
+    """
+    Intersects all gridlines with the boundary and returns the branched
+    rows as a list of deques of branches.
+
+    If the GridFrame of the gridlines is supplied and the boundary can be
+    polygonized, rows with an odd number of intersections use a cached
+    PolygonIndex for their containment tests. The index is only built once
+    the first of these rows shows up.
+
+    With workers > 1 the rows are split into chunks which are intersected
+    and segmented on a pool of worker threads. The branched rows are
+    assembled in order afterwards.
+
+    If a FillStats instance is supplied, the time spent on the rows with an
+    odd number of intersections is recorded as containment, everything else
+    as intersections. In parallel, the wall time of the whole stage is split
+    between the two in proportion to the time the workers spent on them.
+    """
+    if stats is not None:
+        start = clock()
+    use_index = frame is not None and hasattr(boundary, "polygonize")
+    index = []
+    lock = threading.Lock()
+
+    def get_index():
+        # the index is shared by all workers and only built once
+        with lock:
+            if not index:
+                index.append(PolygonIndex(boundary.polygonize(tol), frame,
+                                          tol))
+        return index[0]
+
+    def branch_chunk(chunk):
+        if stats is not None:
+            chunkstart = clock()
+        rows = []
+        containment = 0.0
+        for j in range(*chunk):
+            gridline = gridlines[j]
+            intparams = boundary.intersect_line(gridline.From, gridline.To,
+                                                tol)
+            row_contains = None
+            odd = len(intparams) > 2 and len(intparams) % 2 == 1
+            if odd and stats is not None:
+                rowstart = clock()
+            if use_index and odd:
+                row_contains = partial(get_index().row_contains, j)
+            rows.append(deque(segment_row(intparams,
+                                          gridparams[j],
+                                          gridline,
+                                          boundary,
+                                          tol,
+                                          row_contains)))
+            if odd and stats is not None:
+                containment += clock() - rowstart
+        busy = clock() - chunkstart if stats is not None else 0.0
+        return rows, busy, containment
+
+    rowcount = len(gridlines)
+    if workers is None or workers <= 1:
+        chunks = [(0, rowcount)]
+    else:
+        # several chunks per worker balance rows of different cost
+        size = max(1, -(-rowcount // (workers * 4)))
+        chunks = [(k, min(k + size, rowcount))
+                  for k in range(0, rowcount, size)]
+    branched_rows = []
+    busy = 0.0
+    containment = 0.0
+    for rows, chunk_busy, chunk_containment in parallel_map(branch_chunk,
+                                                            chunks,
+                                                            workers):
+        branched_rows.extend(rows)
+        busy += chunk_busy
+        containment += chunk_containment
+    if stats is not None:
+        elapsed = clock() - start
+        if busy > 0.0:
+            containment = elapsed * min(containment / busy, 1.0)
+        stats.add_time("intersections", elapsed - containment)
+        stats.add_time("containment", containment)
+    return branched_rows
+
+
+def get_branch_counts(branched_rows):
+    return [len(row) for row in branched_rows]
+
+
+def get_first_nonzero(branched_rows):
+    for i, row in enumerate(branched_rows):
+        if len(row) > 0:
+            return i
+    return -1
+
+
+class NonEmptyRows(object):
+    """
+    Min-heap of the indices of all rows that still have branches. Rows are
+    only ever drained while sequencing, so rows that ran empty are dropped
+    lazily once they reach the top of the heap.
+    """
+
+    __slots__ = ("rows", "heap")
+
+    def __init__(self, branched_rows):
+        self.rows = branched_rows
+        # ascending indices already satisfy the heap invariant
+        self.heap = [i for i, row in enumerate(branched_rows) if len(row) > 0]
+
+    def first(self):
+        """
+        Returns the lowest index of all rows that still have branches, -1 if
+        all rows are empty.
+        """
+        heap = self.heap
+        rows = self.rows
+        while heap and len(rows[heap[0]]) == 0:
+            heapq.heappop(heap)
+        return heap[0] if heap else -1
+
+
+def find_closest_branch(lastpt, gridlines, branched_rows, index=None):
+    """
+    Returns (rowindex, branchindex) of the remaining branch whose start is
+    closest to lastpt. If a BranchIndex is supplied, it is queried instead
+    of measuring the distance to every remaining branch.
+    """
+    if index is not None:
+        return index.closest(lastpt)
+    candidate_branches = []
+    for i, row in enumerate(branched_rows):
+        for j, branch in enumerate(row):
+            dist = lastpt.DistanceToSquared(gridlines[i].PointAt(branch[0]))
+            candidate_branches.append((dist, i, j))
+    dist, rowindex, branchindex = min(candidate_branches)
+    return (rowindex, branchindex)
+
+
+class BranchIndex(object):
+    """
+    Spatial index of the start points of all remaining branches of the
+    branched rows. Points are stored in the 2D coordinate system spanned by
+    the gridlines, so distances are the same as in world space. Branches
+    have to be removed in the order they are popped from their rows.
+    """
+
+    __slots__ = ("grid", "origin", "xaxis", "yaxis", "popped")
+
+    def __init__(self, branched_rows, gridlines):
+        first = gridlines[0]
+        self.origin = origin = (first.From.X, first.From.Y, first.From.Z)
+        direction = (first.To.X - origin[0],
+                     first.To.Y - origin[1],
+                     first.To.Z - origin[2])
+        self.xaxis = xaxis = _unitize(direction)
+        last = gridlines[-1].From
+        offset = (last.X - origin[0], last.Y - origin[1], last.Z - origin[2])
+        # orthogonalize the direction of the rows against the x axis
+        d = _dot(offset, xaxis)
+        self.yaxis = _unitize((offset[0] - d * xaxis[0],
+                               offset[1] - d * xaxis[1],
+                               offset[2] - d * xaxis[2]))
+        entries = []
+        for i, row in enumerate(branched_rows):
+            gridline = gridlines[i]
+            for k, branch in enumerate(row):
+                x, y = self.project(gridline.PointAt(branch[0]))
+                entries.append(((i, k), x, y))
+        width = _length(direction)
+        height = abs(_dot(offset, self.yaxis))
+        self.grid = PointGrid.for_extents(width, height, len(entries))
+        for key, x, y in entries:
+            self.grid.insert(key, x, y)
+        self.popped = [0] * len(branched_rows)
+
+    def __len__(self):
+        return len(self.grid)
+
+    def project(self, pt):
+        """
+        Returns the coordinates of pt in the plane of the gridlines.
+        """
+        v = (pt.X - self.origin[0], pt.Y - self.origin[1],
+             pt.Z - self.origin[2])
+        return _dot(v, self.xaxis), _dot(v, self.yaxis)
+
+    def pop(self, rowindex):
+        """
+        Removes the first remaining branch of a row.
+        """
+        self.grid.remove((rowindex, self.popped[rowindex]))
+        self.popped[rowindex] += 1
+
+    def closest(self, pt):
+        """
+        Returns (rowindex, branchindex) of the remaining branch whose start
+        is closest to pt.
+        """
+        dist, (rowindex, k) = self.grid.nearest(*self.project(pt))
+        return (rowindex, k - self.popped[rowindex])
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _length(a):
+    return _dot(a, a) ** 0.5
+
+
+def _unitize(a):
+    length = _length(a)
+    if length == 0.0:
+        return (0.0, 0.0, 0.0)
+    return (a[0] / length, a[1] / length, a[2] / length)
+
+
+def sequence_rows(branched_rows, gridlines, router=None, stats=None):
+    """
+    Resolves the branched rows into one continuous sequence of stitches.
+    Returns the world coordinates of the stitches as three arrays (x, y, z)
+    and the array of their commands. The branched rows are consumed in the
+    process. The closest branch after the last row is looked up in a
+    BranchIndex, the next non-empty row after an empty one is tracked by
+    NonEmptyRows.
+
+    If a TravelRouter is supplied, jumps are connected by travel stitches
+    inside the boundary wherever possible and only trimmed otherwise. If a
+    FillStats instance is supplied, the jumps are counted.
+    """
+    j = 0
+    lastidx = -1
+    rowcount = len(branched_rows)
+    xs = array("d")
+    ys = array("d")
+    zs = array("d")
+    commands = array(COMMAND_TYPECODE)
+    index = None
+    nonempty = NonEmptyRows(branched_rows)
+    # start point and direction of every gridline
+    lines = [(gl.From.X, gl.From.Y, gl.From.Z,
+              gl.To.X - gl.From.X, gl.To.Y - gl.From.Y, gl.To.Z - gl.From.Z)
+             for gl in gridlines]
+
+    while j < rowcount:
+        row = branched_rows[j]
+        # only step into row if it has any branches
+        if len(row) >= 1:
+            # pop the next branch from the current row
+            branch = row.popleft()
+            if index is not None:
+                index.pop(j)
+            fx, fy, fz, dx, dy, dz = lines[j]
+            # check for jumps and inject travel stitches or trim command
+            if lastidx != j - 1 and commands:
+                if stats is not None:
+                    stats.count("jumps")
+                travel = None
+                if router is not None:
+                    t = branch[0]
+                    travel = router.route((xs[-1], ys[-1], zs[-1]),
+                                          (fx + dx * t, fy + dy * t,
+                                           fz + dz * t))
+                if travel is not None:
+                    for x, y, z in travel:
+                        xs.append(x)
+                        ys.append(y)
+                        zs.append(z)
+                        commands.append(pyembroidery.STITCH)
+                else:
+                    xs.append(xs[-1])
+                    ys.append(ys[-1])
+                    zs.append(zs[-1])
+                    commands.append(pyembroidery.TRIM)
+            xs.extend([fx + dx * t for t in branch])
+            ys.extend([fy + dy * t for t in branch])
+            zs.extend([fz + dz * t for t in branch])
+            commands.extend([pyembroidery.STITCH] * len(branch))
+            if j == rowcount - 1:
+                if nonempty.first() != -1:
+                    # the index is only built once it is needed
+                    if index is None:
+                        index = BranchIndex(branched_rows, gridlines)
+                    cb = find_closest_branch(Point3d(xs[-1], ys[-1], zs[-1]),
+                                             gridlines,
+                                             branched_rows,
+                                             index)
+                    lastidx = j
+                    j = cb[0]
+                    continue
+                break
+        # if row is empty, find nonzero row with the lowest index
+        else:
+            nzi = nonempty.first()
+            if nzi != -1:
+                lastidx = j
+                j = nzi
+                continue
+            break
+        # set last index value and increment j
+        lastidx = j
+        j += 1
+
+    # inject trim and finish
+    if commands:
+        xs.append(xs[-1])
+        ys.append(ys[-1])
+        zs.append(zs[-1])
+        commands.append(pyembroidery.TRIM)
+    return xs, ys, zs, commands
+
+
+def fill_region(boundary, resolution_x, resolution_y, plane, tol,
+                scanline=False, travel=False, stats=None, workers=1):
+    """
+    Creates grid-based embroidery stitches inside a single closed boundary.
+    Returns a GridFill instance.
+
+    By default every row is intersected with the boundary on its own. If
+    scanline is True, the boundary is polygonized once (within tol) and all
+    row crossings are computed in a single scanline pass instead.
+
+    If travel is True, jumps between non-adjacent rows are connected by
+    travel stitches inside the boundary instead of trims where possible.
+
+    With workers > 1 the rows are intersected in chunks on a pool of worker
+    threads (see branch_rows). Sequencing always runs serially.
+
+    If a FillStats instance is supplied, the time of every stage and the
+    numbers of rows, branches, jumps and trims are added to it.
+    """
+    if stats is not None:
+        start = clock()
+    frame = GridFrame(boundary, plane, resolution_x, resolution_y)
+    gridlines, gridparams = build_grid(frame)
+    if stats is not None:
+        stats.add_time("grid", clock() - start)
+        start = clock()
+    if scanline:
+        branched_rows = scanline_branch_rows(boundary.polygonize(tol), frame)
+        if stats is not None:
+            stats.add_time("intersections", clock() - start)
+    else:
+        branched_rows = branch_rows(boundary, gridlines, gridparams, tol,
+                                    frame, stats, workers)
+    if stats is not None:
+        stats.count("regions")
+        stats.count("rows", len(branched_rows))
+        stats.count("branches", sum(len(row) for row in branched_rows))
+        start = clock()
+    router = None
+    if travel:
+        router = TravelRouter(boundary.polygonize(tol), tol)
+    xs, ys, zs, commands = sequence_rows(branched_rows, gridlines, router,
+                                         stats)
+    if stats is not None:
+        stats.add_time("sequencing", clock() - start)
+        stats.count("trims", commands.count(pyembroidery.TRIM))
+        start = clock()
+    # stitches use pyembroidery units
+    buf = StitchBuffer(array("d", [x * 10 for x in xs]),
+                       array("d", [y * -10 for y in ys]),
+                       commands)
+    trims_avoided = router.routed if router is not None else 0
+    if stats is not None:
+        stats.add_time("emission", clock() - start)
+    return GridFill(xs, ys, zs, buf, frame, trims_avoided)
+
+
+# default cache for the fills of the EmbroideryGrid component
+FILL_CACHE = LRUCache(256)
+
+
+def fill_key(boundary, resolution_x, resolution_y, plane, tol,
+             scanline=False, travel=False):
+    """
+    Returns the cache key of a fill, None if the boundary does not support
+    geometry_key() or does not return a key.
+    """
+    if not hasattr(boundary, "geometry_key"):
+        return None
+    key = boundary.geometry_key()
+    if key is None:
+        return None
+    plane_values = tuple(c for v in (plane.Origin, plane.XAxis, plane.YAxis)
+                         for c in (v.X, v.Y, v.Z))
+    return (key, int(resolution_x), int(resolution_y),
+            plane_values, tol, bool(scanline), bool(travel))
+
+
+def fill_regions(boundaries, resolution_x, resolution_y, planes, tol,
+                 scanline=False, workers=1, cache=None, travel=False,
+                 stats=None):
+    """
+    Fills several independent boundaries, one plane per boundary. Returns
+    the list of GridFill instances in the order of the boundaries.
+
+    With workers > 1 the regions are filled on a pool of that many worker
+    threads, 0 uses one worker per processor core. If there are less regions
+    to fill than workers, the regions are filled one after another and the
+    workers split up the rows of each region instead. The order of the
+    results does not depend on the number of workers.
+
+    Scanline and travel are passed on to fill_region(). If a FillStats
+    instance is supplied, the stats of all regions that were actually
+    filled are added to it.
+
+    If a LRUCache is supplied, regions whose geometry and parameters did not
+    change are taken from it instead of being filled again. Cached GridFill
+    instances are shared, so they must not be modified.
+    """
+    if workers == 0:
+        workers = cpu_count()
+    jobs = list(zip(boundaries, planes))
+    fills = [None] * len(jobs)
+    keys = [None] * len(jobs)
+    pending = []
+    for i, (boundary, plane) in enumerate(jobs):
+        if cache is not None:
+            keys[i] = fill_key(boundary, resolution_x, resolution_y, plane,
+                               tol, scanline, travel)
+            if keys[i] is not None:
+                fills[i] = cache.get(keys[i])
+                if fills[i] is not None:
+                    continue
+        pending.append(i)
+
+    # parallelize over regions if there are enough of them, else over rows
+    if len(pending) >= workers:
+        region_workers, row_workers = workers, 1
+    else:
+        region_workers, row_workers = 1, workers
+
+    def fill(i):
+        boundary, plane = jobs[i]
+        # every region gets its own stats, they are merged in order below
+        region_stats = FillStats() if stats is not None else None
+        return (fill_region(boundary, resolution_x, resolution_y, plane, tol,
+                            scanline, travel, region_stats, row_workers),
+                region_stats)
+
+    results = parallel_map(fill, pending, region_workers)
+    for i, (result, region_stats) in zip(pending, results):
+        fills[i] = result
+        if region_stats is not None:
+            stats.merge(region_stats)
+        if keys[i] is not None:
+            cache.put(keys[i], result)
+    return fills
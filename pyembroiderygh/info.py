@@ -0,0 +1,270 @@
+"""
+Metadata-only reading of embroidery files, e.g. to index design libraries.
+
+Nothing is decoded into an EmbPattern. Every format is decoded by its
+pyembroidery reader into a StitchCounter, which only counts the stitches,
+colorblocks and extents while streaming through the file. Counts of the
+streaming pass are taken before the post-processing some readers apply
+(trim interpolation, duplicate colors as stops). DST files are counted from
+the streaming decoder of the stream module instead, which applies the trim
+interpolation on the fly, so the jumps DST uses to encode trims are not
+counted.
+The headers of DST and JEF files are not used: DST headers store the
+extents without their signs and JEF headers relative to the hoop, so they
+disagree with the extents of the decoded pattern.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from os import path
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+    from pyembroidery import DstReader
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .reader import READ_ERROR, normalize_path
+from .utils import process_map
+
+__all__ = [
+    "PatternInfo",
+    "StitchCounter",
+    "read_info",
+    "read_infos",
+]
+
+
+class PatternInfo(object):
+    """
+    Metadata of an embroidery file.
+        filepath: Path of the file.
+        format: Extension of the format, e.g. 'dst'.
+        stitch_count: Number of stitch records (including commands).
+        extents: (minx, miny, maxx, maxy) in 1/10 mm, None if unknown.
+        color_count: Number of colorblocks.
+        threads: List of the EmbThreads stored in the file.
+        metadata: Dictionary of the metadata stored in the file.
+    """
+
+    __slots__ = ("filepath", "format", "stitch_count", "extents",
+                 "color_count", "threads", "metadata")
+
+    def __init__(self, filepath, format, stitch_count, extents, color_count,
+                 threads, metadata):
+        self.filepath = filepath
+        self.format = format
+        self.stitch_count = stitch_count
+        self.extents = extents
+        self.color_count = color_count
+        self.threads = threads
+        self.metadata = metadata
+
+    def __repr__(self):
+        return ("PatternInfo ({}, {} stitches, {} colors, " +
+                "{} threads)").format(path.basename(self.filepath),
+                                      self.stitch_count, self.color_count,
+                                      len(self.threads))
+
+    def ToString(self):
+        return repr(self)
+
+
+class StitchCounter(object):
+    """
+    Stand-in for an EmbPattern that pyembroidery readers can decode into.
+    Instead of storing the stitches it only counts them, tracks their
+    extents and counts the colorblocks the same way colorblock_ranges()
+    would. Thread list and metadata are kept.
+    """
+
+    __slots__ = ("threadlist", "extras", "count", "colorblocks",
+                 "_block_start", "_previousX", "_previousY",
+                 "minx", "miny", "maxx", "maxy")
+
+    def __init__(self):
+        self.threadlist = []
+        self.extras = {}
+        self.count = 0
+        self.colorblocks = 0
+        self._block_start = 0
+        self._previousX = 0
+        self._previousY = 0
+        self.minx = self.miny = float("inf")
+        self.maxx = self.maxy = float("-inf")
+
+    # COUNTING ----------------------------------------------------------------
+
+    def add_command(self, cmd, x=0, y=0):
+        pos = self.count
+        self.count += 1
+        if x < self.minx:
+            self.minx = x
+        if x > self.maxx:
+            self.maxx = x
+        if y < self.miny:
+            self.miny = y
+        if y > self.maxy:
+            self.maxy = y
+        # colorblocks, see colorblock_ranges()
+        command = cmd & pyembroidery.COMMAND_MASK
+        if command == pyembroidery.COLOR_BREAK:
+            if self._block_start != pos:
+                self.colorblocks += 1
+            self._block_start = pos + 1
+        elif command == pyembroidery.COLOR_CHANGE:
+            self.colorblocks += 1
+            self._block_start = pos + 1
+        elif (command == pyembroidery.NEEDLE_SET and
+                self._block_start != pos):
+            self.colorblocks += 1
+            self._block_start = pos
+
+    def add_stitch_absolute(self, cmd, x=0, y=0):
+        self.add_command(cmd, x, y)
+        self._previousX = x
+        self._previousY = y
+
+    def add_stitch_relative(self, cmd, dx=0, dy=0):
+        self.add_stitch_absolute(cmd, self._previousX + dx,
+                                 self._previousY + dy)
+
+    @property
+    def stitches(self):
+        # some readers append to the stitch list directly
+        return self
+
+    def append(self, stitch):
+        self.add_command(stitch[2], stitch[0], stitch[1])
+
+    def color_count(self):
+        if self._block_start != self.count:
+            return self.colorblocks + 1
+        return self.colorblocks
+
+    def extents(self):
+        if not self.count:
+            return None
+        return (self.minx, self.miny, self.maxx, self.maxy)
+
+    # EMBPATTERN INTERFACE ----------------------------------------------------
+
+    def stitch(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.STITCH, dx, dy)
+
+    def stitch_abs(self, x, y):
+        self.add_stitch_absolute(pyembroidery.STITCH, x, y)
+
+    def move(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.JUMP, dx, dy)
+
+    def move_abs(self, x, y):
+        self.add_stitch_absolute(pyembroidery.JUMP, x, y)
+
+    def trim(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.TRIM, dx, dy)
+
+    def stop(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.STOP, dx, dy)
+
+    def color_change(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.COLOR_CHANGE, dx, dy)
+
+    def needle_change(self, needle=0, dx=0, dy=0):
+        cmd = pyembroidery.encode_thread_change(pyembroidery.NEEDLE_SET,
+                                                None, needle)
+        self.add_stitch_relative(cmd, dx, dy)
+
+    def sequin_eject(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.SEQUIN_EJECT, dx, dy)
+
+    def sequin_mode(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.SEQUIN_MODE, dx, dy)
+
+    def end(self, dx=0, dy=0):
+        self.add_stitch_relative(pyembroidery.END, dx, dy)
+
+    def add_thread(self, thread):
+        if not isinstance(thread, pyembroidery.EmbThread):
+            thread_object = pyembroidery.EmbThread()
+            thread_object.set(thread)
+            thread = thread_object
+        self.threadlist.append(thread)
+
+    def metadata(self, name, data):
+        self.extras[name] = data
+
+    def get_metadata(self, name, default=None):
+        return self.extras.get(name, default)
+
+    def interpolate_trims(self, *args, **kwargs):
+        # works on the stored stitches, there are none
+        pass
+
+    def interpolate_duplicate_color_as_stop(self):
+        # works on the stored stitches, there are none
+        pass
+
+
+def _format_reader(extension):
+    for file_type in pyembroidery.supported_formats():
+        if file_type["extension"] == extension:
+            return file_type.get("reader")
+    return None
+
+
+def _count_dst(filepath):
+    # the stream module builds on this one, so it is imported late
+    from .stream import iter_dst_chunks
+    counter = StitchCounter()
+    with open(filepath, "rb") as f:
+        DstReader.dst_read_header(f, counter)
+    add_command = counter.add_command
+    for chunk in iter_dst_chunks(filepath):
+        for x, y, cmd in chunk:
+            add_command(cmd, x, y)
+    return counter
+
+
+def read_info(filepath):
+    """
+    Reads the metadata of a single embroidery file without decoding it into
+    an EmbPattern. Returns a (info, error) tuple like read_pattern(), info
+    being a PatternInfo.
+    """
+    filepath = normalize_path(filepath)
+    extension = path.splitext(filepath)[1][1:].lower()
+    try:
+        if extension == "dst":
+            counter = _count_dst(filepath)
+        else:
+            reader = _format_reader(extension)
+            if reader is None:
+                return (None, READ_ERROR)
+            # count the stitches while streaming through the file
+            counter = StitchCounter()
+            pyembroidery.EmbPattern.read_embroidery(reader, filepath,
+                                                    pattern=counter)
+    except Exception:
+        return (None, READ_ERROR)
+    info = PatternInfo(filepath, extension, counter.count, counter.extents(),
+                       counter.color_count(), counter.threadlist,
+                       counter.extras)
+    return (info, None)
+
+
+def read_infos(filepaths, workers=0, chunksize=16):
+    """
+    Reads the metadata of a batch of embroidery files on a pool of workers,
+    0 workers uses one worker per processor core. Returns a list of (info,
+    error) tuples in the order of filepaths, see read_info().
+    """
+    return process_map(read_info, filepaths, workers, chunksize)
@@ -0,0 +1,420 @@
+"""
+Pattern level helpers of the pyembroideryGH core: colorblock and stitchblock
+extraction, merging of patterns and preparation of preview geometry.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .buffer import StitchView, is_stitch_container
+from .geometry import Point3d
+
+__all__ = [
+    "LOD_TOLERANCES",
+    "add_block",
+    "colorblock_ranges",
+    "decimate_indices",
+    "decimate_polyline",
+    "stitchblock_ranges",
+    "stitch_range",
+    "pattern_colorblocks",
+    "pattern_stitchblocks",
+    "merge_patterns",
+    "select_level",
+    "render_batches",
+    "render_blocks",
+    "render_levels",
+    "thread_rgb",
+]
+
+# deviation tolerances in mm of the preview levels of detail, full detail
+# first. Every level is four times coarser than the one before.
+LOD_TOLERANCES = (0.0, 0.1, 0.4, 1.6, 6.4)
+
+
+def colorblock_ranges(pattern):
+    """
+    Generator for the colorblocks of a pattern as (start, stop, thread)
+    ranges into pattern.stitches. Mirrors EmbPattern.get_as_colorblocks()
+    without slicing the stitch list.
+    """
+    stitches = pattern.stitches
+    thread_index = 0
+    colorblock_start = 0
+    for pos, stitch in enumerate(stitches):
+        command = stitch[2] & pyembroidery.COMMAND_MASK
+        if command == pyembroidery.COLOR_BREAK:
+            if colorblock_start != pos:
+                thread = pattern.get_thread_or_filler(thread_index)
+                thread_index += 1
+                yield colorblock_start, pos, thread
+            colorblock_start = pos + 1
+        elif command == pyembroidery.COLOR_CHANGE:
+            thread = pattern.get_thread_or_filler(thread_index)
+            thread_index += 1
+            yield colorblock_start, pos + 1, thread
+            colorblock_start = pos + 1
+        elif (command == pyembroidery.NEEDLE_SET and
+                colorblock_start != pos):
+            thread = pattern.get_thread_or_filler(thread_index)
+            thread_index += 1
+            yield colorblock_start, pos, thread
+            colorblock_start = pos
+    if colorblock_start != len(stitches):
+        thread = pattern.get_thread_or_filler(thread_index)
+        yield colorblock_start, len(stitches), thread
+
+
+def stitchblock_ranges(pattern):
+    """
+    Generator for the stitchblocks (runs of plain stitches) of a pattern as
+    (start, stop, thread) ranges into pattern.stitches. Mirrors
+    EmbPattern.get_as_stitchblock() without copying the stitches.
+    """
+    thread = pattern.get_thread_or_filler(0)
+    thread_index = 1
+    start = None
+    for pos, stitch in enumerate(pattern.stitches):
+        flags = stitch[2] & pyembroidery.COMMAND_MASK
+        if flags == pyembroidery.STITCH:
+            if start is None:
+                start = pos
+            continue
+        if start is not None:
+            yield start, pos, thread
+            start = None
+        if flags == pyembroidery.COLOR_CHANGE:
+            thread = pattern.get_thread_or_filler(thread_index)
+            thread_index += 1
+    if start is not None:
+        yield start, len(pattern.stitches), thread
+
+
+def _ranges_as_views(pattern, ranges):
+    views = []
+    threads = []
+    for start, stop, thread in ranges:
+        views.append(StitchView(pattern.stitches, start, stop))
+        threads.append(thread)
+    return views, threads
+
+
+def pattern_colorblocks(pattern):
+    """
+    Returns the colorblocks of a pattern as a list of StitchViews into the
+    pattern and the list of their corresponding threads.
+    """
+    return _ranges_as_views(pattern, colorblock_ranges(pattern))
+
+
+def pattern_stitchblocks(pattern):
+    """
+    Returns the stitchblocks of a pattern as a list of StitchViews into the
+    pattern and the list of their corresponding threads.
+    """
+    return _ranges_as_views(pattern, stitchblock_ranges(pattern))
+
+
+def add_block(pattern, stitches, thread=None):
+    """
+    Adds a block of stitches to a pattern like EmbPattern.add_block(), but
+    also accepts a StitchBuffer or StitchView without converting it to a
+    list first.
+    """
+    if not is_stitch_container(stitches):
+        pattern.add_block(stitches, thread)
+        return
+    if thread is not None:
+        pattern.add_thread(thread)
+    add_stitch = pattern.add_stitch_absolute
+    for x, y, cmd in stitches:
+        add_stitch(cmd, x, y)
+    pattern.add_command(pyembroidery.COLOR_BREAK)
+
+
+def merge_patterns(patterns):
+    """
+    Merges several patterns into a single one. Returns the merged pattern
+    (None if no valid pattern was supplied) and the list of indices of all
+    items that were skipped because they are no valid EmbPattern instances.
+    """
+    merged = None
+    skipped = []
+    for i, pat in enumerate(patterns):
+        if not isinstance(pat, pyembroidery.EmbPattern):
+            skipped.append(i)
+            continue
+        if merged is None:
+            merged = pat.copy()
+        else:
+            merged = merged + pat
+    return merged, skipped
+
+
+def thread_rgb(thread):
+    """
+    Returns the color of a thread as (r, g, b) tuple.
+    """
+    return (thread.get_red(), thread.get_green(), thread.get_blue())
+
+
+def render_blocks(pattern):
+    """
+    Prepares the preview geometry of a pattern per colorblock. Returns a
+    list of ((r, g, b), polylines, indices, extents) tuples:
+        polylines: A list of point lists, one for every continuous run of
+                   stitches. Runs are broken up on trim commands.
+        indices: For every polyline an array of the indices of its points
+                 into pattern.stitches.
+        extents: The (minx, miny, maxx, maxy) of all points of the
+                 colorblock, None if it has none. Collected in the same
+                 pass that creates the points.
+    """
+    stitches = pattern.stitches
+    blocks = []
+    # loop through all colorblocks
+    for start, stop, thread in colorblock_ranges(pattern):
+        color = thread_rgb(thread)
+        polylines = []
+        indices = []
+        extents = None
+        # loop over all stitches in the colorblock
+        simcrv = []
+        simidx = array("i")
+        laststitch = stop - 1
+        for j in range(start, stop):
+            stitch = stitches[j]
+            cmd = stitch[2]
+            # if no command or color break, continue
+            if (cmd == pyembroidery.NO_COMMAND or
+                    cmd == pyembroidery.COLOR_BREAK):
+                continue
+            x = stitch[0] * 0.1
+            y = stitch[1] * -0.1
+            if not simcrv:
+                minx = maxx = x
+                miny = maxy = y
+            else:
+                if x < minx:
+                    minx = x
+                elif x > maxx:
+                    maxx = x
+                if y < miny:
+                    miny = y
+                elif y > maxy:
+                    maxy = y
+            simcrv.append(Point3d(x, y, 0))
+            simidx.append(j)
+            # end curve on trim command and on the last stitch
+            if cmd == pyembroidery.TRIM or j == laststitch:
+                polylines.append(simcrv)
+                indices.append(simidx)
+                simcrv = []
+                simidx = array("i")
+                if extents is None:
+                    extents = (minx, miny, maxx, maxy)
+                else:
+                    extents = (min(extents[0], minx), min(extents[1], miny),
+                               max(extents[2], maxx), max(extents[3], maxy))
+        blocks.append((color, polylines, indices, extents))
+    return blocks
+
+
+def render_batches(blocks):
+    """
+    Groups the render_blocks() of a pattern (or one level of
+    render_levels()) per thread color, so every color can be drawn with a
+    single draw call. Returns a list of ((r, g, b), polylines, indices,
+    parts) tuples in the order the colors first appear. parts holds the
+    (extents, first, stop) of every colorblock of the color, first and stop
+    being the range of its line segments within the batch, so colorblocks
+    outside of the view can still be skipped. Colorblocks without points
+    are left out. The stitch indices of the segments of a batch ascend like
+    the colorblocks.
+    """
+    batches = OrderedDict()
+    for color, polylines, indices, extents in blocks:
+        if extents is None:
+            continue
+        if color not in batches:
+            batches[color] = ([], [], [], [0])
+        batch_polylines, batch_indices, parts, count = batches[color]
+        first = count[0]
+        for pts in polylines:
+            count[0] += max(len(pts) - 1, 0)
+        batch_polylines.extend(polylines)
+        batch_indices.extend(indices)
+        parts.append((extents, first, count[0]))
+    return [(color, polylines, indices, parts) for color, (polylines, indices,
+            parts, count) in batches.items()]
+
+
+def _segment_distance2(pts, k, a, b):
+    # squared XY distance of vertex k to the segment from vertex a to b
+    ax = pts[a].X
+    ay = pts[a].Y
+    sx = pts[b].X - ax
+    sy = pts[b].Y - ay
+    px = pts[k].X - ax
+    py = pts[k].Y - ay
+    ss = sx * sx + sy * sy
+    if ss > 0.0:
+        t = min(max((px * sx + py * sy) / ss, 0.0), 1.0)
+        px -= t * sx
+        py -= t * sy
+    return px * px + py * py
+
+
+def _refine_span(pts, a, b, tol2, kept):
+    """
+    Adds the indices of all vertices between a and b that have to be kept,
+    so that no dropped vertex deviates more than the tolerance from the
+    segment between the kept vertices around it (Douglas-Peucker).
+    """
+    spans = [(a, b)]
+    while spans:
+        a, b = spans.pop()
+        farthest = None
+        distance = tol2
+        for k in range(a + 1, b):
+            d = _segment_distance2(pts, k, a, b)
+            if d > distance:
+                farthest = k
+                distance = d
+        if farthest is not None:
+            kept.append(farthest)
+            spans.append((a, farthest))
+            spans.append((farthest, b))
+
+
+def decimate_indices(pts, tol):
+    """
+    Returns the indices of the vertices of a polyline that are kept when
+    decimating it for previews. Vertices closer than tol to the last kept
+    vertex (sub-tolerance stitches) are dropped, as are vertices within tol
+    of the line from the last kept vertex through the first vertex beyond
+    tol (collinear stitches). The first and the last vertex are always
+    kept. Works in the XY projection.
+
+    Every span between two kept vertices is checked afterwards: if a
+    dropped vertex deviates more than tol from the segment between them
+    (e.g. a stitch doubling back along the line or overshooting its end),
+    the span is split at its farthest vertex. So no dropped vertex deviates
+    more than tol from the decimated polyline.
+    """
+    count = len(pts)
+    if tol <= 0.0 or count < 3:
+        return list(range(count))
+    tol2 = tol * tol
+    kept = [0]
+    ax = pts[0].X
+    ay = pts[0].Y
+    # unit direction of the current line, None while it is not defined
+    direction = None
+    last = None
+    for i in range(1, count):
+        pt = pts[i]
+        px = pt.X - ax
+        py = pt.Y - ay
+        if direction is not None:
+            if abs(px * direction[1] - py * direction[0]) <= tol:
+                last = i
+                continue
+            # the line ends at the last vertex within tol
+            kept.append(last)
+            ax = pts[last].X
+            ay = pts[last].Y
+            px = pt.X - ax
+            py = pt.Y - ay
+            direction = None
+        dd = px * px + py * py
+        if dd > tol2:
+            length = dd ** 0.5
+            direction = (px / length, py / length)
+        last = i
+    if kept[-1] != count - 1:
+        kept.append(count - 1)
+    refined = list(kept)
+    for a, b in zip(kept, kept[1:]):
+        if b - a > 1:
+            _refine_span(pts, a, b, tol2, refined)
+    if len(refined) != len(kept):
+        refined.sort()
+    return refined
+
+
+def decimate_polyline(pts, tol):
+    """
+    Returns a decimated copy of a polyline for previews, see
+    decimate_indices().
+    """
+    return [pts[i] for i in decimate_indices(pts, tol)]
+
+
+def render_levels(pattern, tolerances=LOD_TOLERANCES):
+    """
+    Prepares the preview geometry of a pattern at several levels of detail.
+    Returns a list of (tolerance, blocks) tuples, one for every tolerance,
+    blocks being the render_blocks() of the pattern with all polylines and
+    their stitch indices decimated to that tolerance. A tolerance of 0
+    keeps full detail. Decimation only drops points, so the extents hold
+    for all levels.
+    """
+    blocks = render_blocks(pattern)
+    levels = []
+    for tol in tolerances:
+        if tol <= 0.0:
+            levels.append((tol, blocks))
+            continue
+        level = []
+        for color, polylines, indices, extents in blocks:
+            level_polylines = []
+            level_indices = []
+            for pts, idx in zip(polylines, indices):
+                kept = decimate_indices(pts, tol)
+                level_polylines.append([pts[i] for i in kept])
+                level_indices.append(array("i", [idx[i] for i in kept]))
+            level.append((color, level_polylines, level_indices, extents))
+        levels.append((tol, level))
+    return levels
+
+
+def stitch_range(starts, ends, start, end):
+    """
+    Returns the (first, stop) slice of the segments that lie completely in
+    the stitch range from start to end (both included), starts and ends
+    being the ascending stitch indices of the start and end points of the
+    segments. Uses bisection, so picking a range costs O(log n).
+    """
+    first = bisect_left(starts, start)
+    stop = bisect_right(ends, end)
+    return first, max(first, stop)
+
+
+def select_level(tolerances, pixel_size):
+    """
+    Returns the index of the coarsest level of detail whose tolerance does
+    not exceed the size of one screen pixel in model units, so the
+    decimation stays invisible. Falls back to the finest level.
+    """
+    best = 0
+    for i, tol in enumerate(tolerances):
+        if tol <= pixel_size and tol >= tolerances[best]:
+            best = i
+    return best
@@ -0,0 +1,101 @@
+"""
+Batch reading of embroidery files for the PatternRead component.
+
+Decoding is pure python and therefore slow for large job sheets. The files
+of a batch are decoded on a pool of workers: processes where multiprocessing
+is available, threads otherwise (IronPython has no multiprocessing module,
+but also no global interpreter lock, so threads run truly parallel there).
+Decoded patterns are kept in a persistent PatternCache, unchanged files are
+loaded from there instead of being decoded again.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from os import path
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .diskcache import PatternCache, pattern_key, user_cache_directory
+from .utils import process_map
+
+__all__ = [
+    "PATTERN_CACHE",
+    "READ_ERROR",
+    "normalize_path",
+    "read_pattern",
+    "read_patterns",
+]
+
+# message of all files that could not be read
+READ_ERROR = ("Could not read embroidery file! " +
+              "Please check if format is readable.")
+
+# default cache for the decoded patterns of the PatternRead component, in a
+# directory that no other user can write to
+PATTERN_CACHE = PatternCache(user_cache_directory("patterns"))
+
+
+def normalize_path(filepath):
+    """
+    Strips line breaks off a path, like they are left over by some
+    Grasshopper text components, and normalizes it.
+    """
+    return path.normpath(filepath.strip("\n\r"))
+
+
+def read_pattern(filepath):
+    """
+    Reads a single embroidery file. Returns a (pattern, error) tuple, error
+    being None on success and READ_ERROR if the file could not be read, in
+    which case pattern is None. Module level, so it can be sent to worker
+    processes.
+    """
+    try:
+        pattern = pyembroidery.read(normalize_path(filepath))
+    except Exception:
+        return (None, READ_ERROR)
+    if pattern is None:
+        return (None, READ_ERROR)
+    return (pattern, None)
+
+
+def read_patterns(filepaths, workers=0, chunksize=1, cache=None):
+    """
+    Reads a batch of embroidery files on a pool of workers, 0 workers uses
+    one worker per processor core. Returns a list of (pattern, error)
+    tuples in the order of filepaths, see read_pattern().
+
+    If a PatternCache is supplied, files that are cached are loaded from
+    there and only the other files are decoded, which are then added to
+    the cache.
+    """
+    filepaths = [normalize_path(fp) for fp in filepaths]
+    results = [None] * len(filepaths)
+    keys = [None] * len(filepaths)
+    if cache is not None:
+        for i, filepath in enumerate(filepaths):
+            try:
+                keys[i] = pattern_key(filepath)
+            except (IOError, OSError):
+                continue
+            pattern = cache.get(keys[i])
+            if pattern is not None:
+                results[i] = (pattern, None)
+    pending = [i for i, result in enumerate(results) if result is None]
+    decoded = process_map(read_pattern, [filepaths[i] for i in pending],
+                          workers, chunksize)
+    for i, result in zip(pending, decoded):
+        results[i] = result
+        if keys[i] is not None and result[1] is None:
+            cache.put(keys[i], result[0])
+    return results
@@ -0,0 +1,219 @@
+"""
+Scanline engine for the grid-based fill of the EmbroideryGrid component.
+
+Instead of intersecting every row with the boundary curve on its own, the
+boundary is polygonized once and all of its edges are transformed to the
+coordinate system of the grid. Every edge is then bucketed into the rows it
+spans, which yields the crossings of all rows in a single pass over the
+edges. The crossings of a row are sorted and paired using the even-odd rule.
+
+Edges are treated as half-open in y (ymin <= y < ymax), so a vertex lying
+exactly on a row is only counted once and horizontal edges are ignored. The
+topmost row uses the closed upper end instead, so the top of the boundary is
+not lost.
+
+The same per-row edge buckets back the PolygonIndex, a cached containment
+test for the grid points of rows with an odd number of intersections.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from bisect import bisect_left, bisect_right
+from collections import deque
+import math
+
+# LOCAL MODULE IMPORTS
+from .geometry import to_plane_coordinates
+
+__all__ = [
+    "PolygonIndex",
+    "params_between",
+    "plane_edges",
+    "row_crossings",
+    "scanline_branch_rows",
+]
+
+
+def _row_range(y0, y1, first, step, rowcount):
+    # candidate range of rows between y0 and y1, has to be tested exactly
+    jlo = max(0, int(math.floor((y0 - first) / step)))
+    jhi = min(rowcount - 1, int(math.ceil((y1 - first) / step)))
+    return range(jlo, jhi + 1)
+
+
+def _coords(pt):
+    if isinstance(pt, (tuple, list)):
+        return pt[0], pt[1], pt[2] if len(pt) > 2 else 0.0
+    return pt.X, pt.Y, pt.Z
+
+
+def plane_edges(rings, plane, horizontal=False):
+    """
+    Transforms all edges of the supplied rings to the coordinate system of
+    the plane. Returns a list of (x0, y0, x1, y1) tuples. Horizontal edges
+    are dropped unless horizontal is True, degenerate edges always are.
+    """
+    edges = []
+    for ring in rings:
+        uv = []
+        for pt in ring:
+            u, v, w = to_plane_coordinates(plane, *_coords(pt))
+            uv.append((u, v))
+        if len(uv) < 3:
+            continue
+        if uv[0] != uv[-1]:
+            uv.append(uv[0])
+        for k in range(len(uv) - 1):
+            x0, y0 = uv[k]
+            x1, y1 = uv[k + 1]
+            if y0 != y1 or (horizontal and x0 != x1):
+                edges.append((x0, y0, x1, y1))
+    return edges
+
+
+def row_crossings(edges, rowvalues):
+    """
+    Buckets all edges into the rows they span and returns the sorted x
+    coordinates of all crossings per row. rowvalues have to be sorted in
+    ascending order and evenly spaced.
+    """
+    rowcount = len(rowvalues)
+    crossings = [[] for v in rowvalues]
+    if rowcount == 0:
+        return crossings
+    first = rowvalues[0]
+    last = rowvalues[-1]
+    step = (last - first) / (rowcount - 1) if rowcount > 1 else 0.0
+    if step <= 0.0:
+        return crossings
+    for x0, y0, x1, y1 in edges:
+        if y0 > y1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        if y1 < first or y0 > last:
+            continue
+        slope = (x1 - x0) / (y1 - y0)
+        for j in _row_range(y0, y1, first, step, rowcount):
+            v = rowvalues[j]
+            if j == rowcount - 1:
+                if not y0 < v <= y1:
+                    continue
+            elif not y0 <= v < y1:
+                continue
+            crossings[j].append(x0 + (v - y0) * slope)
+    for row in crossings:
+        row.sort()
+    return crossings
+
+
+def params_between(params, t0, t1):
+    """
+    Returns all grid parameters strictly between t0 and t1. The grid
+    parameters are sorted, so the range is found by bisection instead of
+    filtering the whole row.
+    """
+    return params[bisect_right(params, t0):bisect_left(params, t1)]
+
+
+def scanline_branch_rows(rings, frame):
+    """
+    Computes the branched rows of a grid from the polygonized boundary
+    rings. Returns the same structure as grid.branch_rows(), a list of
+    deques of branches, each a list of row parameters.
+    """
+    params = frame.params()
+    minx = frame.minx
+    width = frame.maxx - minx
+    edges = plane_edges(rings, frame.plane)
+    branched_rows = []
+    for xs in row_crossings(edges, frame.row_values()):
+        branches = deque()
+        for k in range(0, len(xs) - 1, 2):
+            if width > 0.0:
+                t0 = min(max((xs[k] - minx) / width, 0.0), 1.0)
+                t1 = min(max((xs[k + 1] - minx) / width, 0.0), 1.0)
+            else:
+                t0 = t1 = 0.0
+            if t0 == t1:
+                branches.append([t0])
+                continue
+            sequence = [t0]
+            sequence.extend(params_between(params, t0, t1))
+            sequence.append(t1)
+            branches.append(sequence)
+        branched_rows.append(branches)
+    return branched_rows
+
+
+class PolygonIndex(object):
+    """
+    Cached polygon of a boundary in the coordinate system of a GridFrame,
+    with all edges bucketed into the grid rows they are close to. Answers
+    point containment for the grid points of a row with a crossing number
+    test that only looks at the edges of that row.
+    """
+
+    __slots__ = ("frame", "tol", "rowvalues", "buckets", "crossings")
+
+    def __init__(self, rings, frame, tol=0.0):
+        self.frame = frame
+        self.tol = tol
+        self.rowvalues = rowvalues = frame.row_values()
+        rowcount = len(rowvalues)
+        self.buckets = buckets = [[] for v in rowvalues]
+        self.crossings = crossings = [[] for v in rowvalues]
+        first = rowvalues[0]
+        step = (rowvalues[-1] - first) / (rowcount - 1) if rowcount > 1 else 0
+        for edge in plane_edges(rings, frame.plane, horizontal=True):
+            x0, y0, x1, y1 = edge
+            ylo = min(y0, y1) - tol
+            yhi = max(y0, y1) + tol
+            if step > 0.0:
+                candidates = _row_range(ylo, yhi, first, step, rowcount)
+            else:
+                candidates = range(rowcount)
+            for j in candidates:
+                v = rowvalues[j]
+                if not ylo <= v <= yhi:
+                    continue
+                buckets[j].append(edge)
+                # crossing number rule, like PolylineBoundary.contains()
+                if (y0 > v) != (y1 > v):
+                    crossings[j].append(x0 + (v - y0) * (x1 - x0) / (y1 - y0))
+        for row in crossings:
+            row.sort()
+
+    def row_contains(self, j, params):
+        """
+        Tests the points at the supplied grid parameters of row j for
+        containment. Points within tol of an edge count as inside. Returns
+        a list of booleans.
+        """
+        frame = self.frame
+        minx = frame.minx
+        width = frame.maxx - minx
+        v = self.rowvalues[j]
+        edges = self.buckets[j]
+        xings = self.crossings[j]
+        count = len(xings)
+        tol2 = self.tol * self.tol
+        result = []
+        for t in params:
+            x = minx + width * t
+            inside = (count - bisect_right(xings, x)) % 2 == 1
+            if not inside:
+                for x0, y0, x1, y1 in edges:
+                    dx = x1 - x0
+                    dy = y1 - y0
+                    f = ((x - x0) * dx + (v - y0) * dy) / (dx * dx + dy * dy)
+                    f = 0.0 if f < 0.0 else (1.0 if f > 1.0 else f)
+                    cx = x0 + f * dx - x
+                    cy = y0 + f * dy - v
+                    if cx * cx + cy * cy <= tol2:
+                        inside = True
+                        break
+            result.append(inside)
+        return result
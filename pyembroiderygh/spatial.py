@@ -0,0 +1,159 @@
+"""
+A uniform grid spatial index for 2D points with deletion, used to find the
+closest remaining branch while sequencing the rows of a grid fill.
+
+Points are hashed into square cells. A nearest query searches the cells in
+rings around the query point and stops as soon as no unsearched cell can
+hold a closer point. Ties are resolved by the key of the points, so the
+result is the same as a brute force min() over (distance, key) tuples.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+import math
+
+__all__ = [
+    "PointGrid",
+]
+
+
+class PointGrid(object):
+
+    __slots__ = ("cellsize", "cells", "locations",
+                 "mincx", "maxcx", "mincy", "maxcy")
+
+    def __init__(self, cellsize):
+        if not cellsize > 0.0:
+            raise ValueError("Cell size of a PointGrid has to be positive!")
+        self.cellsize = cellsize
+        self.cells = {}
+        self.locations = {}
+        self.mincx = self.mincy = 0
+        self.maxcx = self.maxcy = -1
+
+    @classmethod
+    def for_extents(cls, width, height, count):
+        """
+        Creates an empty grid with a cell size suitable for count points
+        spread over an area of width x height.
+        """
+        count = max(count, 1)
+        area = width * height
+        if area > 0.0:
+            cellsize = math.sqrt(area / count)
+        else:
+            cellsize = max(width, height) / count
+        if not cellsize > 0.0:
+            cellsize = 1.0
+        return cls(cellsize)
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, key):
+        return key in self.locations
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cellsize)),
+                int(math.floor(y / self.cellsize)))
+
+    def insert(self, key, x, y):
+        """
+        Adds a point. Keys have to be unique and comparable.
+        """
+        if key in self.locations:
+            raise ValueError("Key {} is already in the PointGrid!"
+                             .format(key))
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, []).append((key, x, y))
+        self.locations[key] = cell
+        cx, cy = cell
+        if len(self.locations) == 1:
+            self.mincx = self.maxcx = cx
+            self.mincy = self.maxcy = cy
+        else:
+            self.mincx = min(self.mincx, cx)
+            self.maxcx = max(self.maxcx, cx)
+            self.mincy = min(self.mincy, cy)
+            self.maxcy = max(self.maxcy, cy)
+
+    def remove(self, key):
+        """
+        Removes the point with the supplied key.
+        """
+        cell = self.locations.pop(key)
+        bucket = self.cells[cell]
+        for i, entry in enumerate(bucket):
+            if entry[0] == key:
+                del bucket[i]
+                break
+        if not bucket:
+            del self.cells[cell]
+
+    def nearest(self, x, y):
+        """
+        Returns (squared distance, key) of the point closest to (x, y), or
+        None if the grid is empty.
+        """
+        if not self.locations:
+            return None
+        cells = self.cells
+        cx, cy = self._cell(x, y)
+        cellsize = self.cellsize
+        # no cell outside of this many rings can hold a point
+        maxring = max(abs(cx - self.mincx), abs(cx - self.maxcx),
+                      abs(cy - self.mincy), abs(cy - self.maxcy))
+        best = None
+        ring = 0
+        scanned = 0
+        while ring <= maxring:
+            # far away from the remaining points the rings mostly consist of
+            # empty cells, then scanning all points directly is cheaper
+            scanned += 8 * ring if ring else 1
+            if scanned > len(cells):
+                return self._nearest_linear(x, y)
+            for cell in _ring_cells(cx, cy, ring):
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for key, px, py in bucket:
+                    dx = px - x
+                    dy = py - y
+                    candidate = (dx * dx + dy * dy, key)
+                    if best is None or candidate < best:
+                        best = candidate
+            # all points outside of this ring are at least ring * cellsize
+            # away from the query point
+            if best is not None:
+                reach = ring * cellsize
+                if best[0] < reach * reach:
+                    break
+            ring += 1
+        return best
+
+    def _nearest_linear(self, x, y):
+        best = None
+        for bucket in self.cells.values():
+            for key, px, py in bucket:
+                dx = px - x
+                dy = py - y
+                candidate = (dx * dx + dy * dy, key)
+                if best is None or candidate < best:
+                    best = candidate
+        return best
+
+
+def _ring_cells(cx, cy, ring):
+    if ring == 0:
+        yield (cx, cy)
+        return
+    for i in range(cx - ring, cx + ring + 1):
+        yield (i, cy - ring)
+        yield (i, cy + ring)
+    for j in range(cy - ring + 1, cy + ring):
+        yield (cx - ring, j)
+        yield (cx + ring, j)
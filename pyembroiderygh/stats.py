@@ -0,0 +1,93 @@
+"""
+Instrumentation of the fill pipeline: wall time per stage and counters.
+
+The fill functions take an optional FillStats instance. If none is supplied
+nothing is measured or counted at all, so instrumentation is free when it
+is disabled.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from collections import OrderedDict
+from timeit import default_timer
+
+__all__ = [
+    "FillStats",
+    "clock",
+]
+
+# wall clock used for all measurements
+clock = default_timer
+
+
+class FillStats(object):
+    """
+    Collects the wall time of the stages of the fill pipeline and counts
+    of the processed rows, branches, jumps and trims.
+        grid: Bounding box and grid creation.
+        intersections: Intersection of the rows with the boundary.
+        containment: Containment tests of rows with an odd number of
+                     intersections.
+        sequencing: Sequencing of the branches, including travel routing.
+        emission: Creation of the stitches.
+    """
+
+    __slots__ = ("times", "counts")
+
+    STAGES = ("grid", "intersections", "containment", "sequencing",
+              "emission")
+    COUNTS = ("regions", "rows", "branches", "jumps", "trims")
+
+    def __init__(self):
+        self.times = OrderedDict((stage, 0.0) for stage in self.STAGES)
+        self.counts = OrderedDict((name, 0) for name in self.COUNTS)
+
+    def add_time(self, stage, seconds):
+        self.times[stage] += seconds
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def merge(self, other):
+        """
+        Adds the times and counts of another FillStats instance.
+        """
+        for stage, seconds in other.times.items():
+            self.times[stage] += seconds
+        for name, n in other.counts.items():
+            self.counts[name] += n
+
+    @property
+    def total_time(self):
+        return sum(self.times.values())
+
+    def as_dict(self):
+        """
+        Returns all times (in seconds) and counts as a flat dictionary.
+        """
+        data = OrderedDict()
+        for stage, seconds in self.times.items():
+            data[stage + "_time"] = seconds
+        data.update(self.counts)
+        return data
+
+    def report(self):
+        """
+        Returns a short human readable report of all times and counts.
+        """
+        times = ", ".join("{} {:.1f} ms".format(stage, seconds * 1000)
+                          for stage, seconds in self.times.items())
+        counts = ", ".join("{} {}".format(n, name)
+                           for name, n in self.counts.items())
+        return "Fill: {:.1f} ms ({}); {}".format(self.total_time * 1000,
+                                                 times, counts)
+
+    def __repr__(self):
+        return self.report()
+
+    def ToString(self):
+        return repr(self)
@@ -0,0 +1,103 @@
+"""
+The StitchBlock class, a block of stitches with a thread attached to it.
+StitchBlocks can be added to a pattern using EmbPattern.add_stitchblock().
+
+The stitches of a StitchBlock are stored array-backed as StitchBuffer. View
+blocks store a StitchView instead, which references a range of a parent
+buffer or pattern without copying it.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .buffer import StitchBuffer, StitchView
+
+__all__ = [
+    "StitchBlock",
+]
+
+
+class StitchBlock(object):
+
+    __slots__ = ("_stitches", "_thread")
+
+    def __init__(self, stitches, thread):
+        self._set_stitches(stitches)
+        self._set_thread(thread)
+
+    @classmethod
+    def view(cls, parent, start, stop, thread):
+        """
+        Creates a StitchBlock referencing the stitches [start:stop] of a
+        parent StitchBuffer, StitchView, StitchBlock or EmbPattern without
+        copying them.
+        """
+        if isinstance(parent, StitchBlock):
+            parent = parent.stitches
+        elif isinstance(parent, pyembroidery.EmbPattern):
+            parent = parent.stitches
+        return cls(StitchView(parent, start, stop), thread)
+
+    def __getitem__(self, item):
+        return (self.stitches, self.thread)[item]
+
+    def __len__(self):
+        return len(self._stitches)
+
+    def get_stitches_iter(self):
+        return iter(self._stitches)
+
+    def _get_stitches(self):
+        return self._stitches
+
+    def _set_stitches(self, stitches):
+        if isinstance(stitches, (StitchBuffer, StitchView)):
+            self._stitches = stitches
+        elif isinstance(stitches, (list, tuple)):
+            try:
+                self._stitches = StitchBuffer.from_stitches(stitches)
+            except (TypeError, ValueError, IndexError):
+                raise ValueError("Supplied data for stitches is not a " +
+                                 "valid list of stitches!")
+        else:
+            raise ValueError("Supplied data for stitches is not a valid list " +
+                             "of stitches!")
+
+    stitches = property(_get_stitches, _set_stitches, None,
+                        "The stitches of this StitchBlock")
+
+    @property
+    def is_view(self):
+        """
+        True if this block references the stitches of a parent.
+        """
+        return isinstance(self._stitches, StitchView)
+
+    def _get_thread(self):
+        return self._thread
+
+    def _set_thread(self, thread):
+        if isinstance(thread, pyembroidery.EmbThread):
+            self._thread = thread
+        else:
+            raise ValueError("Supplied thread is not a valid EmbThread " +
+                             "instance!")
+
+    thread = property(_get_thread, _set_thread, None,
+                      "The thread of this StitchBlock")
+
+    def ToString(self):
+        descr = "StitchBlock ({} Stitches, EmbThread {})"
+        color = self.thread.hex_color()
+        descr = descr.format(len(self._stitches), color)
+        return descr
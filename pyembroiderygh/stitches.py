@@ -0,0 +1,313 @@
+"""
+Conversion between Rhino geometry, stitch tuples and the "x,y,cmd" stitch
+string format used to pass stitches between pyembroideryGH components.
+
+Stitch tuples always use pyembroidery units (1/10 mm, y axis pointing down).
+Stitch strings created from points use the same units, while the strings
+extracted from a pattern are scaled back to Rhino units (mm).
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from array import array
+from itertools import repeat
+import re
+
+from .cache import LRUCache
+
+__all__ = [
+    "COMMAND_TYPECODE",
+    "PARSE_CACHE",
+    "STITCH_REGEX",
+    "is_stitch_string",
+    "parse_stitch_string",
+    "parse_stitch_strings",
+    "parse_stitch_columns",
+    "format_stitch",
+    "point_to_stitch",
+    "points_to_stitches",
+    "block_to_strings",
+]
+
+# typecode of command columns. pyembroidery stores the thread, needle and
+# order of thread changes in the bits above 8, so commands reach beyond 2^31
+# and need 64 bit integers
+try:
+    array("q")
+    COMMAND_TYPECODE = "q"
+except ValueError:
+    COMMAND_TYPECODE = "l"
+
+# regex pattern for matching stitch strings
+STITCH_REGEX = re.compile(r'^([+-]?(\d+([.]\d*)?([eE][+-]?\d+)?|[.]\d+([eE][+-]?\d+)?)[,]){2}[-+]?[0-9]+$')
+
+# any character that can never be part of a valid stitch string
+_FOREIGN_CHARS = re.compile(r'[^0-9eE.,+-]')
+
+# characters float() and int() accept but STITCH_REGEX does not. together
+# with a finiteness check (nan, inf) and an ascii check (unicode digits),
+# excluding these makes the fast path accept exactly what the regex accepts
+_LENIENT_CHARS = (" ", "\t", "\n", "\r", "\v", "\f", "_")
+
+# parsed columns of the last stitch lists, Grasshopper re-solves the parsing
+# components with unchanged stitches whenever any other input changes
+PARSE_CACHE = LRUCache(8)
+
+
+def _is_ascii(text):
+    try:
+        return text.isascii()
+    except AttributeError:
+        try:
+            text.encode("ascii")
+        except (UnicodeError, AttributeError):
+            return False
+        return True
+
+
+def _count_commas(stitches):
+    try:
+        return list(map(str.count, stitches, repeat(",")))
+    except TypeError:
+        return [s.count(",") if hasattr(s, "count") else -1
+                for s in stitches]
+
+
+def is_stitch_string(stitch):
+    """
+    Returns True if the supplied object is a valid stitch string.
+    """
+    try:
+        return bool(STITCH_REGEX.match(stitch))
+    except TypeError:
+        return False
+
+
+def parse_stitch_string(stitch):
+    """
+    Converts a single stitch string into a (x, y, cmd) tuple. Returns None if
+    the string is not a valid stitch string.
+    """
+    if not is_stitch_string(stitch):
+        return None
+    parts = stitch.split(",")
+    return (float(parts[0]), float(parts[1]), int(parts[2]))
+
+
+def parse_stitch_strings(stitches):
+    """
+    Converts a list of stitch strings into a list of (x, y, cmd) tuples.
+    Returns the list of valid stitches and a list of the indices of all
+    invalid stitch strings.
+    """
+    xs, ys, cmds, invalid = parse_stitch_columns(stitches)
+    return list(zip(xs, ys, cmds)), invalid
+
+
+def _convert_columns(parts):
+    """
+    Converts the flat list of split stitch string parts into typed columns.
+    Raises ValueError if any part is not a valid number.
+    """
+    xs = array("d", map(float, parts[0::3]))
+    ys = array("d", map(float, parts[1::3]))
+    # there are only a handful of distinct commands, convert each once
+    cmdparts = parts[2::3]
+    cmdmap = dict((c, int(c)) for c in set(cmdparts))
+    cmds = array(COMMAND_TYPECODE, map(cmdmap.__getitem__, cmdparts))
+    return xs, ys, cmds
+
+
+def _parse_columns_fast(stitches, counts):
+    """
+    Joins, splits and converts all stitch strings in one go. Returns None if
+    any row would need validation.
+    """
+    try:
+        joined = ",".join(stitches)
+    except TypeError:
+        return None
+    if not _is_ascii(joined):
+        return None
+    for char in _LENIENT_CHARS:
+        if char in joined:
+            return None
+    # every row needs exactly two commas, otherwise the columns would be
+    # misaligned after splitting
+    if counts.count(2) != len(stitches):
+        return None
+    try:
+        xs, ys, cmds = _convert_columns(joined.split(","))
+    except (ValueError, OverflowError):
+        return None
+    # nan and inf are accepted by float() but not by the regex
+    total = sum(xs) + sum(ys)
+    if total != total or total in (float("inf"), float("-inf")):
+        return None
+    return xs, ys, cmds
+
+
+def _parse_columns_flagged(stitches, counts):
+    """
+    Flags all rows that can never match STITCH_REGEX (foreign characters or
+    not exactly two commas) and converts the remaining rows in one go.
+    Returns None if the remaining rows still need row by row validation.
+    """
+    try:
+        flags = list(map(_FOREIGN_CHARS.search, stitches))
+    except TypeError:
+        return None
+    invalid = [i for i, (flag, count) in enumerate(zip(flags, counts))
+               if flag is not None or count != 2]
+    if invalid:
+        bad = set(invalid)
+        stitches = [s for i, s in enumerate(stitches) if i not in bad]
+    if not stitches:
+        return array("d"), array("d"), array(COMMAND_TYPECODE), invalid
+    try:
+        xs, ys, cmds = _convert_columns(",".join(stitches).split(","))
+    except (ValueError, OverflowError):
+        return None
+    return xs, ys, cmds, invalid
+
+
+def _parse_columns(stitches):
+    """
+    Parses a non-empty list of stitch strings, see parse_stitch_columns().
+    """
+    counts = _count_commas(stitches)
+    columns = _parse_columns_fast(stitches, counts)
+    if columns is not None:
+        return columns[0], columns[1], columns[2], []
+    columns = _parse_columns_flagged(stitches, counts)
+    if columns is not None:
+        return columns
+    # slow path: convert row by row, validate only the rows that fail
+    xs = array("d")
+    ys = array("d")
+    cmds = array(COMMAND_TYPECODE)
+    invalid = []
+    for i, stitch in enumerate(stitches):
+        try:
+            if _FOREIGN_CHARS.search(stitch) is not None:
+                raise ValueError
+            x, y, c = stitch.split(",")
+            x = float(x)
+            y = float(y)
+            c = int(c)
+        except (TypeError, ValueError):
+            parsed = parse_stitch_string(stitch)
+            if parsed is None:
+                invalid.append(i)
+                continue
+            x, y, c = parsed
+        try:
+            cmds.append(c)
+        except OverflowError:
+            # no pyembroidery command needs more than 64 bits
+            invalid.append(i)
+            continue
+        xs.append(x)
+        ys.append(y)
+    return xs, ys, cmds, invalid
+
+
+def _parse_key(stitches):
+    """
+    Returns the cache key of a list of stitch strings, None if it can not
+    be cached.
+    """
+    try:
+        joined = "\n".join(stitches)
+    except TypeError:
+        return None
+    # with line breaks only between the rows, the joined rows identify the
+    # list exactly
+    if joined.count("\n") != len(stitches) - 1:
+        return None
+    return (len(stitches), joined)
+
+
+def _copy_columns(columns):
+    xs, ys, cmds, invalid = columns
+    return (array("d", xs), array("d", ys), array(COMMAND_TYPECODE, cmds),
+            list(invalid))
+
+
+def parse_stitch_columns(stitches, cache=PARSE_CACHE):
+    """
+    Batch parser for a whole list or branch of stitch strings. Returns the
+    typed columns xs (array('d')), ys (array('d')) and cmds (64 bit integer
+    array, see COMMAND_TYPECODE) of all valid stitches and a list of the
+    indices of all invalid ones. Commands that do not fit into 64 bits are
+    reported as invalid.
+
+    All strings are joined, split and converted in one go. If that fails,
+    the rows that can never be valid are flagged and the rest is converted
+    in one go again. Only if that fails too, the rows are converted one by
+    one and the rows that fail are validated against STITCH_REGEX.
+
+    Results are kept in the supplied LRUCache, so unchanged lists are not
+    parsed again. Pass None to bypass it.
+    """
+    stitches = list(stitches)
+    if not stitches:
+        return array("d"), array("d"), array(COMMAND_TYPECODE), []
+    key = _parse_key(stitches) if cache is not None else None
+    if key is not None:
+        columns = cache.get(key)
+        if columns is not None:
+            return _copy_columns(columns)
+    columns = _parse_columns(stitches)
+    if key is not None:
+        cache.put(key, _copy_columns(columns))
+    return columns
+
+
+def format_stitch(x, y, cmd):
+    """
+    Compiles a stitch string from its components.
+    """
+    return ",".join([str(x), str(y), str(cmd)])
+
+
+def point_to_stitch(pt, cmd):
+    """
+    Converts a point and a command into a stitch tuple in pyembroidery units.
+    """
+    return (pt.X * 10, pt.Y * -10, int(cmd))
+
+
+def points_to_stitches(pts, cmds):
+    """
+    Pairs points with commands using longest-list matching. Returns a list
+    of stitch tuples and a list of the corresponding stitch strings.
+    """
+    stitches = []
+    stitch_strings = []
+    if not pts or not cmds:
+        return stitches, stitch_strings
+    count = max(len(pts), len(cmds))
+    lastpt = len(pts) - 1
+    lastcmd = len(cmds) - 1
+    for i in range(count):
+        # extract point and command with failsafe
+        pt = pts[i] if i <= lastpt else pts[lastpt]
+        command = cmds[i] if i <= lastcmd else cmds[lastcmd]
+        x = pt.X * 10
+        y = pt.Y * -10
+        stitches.append((x, y, int(command)))
+        stitch_strings.append(format_stitch(x, y, command))
+    return stitches, stitch_strings
+
+
+def block_to_strings(block):
+    """
+    Converts a block of pyembroidery stitches ([x, y, cmd] in 1/10 mm) into
+    stitch strings in Rhino units.
+    """
+    return [format_stitch(s[0] * 0.1, s[1] * -0.1, s[2]) for s in block]
@@ -0,0 +1,346 @@
+"""
+Streaming, array-backed decoding of very large embroidery files.
+
+pyembroidery.read() loads the whole file and builds a python list of stitch
+lists, which takes a multiple of the file size in memory. The functions of
+this module decode into StitchBuffer chunks instead:
+    DST files are decoded straight from a memory-mapped file in chunks of
+    records, using lookup tables per byte. The trim interpolation the
+    pyembroidery DstReader applies afterwards (a trim before every run of
+    three jumps, runs of jumps without displacement are clipped) is applied
+    while streaming, so the stitches are the same as with
+    pyembroidery.read().
+    All other formats are decoded by pyembroidery and converted, so they
+    only save memory after reading.
+
+A BufferedPattern holds the complete StitchBuffer with the threads and
+metadata of a file and offers the parts of the EmbPattern interface the
+preview and analysis components use, so it can be passed to them directly.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+from os import path
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+    from pyembroidery import DstReader
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .buffer import StitchBuffer, StitchView
+from .info import StitchCounter
+from .pattern import colorblock_ranges
+from .reader import READ_ERROR, normalize_path
+from .utils import process_map
+
+__all__ = [
+    "BufferedPattern",
+    "iter_dst_chunks",
+    "iter_stitch_chunks",
+    "read_buffered",
+    "read_buffered_pattern",
+    "read_buffered_patterns",
+]
+
+# size of the DST header and of a single stitch record
+_DST_HEADER = 512
+_DST_RECORD = 3
+
+
+def _bit_table(weights):
+    # sum of the weights of all set bits of every byte value
+    table = []
+    for value in range(256):
+        table.append(sum(w for bit, w in weights if (value >> bit) & 1))
+    return table
+
+
+# displacement of every byte value at the three positions of a record,
+# see DstReader.decode_dx() and decode_dy()
+_DX = (_bit_table(((0, 1), (1, -1), (2, 9), (3, -9))),
+       _bit_table(((0, 3), (1, -3), (2, 27), (3, -27))),
+       _bit_table(((2, 81), (3, -81))))
+_DY = (_bit_table(((7, -1), (6, 1), (5, -9), (4, 9))),
+       _bit_table(((7, -3), (6, 3), (5, -27), (4, 27))),
+       _bit_table(((5, -81), (4, 81))))
+
+
+def _byte_chunks(f, offset, size):
+    """
+    Yields the content of a file from offset on in blocks of size bytes,
+    from a memory map if possible.
+    """
+    try:
+        import mmap
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ImportError, ValueError, EnvironmentError, AttributeError):
+        data = None
+    if data is None:
+        f.seek(offset)
+        while True:
+            block = f.read(size)
+            if not block:
+                return
+            yield bytearray(block)
+    try:
+        for start in range(offset, len(data), size):
+            yield bytearray(data[start:start + size])
+    finally:
+        data.close()
+
+
+def iter_dst_chunks(filepath, chunksize=65536):
+    """
+    Decodes the stitches of a DST file from a memory map and yields them
+    as StitchBuffer chunks of about chunksize stitches. The stitches equal
+    those of pyembroidery.read().
+    """
+    STITCH = pyembroidery.STITCH
+    JUMP = pyembroidery.JUMP
+    TRIM = pyembroidery.TRIM
+    COLOR_CHANGE = pyembroidery.COLOR_CHANGE
+    SEQUIN_MODE = pyembroidery.SEQUIN_MODE
+    SEQUIN_EJECT = pyembroidery.SEQUIN_EJECT
+    END = pyembroidery.END
+    dx0, dx1, dx2 = _DX
+    dy0, dy1, dy2 = _DY
+    buf = StitchBuffer()
+    xs, ys, cmds = buf.xs, buf.ys, buf.cmds
+    # pending stitches of the current run of jumps, see
+    # EmbPattern.interpolate_trims()
+    run = []
+    jumping = False
+    trimmed = True
+    jump_count = jump_dx = jump_dy = 0
+    x = y = 0
+    # position of the last stitch that was passed on
+    last_x = last_y = 0
+    sequin_mode = False
+    ended = False
+    with open(filepath, "rb") as f:
+        chunks = _byte_chunks(f, _DST_HEADER, _DST_RECORD * chunksize)
+        for block in chunks:
+            # an incomplete last record of the file is dropped by zip
+            records = list(zip(block[0::3], block[1::3], block[2::3]))
+            for b0, b1, b2 in records:
+                if b2 & 0b11110011 == 0b11110011:
+                    ended = True
+                    break
+                dx = dx0[b0] + dx1[b1] + dx2[b2]
+                dy = dy0[b0] + dy1[b1] + dy2[b2]
+                if b2 & 0b11000011 == 0b11000011:
+                    cmd = COLOR_CHANGE
+                elif b2 & 0b01000011 == 0b01000011:
+                    cmd = SEQUIN_MODE
+                    sequin_mode = not sequin_mode
+                elif b2 & 0b10000011 == 0b10000011:
+                    cmd = SEQUIN_EJECT if sequin_mode else JUMP
+                else:
+                    cmd = STITCH
+                x += dx
+                y += dy
+                # trim interpolation
+                if cmd == STITCH or cmd == SEQUIN_EJECT:
+                    trimmed = False
+                    jumping = False
+                elif cmd == COLOR_CHANGE:
+                    trimmed = True
+                    jumping = False
+                if cmd == JUMP:
+                    if not jumping:
+                        jump_count = jump_dx = jump_dy = 0
+                        jumping = True
+                    jump_count += 1
+                    jump_dx += dx
+                    jump_dy += dy
+                    run.append((x, y, cmd))
+                    if not trimmed and jump_count == 3:
+                        # the trim goes in front of the run
+                        xs.append(last_x)
+                        ys.append(last_y)
+                        cmds.append(TRIM)
+                        trimmed = True
+                    if jump_dx == 0 and jump_dy == 0:
+                        del run[:]
+                    continue
+                if jumping:
+                    run.append((x, y, cmd))
+                    continue
+                if run:
+                    buf.extend(run)
+                    del run[:]
+                xs.append(x)
+                ys.append(y)
+                cmds.append(cmd)
+                last_x = x
+                last_y = y
+            if ended:
+                break
+            if len(cmds) >= chunksize:
+                yield buf
+                buf = StitchBuffer()
+                xs, ys, cmds = buf.xs, buf.ys, buf.cmds
+    # the reader ends every pattern, also ones without end record
+    run.append((x, y, END))
+    buf.extend(run)
+    yield buf
+
+
+def iter_stitch_chunks(filepath, chunksize=65536):
+    """
+    Yields the stitches of an embroidery file as StitchBuffer (or
+    StitchView) chunks of about chunksize stitches. DST files are streamed,
+    all other formats are decoded by pyembroidery first.
+    """
+    extension = path.splitext(filepath)[1][1:].lower()
+    if extension == "dst":
+        for chunk in iter_dst_chunks(filepath, chunksize):
+            yield chunk
+        return
+    pattern = pyembroidery.read(filepath)
+    if pattern is None:
+        raise ValueError("Format of the file is not readable!")
+    buf = StitchBuffer.from_stitches(pattern.stitches)
+    del pattern
+    for start in range(0, len(buf), chunksize):
+        yield buf.view(start, start + chunksize)
+
+
+class BufferedPattern(object):
+    """
+    The stitches of an embroidery file in a StitchBuffer, together with the
+    threads and metadata. Offers the parts of the EmbPattern interface that
+    the preview and analysis components use. to_pattern() converts it to
+    a real EmbPattern.
+    """
+
+    __slots__ = ("stitches", "threadlist", "extras")
+
+    def __init__(self, stitches=None, threadlist=None, extras=None):
+        self.stitches = stitches if stitches is not None else StitchBuffer()
+        self.threadlist = threadlist if threadlist is not None else []
+        self.extras = extras if extras is not None else {}
+
+    def count_stitches(self):
+        return len(self.stitches)
+
+    def count_threads(self):
+        return len(self.threadlist)
+
+    def get_thread_or_filler(self, index):
+        if len(self.threadlist) <= index:
+            return pyembroidery.EmbPattern.get_random_thread()
+        return self.threadlist[index]
+
+    def get_metadata(self, name, default=None):
+        return self.extras.get(name, default)
+
+    def get_as_colorblocks(self):
+        """
+        Generator for the colorblocks as (StitchView, thread) tuples, like
+        EmbPattern.get_as_colorblocks().
+        """
+        for start, stop, thread in colorblock_ranges(self):
+            yield StitchView(self.stitches, start, stop), thread
+
+    def get_as_stitches(self):
+        """
+        Generator for (pos, x, y, command, thread, needle, order) tuples,
+        like EmbPattern.get_as_stitches().
+        """
+        decode = pyembroidery.decode_embroidery_command
+        for pos, (x, y, cmd) in enumerate(self.stitches):
+            command, thread, needle, order = decode(cmd)
+            yield pos, x, y, command, thread, needle, order
+
+    def get_as_columns(self):
+        """
+        Returns the decoded stitches as (xs, ys, commands, threads, needles,
+        orders) columns, the columns of get_as_stitches() without building
+        a tuple per stitch. xs and ys are the coordinate arrays of the
+        buffer, every distinct command is decoded only once.
+        """
+        decode = pyembroidery.decode_embroidery_command
+        cmds = self.stitches.cmds
+        decoded = dict((cmd, decode(cmd)) for cmd in set(cmds))
+        columns = [[decoded[cmd][k] for cmd in cmds] for k in range(4)]
+        return (self.stitches.xs, self.stitches.ys) + tuple(columns)
+
+    def extents(self):
+        stitches = self.stitches
+        if not len(stitches):
+            return (0, 0, 0, 0)
+        return (min(stitches.xs), min(stitches.ys),
+                max(stitches.xs), max(stitches.ys))
+
+    bounds = extents
+
+    def to_pattern(self):
+        """
+        Returns the stitches, threads and metadata as EmbPattern.
+        """
+        pattern = pyembroidery.EmbPattern()
+        for x, y, cmd in self.stitches:
+            pattern.add_stitch_absolute(cmd, x, y)
+        pattern.threadlist = list(self.threadlist)
+        pattern.extras = dict(self.extras)
+        return pattern
+
+    def __repr__(self):
+        return "BufferedPattern({} Stitches, {} Threads)".format(
+            len(self.stitches), len(self.threadlist))
+
+    def ToString(self):
+        return repr(self)
+
+
+def read_buffered(filepath, chunksize=65536):
+    """
+    Reads an embroidery file into a BufferedPattern. DST files are streamed
+    from a memory map and never materialized as python stitch lists.
+    """
+    extension = path.splitext(filepath)[1][1:].lower()
+    if extension != "dst":
+        pattern = pyembroidery.read(filepath)
+        if pattern is None:
+            raise ValueError("Format of the file is not readable!")
+        return BufferedPattern(StitchBuffer.from_stitches(pattern.stitches),
+                               pattern.threadlist, pattern.extras)
+    # threads and metadata from the header
+    header = StitchCounter()
+    with open(filepath, "rb") as f:
+        DstReader.dst_read_header(f, header)
+    stitches = StitchBuffer()
+    for chunk in iter_dst_chunks(filepath, chunksize):
+        stitches.extend(chunk)
+    return BufferedPattern(stitches, header.threadlist, header.extras)
+
+
+def read_buffered_pattern(filepath):
+    """
+    Reads a single embroidery file into a BufferedPattern. Returns a
+    (pattern, error) tuple like read_pattern().
+    """
+    try:
+        pattern = read_buffered(normalize_path(filepath))
+    except Exception:
+        return (None, READ_ERROR)
+    return (pattern, None)
+
+
+def read_buffered_patterns(filepaths, workers=0, chunksize=1):
+    """
+    Reads a batch of embroidery files into BufferedPatterns on a pool of
+    workers, 0 workers uses one worker per processor core. Returns a list
+    of (pattern, error) tuples in the order of filepaths.
+    """
+    return process_map(read_buffered_pattern, filepaths, workers, chunksize)
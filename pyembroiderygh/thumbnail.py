@@ -0,0 +1,251 @@
+"""
+Headless thumbnail rendering of embroidery patterns to PNG images.
+
+The RenderPattern component can only draw into a live Rhino viewport. This
+module rasterizes the same preview without Rhino: it walks the colorblocks
+of the pattern like render_blocks() does, breaks the thread runs on trim
+commands only (jumps are drawn like in the viewport preview) and draws every
+stitch as a thread-colored line into an RGB raster, which is written as PNG
+using nothing but the standard library.
+
+render_thumbnails() converts whole lists of embroidery files on a pool of
+worker processes.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+import hashlib
+import os
+import struct
+import warnings
+import zlib
+
+# LOCAL MODULE IMPORTS
+try:
+    import pyembroidery
+except ImportError:
+    errMsg = ("The pyembroidery python module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
+from .pattern import colorblock_ranges, thread_rgb
+from .utils import process_map
+
+__all__ = [
+    "FILLER_COLORS",
+    "Raster",
+    "render_thumbnail",
+    "render_thumbnails",
+    "thumbnail_file",
+    "thumbnail_targets",
+]
+
+# colors of the colorblocks without a thread, pyembroidery picks random ones
+# which would make the thumbnails change on every run
+FILLER_COLORS = ((0, 0, 0), (200, 30, 30), (30, 120, 200), (40, 160, 60),
+                 (230, 160, 20), (140, 60, 170), (20, 170, 170),
+                 (120, 120, 120))
+
+
+class Raster(object):
+    """
+    A RGB raster image with 8 bits per channel, stored row by row in a
+    single bytearray.
+    """
+
+    __slots__ = ("width", "height", "pixels")
+
+    def __init__(self, width, height, background=(255, 255, 255)):
+        if width < 1 or height < 1:
+            raise ValueError("Size of a Raster has to be at least 1!")
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(background) * (width * height)
+
+    def set_pixel(self, x, y, color):
+        """
+        Sets the pixel at a position, if it lies inside of the raster.
+        """
+        px = int(x + 0.5)
+        py = int(y + 0.5)
+        if 0 <= px < self.width and 0 <= py < self.height:
+            i = (py * self.width + px) * 3
+            self.pixels[i:i + 3] = color
+
+    def draw_line(self, x0, y0, x1, y1, color):
+        """
+        Draws a line of one pixel width between two pixel positions. The
+        line is stepped along its major axis, so every step sets exactly one
+        pixel. Pixels outside of the raster are skipped.
+        """
+        width = self.width
+        height = self.height
+        pixels = self.pixels
+        dx = x1 - x0
+        dy = y1 - y0
+        steps = int(max(abs(dx), abs(dy)))
+        if steps == 0:
+            steps = 1
+        sx = dx / steps
+        sy = dy / steps
+        x = x0 + 0.5
+        y = y0 + 0.5
+        for _ in range(steps + 1):
+            px = int(x)
+            py = int(y)
+            if 0 <= px < width and 0 <= py < height:
+                i = (py * width + px) * 3
+                pixels[i:i + 3] = color
+            x += sx
+            y += sy
+
+    def to_png(self):
+        """
+        Returns the raster encoded as PNG.
+        """
+        stride = self.width * 3
+        rows = bytearray()
+        for start in range(0, len(self.pixels), stride):
+            # every row starts with the filter type, 0 is no filter
+            rows.append(0)
+            rows.extend(self.pixels[start:start + stride])
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2,
+                             0, 0, 0)
+        return b"".join((b"\x89PNG\r\n\x1a\n",
+                         _png_chunk(b"IHDR", header),
+                         _png_chunk(b"IDAT", zlib.compress(bytes(rows), 6)),
+                         _png_chunk(b"IEND", b"")))
+
+    def save(self, path):
+        """
+        Writes the raster as PNG file.
+        """
+        with open(path, "wb") as f:
+            f.write(self.to_png())
+
+    def ToString(self):
+        return "Raster ({} x {})".format(self.width, self.height)
+
+
+def _png_chunk(tag, data):
+    crc = zlib.crc32(tag + data) & 0xffffffff
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def render_thumbnail(pattern, size=256, margin=4,
+                     background=(255, 255, 255)):
+    """
+    Renders a pattern into a square Raster of size x size pixels. The
+    pattern is scaled to fit and centered, keeping margin pixels free on
+    every side. Colorblocks without a thread are drawn in FILLER_COLORS.
+    """
+    raster = Raster(size, size, background)
+    stitches = pattern.stitches
+    if not stitches:
+        return raster
+    minx, miny, maxx, maxy = pattern.extents()
+    extent = max(maxx - minx, maxy - miny)
+    drawable = max(size - 2 * margin - 1, 1)
+    scale = drawable / extent if extent > 0 else 1.0
+    # center the pattern, image rows run downwards like pattern y values
+    ox = (size - (maxx - minx) * scale) / 2 - minx * scale
+    oy = (size - (maxy - miny) * scale) / 2 - miny * scale
+    draw_line = raster.draw_line
+    threads = pattern.threadlist
+    # loop through all colorblocks
+    for k, (start, stop, thread) in enumerate(colorblock_ranges(pattern)):
+        if k < len(threads):
+            color = bytearray(thread_rgb(threads[k]))
+        else:
+            color = bytearray(FILLER_COLORS[k % len(FILLER_COLORS)])
+        last = None
+        for j in range(start, stop):
+            stitch = stitches[j]
+            cmd = stitch[2]
+            # if no command or color break, continue
+            if (cmd == pyembroidery.NO_COMMAND or
+                    cmd == pyembroidery.COLOR_BREAK):
+                continue
+            x = stitch[0] * scale + ox
+            y = stitch[1] * scale + oy
+            if last is not None:
+                # stitches within the same pixel are not drawn one by one
+                if (int(x + 0.5) != int(last[0] + 0.5) or
+                        int(y + 0.5) != int(last[1] + 0.5)):
+                    draw_line(last[0], last[1], x, y, color)
+                    last = (x, y)
+            else:
+                raster.set_pixel(x, y, color)
+                last = (x, y)
+            # a trim ends the run at this coordinate
+            if cmd == pyembroidery.TRIM:
+                last = None
+    return raster
+
+
+def thumbnail_file(job):
+    """
+    Renders the thumbnail of a single embroidery file. job is a (source,
+    target, size) tuple. Returns a (source, target, error) tuple, error
+    being None on success or the message of the failure. Module level, so
+    it can be sent to worker processes.
+    """
+    source, target, size = job
+    try:
+        pattern = pyembroidery.read(source)
+        if pattern is None:
+            return (source, target, "Could not read embroidery file!")
+        render_thumbnail(pattern, size).save(target)
+    except Exception as e:
+        return (source, target, str(e))
+    return (source, target, None)
+
+
+def thumbnail_targets(paths, directory):
+    """
+    Returns the target paths of the thumbnails of a list of embroidery
+    files in directory. Every thumbnail is named like its file plus a .png
+    extension, so 'd0.dst' and 'd0.pes' do not overwrite each other. Files
+    with the same name in different folders additionally get a hash of
+    their folder appended and are reported by a RuntimeWarning.
+    """
+    sources = [os.path.normcase(os.path.abspath(p)) for p in paths]
+    names = [os.path.basename(p) for p in paths]
+    folders = {}
+    for name, source in zip(names, sources):
+        folders.setdefault(os.path.normcase(name), set()).add(
+            os.path.dirname(source))
+    targets = []
+    renamed = []
+    for path, name, source in zip(paths, names, sources):
+        if len(folders[os.path.normcase(name)]) > 1:
+            folder = os.path.dirname(source).encode("utf-8")
+            name = "{}.{}".format(name, hashlib.sha1(folder).hexdigest()[:8])
+            renamed.append(path)
+        targets.append(os.path.join(directory, name + ".png"))
+    if renamed:
+        warnings.warn("Files with the same name in different folders, their "
+                      "thumbnails are named with a hash of the folder: " +
+                      ", ".join(renamed), RuntimeWarning)
+    return targets
+
+
+def render_thumbnails(paths, directory, size=256, workers=0, chunksize=4):
+    """
+    Renders PNG thumbnails of a list of embroidery files into directory,
+    which is created if it does not exist. The thumbnails are named by
+    thumbnail_targets(). The files are processed on a pool of worker
+    processes, 0 workers uses one process per processor core. Returns a
+    list of (source, target, error) tuples in the order of the paths, see
+    thumbnail_file().
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    targets = thumbnail_targets(paths, directory)
+    jobs = [(path, target, size) for path, target in zip(paths, targets)]
+    return process_map(thumbnail_file, jobs, workers, chunksize)
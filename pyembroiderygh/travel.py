@@ -0,0 +1,235 @@
+"""
+Travel routing for the grid-based fill of the EmbroideryGrid component.
+
+Whenever the sequencing of the rows jumps between non-adjacent rows, the
+needle has to get from the end of the last branch to the start of the next
+one. Instead of trimming the thread there, the TravelRouter looks for a path
+that stays inside the boundary and returns it as travel stitches:
+    1. The direct move is used if it does not leave the boundary.
+    2. Otherwise, if both points lie on the same ring of the boundary, the
+       shorter way along that ring is used.
+If neither works, the caller falls back to a trim.
+
+Containment uses the even-odd rule over all rings and works in the XY
+projection, like the containment test of the PolylineBoundary.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+from __future__ import division
+import math
+
+__all__ = [
+    "TravelRouter",
+]
+
+
+def _xy(pt):
+    if isinstance(pt, (tuple, list)):
+        return (pt[0], pt[1])
+    return (pt.X, pt.Y)
+
+
+def _z(pt):
+    if isinstance(pt, (tuple, list)):
+        return pt[2] if len(pt) > 2 else 0.0
+    return pt.Z
+
+
+class TravelRouter(object):
+    """
+    Finds travel paths inside a boundary given as polygonized rings.
+    Counts the routed and the failed travels.
+    """
+
+    __slots__ = ("rings", "edges", "tol", "stitch_length", "snap",
+                 "routed", "failed")
+
+    def __init__(self, rings, tol=0.0, stitch_length=2.5):
+        if not stitch_length > 0.0:
+            raise ValueError("Travel stitch length has to be positive!")
+        self.rings = []
+        self.edges = []
+        for ring in rings:
+            pts = [_xy(pt) for pt in ring]
+            if len(pts) < 3:
+                continue
+            if pts[0] != pts[-1]:
+                pts.append(pts[0])
+            self.rings.append(pts)
+            for k in range(len(pts) - 1):
+                if pts[k] != pts[k + 1]:
+                    self.edges.append((pts[k], pts[k + 1]))
+        self.tol = tol
+        self.stitch_length = stitch_length
+        # points closer than this to a ring count as lying on it
+        self.snap = max(2 * tol, 1e-6)
+        self.routed = 0
+        self.failed = 0
+
+    # CONTAINMENT -------------------------------------------------------------
+
+    def contains(self, x, y):
+        """
+        Even-odd containment test over all rings. Points within tol of an
+        edge count as inside.
+        """
+        inside = False
+        tol2 = self.tol * self.tol
+        for (x0, y0), (x1, y1) in self.edges:
+            dx = x1 - x0
+            dy = y1 - y0
+            f = ((x - x0) * dx + (y - y0) * dy) / (dx * dx + dy * dy)
+            f = 0.0 if f < 0.0 else (1.0 if f > 1.0 else f)
+            cx = x0 + f * dx - x
+            cy = y0 + f * dy - y
+            if cx * cx + cy * cy <= tol2:
+                return True
+            if (y0 > y) != (y1 > y):
+                if x < x0 + (y - y0) * dx / dy:
+                    inside = not inside
+        return inside
+
+    def is_inside_move(self, a, b):
+        """
+        True if the straight move from a to b does not leave the boundary.
+        The move is split at all points where it touches an edge and the
+        middle of every piece is tested for containment.
+        """
+        ax, ay = a
+        rx = b[0] - ax
+        ry = b[1] - ay
+        rr = rx * rx + ry * ry
+        if rr == 0.0:
+            return True
+        params = [0.0, 1.0]
+        for (px, py), (qx, qy) in self.edges:
+            sx = qx - px
+            sy = qy - py
+            denom = rx * sy - ry * sx
+            wx = px - ax
+            wy = py - ay
+            if denom == 0.0:
+                # collinear edges split the move at their end points
+                if wx * ry - wy * rx == 0.0:
+                    for t in ((wx * rx + wy * ry) / rr,
+                              ((qx - ax) * rx + (qy - ay) * ry) / rr):
+                        if 0.0 < t < 1.0:
+                            params.append(t)
+                continue
+            t = (wx * sy - wy * sx) / denom
+            s = (wx * ry - wy * rx) / denom
+            if 0.0 <= s <= 1.0 and 0.0 < t < 1.0:
+                params.append(t)
+        params.sort()
+        for t0, t1 in zip(params[:-1], params[1:]):
+            if t1 - t0 <= 1e-12:
+                continue
+            t = (t0 + t1) / 2
+            if not self.contains(ax + rx * t, ay + ry * t):
+                return False
+        return True
+
+    # BOUNDARY PATHS ----------------------------------------------------------
+
+    def _locate(self, pt):
+        # closest (ring, edge, arc length position, distance) on all rings
+        x, y = pt
+        best = None
+        for r, ring in enumerate(self.rings):
+            pos = 0.0
+            for k in range(len(ring) - 1):
+                (x0, y0), (x1, y1) = ring[k], ring[k + 1]
+                dx = x1 - x0
+                dy = y1 - y0
+                seglen2 = dx * dx + dy * dy
+                if seglen2 == 0.0:
+                    continue
+                f = ((x - x0) * dx + (y - y0) * dy) / seglen2
+                f = 0.0 if f < 0.0 else (1.0 if f > 1.0 else f)
+                cx = x0 + f * dx - x
+                cy = y0 + f * dy - y
+                dist = cx * cx + cy * cy
+                seglen = math.sqrt(seglen2)
+                if best is None or dist < best[3]:
+                    best = (r, k, pos + f * seglen, dist)
+                pos += seglen
+        return best
+
+    def boundary_path(self, a, b):
+        """
+        Returns the shorter path from a to b along the ring both points lie
+        on as a list of (x, y) points, None if they are not on the same
+        ring.
+        """
+        la = self._locate(a)
+        lb = self._locate(b)
+        snap2 = self.snap * self.snap
+        if la is None or lb is None or la[0] != lb[0]:
+            return None
+        if la[3] > snap2 or lb[3] > snap2:
+            return None
+        ring = self.rings[la[0]]
+        # arc length position of every vertex
+        positions = [0.0]
+        for k in range(len(ring) - 1):
+            (x0, y0), (x1, y1) = ring[k], ring[k + 1]
+            positions.append(positions[-1] + math.hypot(x1 - x0, y1 - y0))
+        perimeter = positions[-1]
+        forward = (lb[2] - la[2]) % perimeter
+        vertices = ring[:-1]
+        count = len(vertices)
+        path = [a]
+        if forward <= perimeter - forward:
+            k = la[1] + 1
+            while (positions[k % count] - la[2]) % perimeter < forward:
+                if positions[k % count] != la[2]:
+                    path.append(vertices[k % count])
+                k += 1
+                if len(path) > count:
+                    break
+        else:
+            backward = perimeter - forward
+            k = la[1]
+            while (la[2] - positions[k % count]) % perimeter < backward:
+                if positions[k % count] != la[2]:
+                    path.append(vertices[k % count])
+                k -= 1
+                if len(path) > count:
+                    break
+        path.append(b)
+        return path
+
+    # ROUTING -----------------------------------------------------------------
+
+    def route(self, start, end):
+        """
+        Returns the travel stitches from start to end (both excluded) as a
+        list of (x, y, z) tuples, None if there is no path inside the
+        boundary. Start and end can be points or (x, y, z) tuples.
+        """
+        a = _xy(start)
+        b = _xy(end)
+        if self.is_inside_move(a, b):
+            path = [a, b]
+        else:
+            path = self.boundary_path(a, b)
+            if path is None:
+                self.failed += 1
+                return None
+        self.routed += 1
+        z = _z(start)
+        travel = []
+        for (x0, y0), (x1, y1) in zip(path[:-1], path[1:]):
+            length = math.hypot(x1 - x0, y1 - y0)
+            steps = int(math.ceil(length / self.stitch_length))
+            for i in range(1, steps + 1):
+                f = i / steps
+                travel.append((x0 + (x1 - x0) * f, y0 + (y1 - y0) * f, z))
+        # the end point is the start of the next branch
+        if travel:
+            travel.pop()
+        return travel
@@ -0,0 +1,123 @@
+"""
+Small general purpose helpers of the pyembroideryGH core.
+    Remarks:
+        Author: Max Eschenbach
+        License: MIT License
+        Version: 261018
+"""
+
+# PYTHON STANDARD LIBRARY IMPORTS
+import threading
+
+__all__ = [
+    "cpu_count",
+    "match_longest",
+    "parallel_map",
+    "process_map",
+]
+
+
+def match_longest(*lists):
+    """
+    Grasshopper-style longest list matching. Pads all supplied lists to the
+    length of the longest one by repeating their last item. Empty lists are
+    left untouched.
+    """
+    maxcount = max(len(l) for l in lists)
+    matched = []
+    for l in lists:
+        l = list(l)
+        if l and len(l) < maxcount:
+            l.extend([l[-1]] * (maxcount - len(l)))
+        matched.append(l)
+    return tuple(matched)
+
+
+def cpu_count():
+    """
+    Returns the number of processor cores, 1 if it can not be determined.
+    """
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        pass
+    try:
+        import System
+        return System.Environment.ProcessorCount
+    except ImportError:
+        return 1
+
+
+def parallel_map(func, items, workers=1):
+    """
+    Applies func to all items on a pool of worker threads and returns the
+    results in the order of the items. With less than two workers (or
+    items) everything runs serially in the calling thread. If func raises
+    for any item, the exception of the first failing item is re-raised once
+    all workers are done.
+
+    Threads run truly parallel in IronPython, which has no global
+    interpreter lock. On CPython only code that releases the GIL benefits.
+    """
+    items = list(items)
+    count = len(items)
+    if workers is None or workers <= 1 or count <= 1:
+        return [func(item) for item in items]
+    results = [None] * count
+    errors = [None] * count
+    lock = threading.Lock()
+    cursor = [0]
+
+    def work():
+        while True:
+            with lock:
+                i = cursor[0]
+                cursor[0] += 1
+            if i >= count:
+                return
+            try:
+                results[i] = func(items[i])
+            except Exception as e:
+                errors[i] = e
+
+    threads = [threading.Thread(target=work)
+               for _ in range(min(workers, count))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+    for e in errors:
+        if e is not None:
+            raise e
+    return results
+
+
+def process_map(func, items, workers=0, chunksize=1):
+    """
+    Applies func to all items on a pool of worker processes and returns the
+    results in the order of the items. func, the items and the results have
+    to be picklable, so func has to be a module level function. 0 workers
+    uses one process per processor core. With less than two workers (or
+    items) everything runs serially in the calling process.
+
+    Where multiprocessing is not available, like in IronPython, the items
+    are processed by parallel_map() on threads instead.
+    """
+    items = list(items)
+    if workers is None or workers == 0:
+        workers = cpu_count()
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+    try:
+        import multiprocessing
+        pool = multiprocessing.Pool(workers)
+    except (ImportError, NotImplementedError, OSError):
+        return parallel_map(func, items, workers)
+    try:
+        return pool.map(func, items, chunksize)
+    finally:
+        pool.close()
+        pool.join()
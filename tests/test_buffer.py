@@ -0,0 +1,52 @@
+"""
+Tests of the StitchBuffer container.
+"""
+
+from array import array
+
+import pyembroidery
+
+from pyembroiderygh import StitchBuffer, read_buffered_pattern
+
+
+def thread_changes():
+    # the order of a thread change is stored in bits 24 to 31
+    return [pyembroidery.encode_thread_change(pyembroidery.COLOR_CHANGE,
+                                              order=order)
+            for order in (128, 200, 254)]
+
+
+def test_large_commands_round_trip():
+    commands = thread_changes()
+    assert commands[1] == 3372220421
+    stitches = [[i * 10.0, i * -5.0, cmd] for i, cmd in enumerate(commands)]
+    buf = StitchBuffer.from_stitches(stitches)
+    assert [list(s) for s in buf] == stitches
+    assert list(buf.view(1).cmds) == commands[1:]
+    assert list(buf.copy().cmds) == commands
+    buf.extend(buf.view(0, 2))
+    assert list(buf.cmds) == commands + commands[:2]
+    decoded = [pyembroidery.decode_embroidery_command(c)[3]
+               for c in buf.cmds]
+    assert decoded[:3] == [128, 200, 254]
+
+
+def test_foreign_columns_are_converted():
+    buf = StitchBuffer(array("d", [1.0]), [2.0], array("i", [1]))
+    buf.extend(StitchBuffer.from_stitches([[0.0, 0.0, thread_changes()[0]]]))
+    assert list(buf.cmds) == [1, thread_changes()[0]]
+
+
+def test_read_buffered_pattern_with_orders(monkeypatch):
+    pattern = pyembroidery.EmbPattern()
+    for i in range(10):
+        pattern.add_stitch_absolute(pyembroidery.STITCH, i * 10, 0)
+    pattern.add_command(thread_changes()[1])
+    for i in range(10):
+        pattern.add_stitch_absolute(pyembroidery.STITCH, i * 10, 20)
+    pattern.end()
+    # no writer keeps the order, the reader returns the pattern as is
+    monkeypatch.setattr(pyembroidery, "read", lambda filepath: pattern)
+    buffered, error = read_buffered_pattern("d.pes")
+    assert error is None
+    assert [list(s) for s in buffered.stitches] == pattern.stitches
@@ -0,0 +1,121 @@
+"""
+Tests of the on-disk PatternCache.
+"""
+
+import os
+import pickle
+import tempfile
+
+import pyembroidery
+import pytest
+
+from pyembroiderygh import (PatternCache,
+                            dump_pattern,
+                            load_pattern,
+                            pattern_key,
+                            user_cache_directory)
+
+
+def make_design():
+    pattern = pyembroidery.EmbPattern()
+    for color in (0xff0000, 0x00ff00):
+        pattern.add_thread(pyembroidery.EmbThread(color))
+        for i in range(30):
+            pattern.add_stitch_absolute(pyembroidery.STITCH, i * 10,
+                                        (i % 2) * 40)
+        pattern.add_command(pyembroidery.TRIM)
+        pattern.add_command(pyembroidery.COLOR_BREAK)
+    pattern.end()
+    return pattern
+
+
+def thread_state(threads):
+    return [(type(t), vars(t)) for t in threads]
+
+
+@pytest.mark.parametrize("extension", ["dst", "pes", "jef"])
+def test_round_trip(tmp_path, extension):
+    path = str(tmp_path / ("d." + extension))
+    pyembroidery.write(make_design(), path)
+    pattern = pyembroidery.read(path)
+    cache = PatternCache(str(tmp_path / "cache"))
+    key = pattern_key(path)
+    assert cache.put(key, pattern)
+    cached = cache.get(key)
+    assert cache.hits == 1
+    assert cached.stitches == pattern.stitches
+    assert thread_state(cached.threadlist) == thread_state(pattern.threadlist)
+    assert repr(cached.extras) == repr(pattern.extras)
+
+
+def test_tagged_extras():
+    pattern = make_design()
+    pattern.extras.update({"tuple": (bytearray(b"\x00\xff"), 6, None),
+                           "bytes": b"\x01\x02",
+                           "nested": {1: [pyembroidery.EmbThread(0x123456)]}})
+    restored = load_pattern(dump_pattern(pattern))
+    assert restored.extras["tuple"] == (bytearray(b"\x00\xff"), 6, None)
+    assert restored.extras["bytes"] == b"\x01\x02"
+    thread = restored.extras["nested"][1][0]
+    assert thread_state([thread]) == thread_state(
+        [pyembroidery.EmbThread(0x123456)])
+
+
+def test_unsupported_extras_are_not_cached(tmp_path):
+    pattern = make_design()
+    pattern.extras["object"] = object()
+    cache = PatternCache(str(tmp_path))
+    assert not cache.put("key", pattern)
+    assert cache.get("key") is None
+
+
+class Planted(object):
+    def __reduce__(self):
+        return (os.remove, ("never-removed",))
+
+
+def test_planted_pickle_is_rejected(tmp_path):
+    cache = PatternCache(str(tmp_path))
+    with open(os.path.join(str(tmp_path), "key.pghc"), "wb") as f:
+        f.write(pickle.dumps(Planted()))
+    assert cache.get("key") is None
+    assert cache.misses == 1
+
+
+def test_planted_metadata_is_rejected():
+    # a class outside of pyembroidery, the entry keeps its length
+    name = b"pyembroidery.EmbThread.EmbThread"
+    data = dump_pattern(make_design())
+    assert name in data
+    data = data.replace(name, b"builtins.object".ljust(len(name)))
+    with pytest.raises(ValueError):
+        load_pattern(data)
+
+
+def test_user_cache_directory():
+    directory = user_cache_directory("patterns")
+    assert os.path.basename(directory) == "patterns"
+    assert not directory.startswith(tempfile.gettempdir())
+
+
+def test_large_commands(tmp_path):
+    pattern = make_design()
+    # needle and order bits of a thread change reach above 2^31
+    command = pyembroidery.encode_thread_change(pyembroidery.NEEDLE_SET,
+                                                200, 15, 200)
+    assert command >= 1 << 31
+    pattern.stitches.insert(0, [0, 0, command])
+    pattern.stitches.insert(0, [0, 0, 1 << 40])
+    cache = PatternCache(str(tmp_path))
+    assert cache.put("key", pattern)
+    assert cache.get("key").stitches == pattern.stitches
+
+
+def test_put_never_raises(tmp_path):
+    pattern = make_design()
+    pattern.stitches.append([0, 0, 1 << 70])
+    cache = PatternCache(str(tmp_path))
+    assert not cache.put("key", pattern)
+    pattern.stitches[-1] = [0, 0, "stitch"]
+    assert not cache.put("key", pattern)
+    assert os.listdir(str(tmp_path)) == []
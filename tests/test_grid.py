@@ -0,0 +1,49 @@
+"""
+Tests of the grid-based fill.
+"""
+
+from pyembroiderygh import GridFrame, Plane, Point3d, PolylineBoundary
+from pyembroiderygh.grid import branch_rows, build_grid
+
+# comb with three teeth, the tops of the teeth at y=10 and the bottoms of
+# the gaps at y=5
+COMB = [(0, 0), (5, 0), (5, 10), (4, 10), (4, 5), (3, 5), (3, 10), (2, 10),
+        (2, 5), (1, 5), (1, 10), (0, 10)]
+
+
+def row_params(boundary, y, x0=-1.0, x1=6.0):
+    params = boundary.intersect_line(Point3d(x0, y, 0), Point3d(x1, y, 0))
+    return [round(x0 + (x1 - x0) * t, 9) for t in params]
+
+
+def test_row_on_horizontal_edges():
+    comb = PolylineBoundary(COMB)
+    assert row_params(comb, 10) == [0, 1, 2, 3, 4, 5]
+    assert row_params(comb, 5) == [0, 5]
+    assert row_params(comb, 0) == [0, 5]
+
+
+def test_row_between_edges():
+    comb = PolylineBoundary(COMB)
+    assert row_params(comb, 7.5) == [0, 1, 2, 3, 4, 5]
+    assert row_params(comb, 2.5) == [0, 5]
+
+
+def test_tangent_vertex():
+    diamond = PolylineBoundary([(0, -5), (5, 0), (0, 5), (-5, 0)])
+    assert row_params(diamond, 5, -6, 6) == [0]
+    assert row_params(diamond, 0, -6, 6) == [-5, 5]
+    assert row_params(diamond, 6, -6, 6) == []
+
+
+def test_branches_stay_inside():
+    comb = PolylineBoundary(COMB)
+    for resolution in ((2, 1), (2, 2), (5, 4), (10, 8)):
+        frame = GridFrame(comb, Plane.WorldXY, *resolution)
+        gridlines, gridparams = build_grid(frame)
+        rows = branch_rows(comb, gridlines, gridparams, 0.01, frame)
+        for gridline, row in zip(gridlines, rows):
+            for branch in row:
+                for t0, t1 in zip(branch, branch[1:]):
+                    mid = gridline.PointAt((t0 + t1) / 2)
+                    assert comb.contains(mid, 0.01), (mid.X, mid.Y)
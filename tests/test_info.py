@@ -0,0 +1,49 @@
+"""
+Tests of the metadata-only reader.
+"""
+
+import pyembroidery
+import pytest
+
+from pyembroiderygh import colorblock_ranges, read_info
+
+
+def make_design():
+    pattern = pyembroidery.EmbPattern()
+    for b, color in enumerate((0xff0000, 0x00ff00, 0x0000ff)):
+        pattern.add_thread(pyembroidery.EmbThread(color))
+        for i in range(40):
+            x = 100 + b * 30 + i * 5
+            pattern.add_stitch_absolute(pyembroidery.STITCH, x,
+                                        50 + (i % 2) * 60)
+        pattern.add_command(pyembroidery.TRIM)
+        pattern.add_command(pyembroidery.COLOR_BREAK)
+    pattern.end()
+    return pattern
+
+
+@pytest.mark.parametrize("extension", ["dst", "pes", "jef", "exp"])
+def test_info_matches_pattern(tmp_path, extension):
+    path = str(tmp_path / ("d." + extension))
+    pyembroidery.write(make_design(), path)
+    pattern = pyembroidery.read(path)
+    info, error = read_info(path)
+    assert error is None
+    assert info.color_count == len(list(colorblock_ranges(pattern)))
+    assert info.extents == pattern.extents()
+    assert len(info.threads) == len(pattern.threadlist)
+
+
+@pytest.mark.parametrize("extension", ["dst", "jef"])
+def test_header_extents_are_not_used(tmp_path, extension):
+    # the design does not contain the origin, DST headers lose the signs of
+    # its extents and JEF headers store them relative to the hoop
+    path = str(tmp_path / ("d." + extension))
+    pyembroidery.write(make_design(), path)
+    info, error = read_info(path)
+    assert error is None
+    pattern = pyembroidery.read(path)
+    assert info.extents == pattern.extents()
+    if extension == "dst":
+        # the stream decoder also drops the jumps of encoded trims
+        assert info.stitch_count == len(pattern.stitches)
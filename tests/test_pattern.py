@@ -0,0 +1,102 @@
+"""
+Tests of the pattern helpers.
+"""
+
+import math
+import random
+
+import pyembroidery
+import pytest
+
+from pyembroiderygh import (Point3d,
+                            decimate_indices,
+                            decimate_polyline,
+                            render_batches,
+                            render_blocks,
+                            stitch_range)
+
+
+def segment_distance(pt, a, b):
+    sx = b.X - a.X
+    sy = b.Y - a.Y
+    px = pt.X - a.X
+    py = pt.Y - a.Y
+    ss = sx * sx + sy * sy
+    t = 0.0 if ss == 0.0 else min(max((px * sx + py * sy) / ss, 0.0), 1.0)
+    return math.hypot(px - t * sx, py - t * sy)
+
+
+def assert_within(pts, tol):
+    kept = decimate_indices(pts, tol)
+    assert kept[0] == 0 and kept[-1] == len(pts) - 1
+    for a, b in zip(kept, kept[1:]):
+        for k in range(a + 1, b):
+            assert segment_distance(pts[k], pts[a], pts[b]) <= tol + 1e-9
+    return kept
+
+
+def polyline(coords):
+    return [Point3d(x, y, 0.0) for x, y in coords]
+
+
+def test_back_and_forth():
+    # a backtrack along the line must not vanish behind its end points
+    pts = polyline([(0, 0), (10, 0), (-10, 0), (5, 0)])
+    assert assert_within(pts, 1.0) == [0, 1, 2, 3]
+
+
+def test_overshoot():
+    pts = polyline([(0, 0), (20, 0.1), (10, 0)])
+    assert assert_within(pts, 1.0) == [0, 1, 2]
+
+
+def test_satin_columns():
+    # satin stitches running back and forth between two rails
+    pts = polyline([(i * 0.4, 5.0 * (i % 2)) for i in range(40)])
+    assert assert_within(pts, 0.5) == list(range(40))
+
+
+def test_collinear_and_short_stitches():
+    pts = polyline([(x * 0.5, 0.0) for x in range(21)])
+    assert assert_within(pts, 0.1) == [0, 20]
+    assert decimate_polyline(pts, 0.1) == [pts[0], pts[-1]]
+
+
+def test_random_error_bound():
+    rnd = random.Random(0)
+    for _ in range(200):
+        pts = polyline([(rnd.uniform(0, 50), rnd.uniform(-2, 2))
+                        for _ in range(60)])
+        assert_within(pts, rnd.choice((0.25, 1.0, 3.0)))
+
+
+def test_circle_is_decimated():
+    pts = polyline([(100 * math.cos(a / 100.0), 100 * math.sin(a / 100.0))
+                    for a in range(629)])
+    assert len(assert_within(pts, 0.5)) < 100
+
+
+def test_render_batches_per_color():
+    # red, blue and red again, the second red block has a trim
+    pattern = pyembroidery.EmbPattern()
+    for b, color in enumerate((0xff0000, 0x0000ff, 0xff0000)):
+        pattern.add_thread(pyembroidery.EmbThread(color))
+        for i in range(5):
+            pattern.add_stitch_absolute(pyembroidery.STITCH, b * 100 + i, 0)
+            if b == 2 and i == 2:
+                pattern.trim()
+        pattern.add_command(pyembroidery.COLOR_BREAK)
+    batches = render_batches(render_blocks(pattern))
+    assert [color for color, _, _, _ in batches] == [(255, 0, 0),
+                                                     (0, 0, 255)]
+    color, polylines, indices, parts = batches[0]
+    assert [len(pts) for pts in polylines] == [5, 4, 2]
+    # the line ranges of the colorblocks within the batch
+    assert [(first, stop) for _, first, stop in parts] == [(0, 4), (4, 8)]
+    assert parts[1][0] == pytest.approx((20.0, 0.0, 20.4, 0.0))
+    starts = [i for idx in indices for i in idx[:-1]]
+    ends = [i for idx in indices for i in idx[1:]]
+    assert starts == sorted(starts)
+    # the stitch range of the second red block picks its lines only
+    first = min(indices[1])
+    assert stitch_range(starts, ends, first, len(pattern.stitches)) == (4, 8)
@@ -0,0 +1,85 @@
+"""
+Tests of the stitch string parsers.
+"""
+
+import random
+
+from pyembroiderygh import (LRUCache,
+                            format_stitch,
+                            parse_stitch_columns,
+                            parse_stitch_string)
+
+TRICKY = ["1,2,3", "+1,2,3", ".5,2,3", "1.,2,3", "-0,2,3", "0,-0,-0",
+          "1e400,2,3", "1E-5,-2.5e+3,+7", "01,2,3", "nan,2,3", "inf,2,3",
+          " 1,2,3", "1,2,3 ", "1_0,2,3", "1,2,3.0", "1,2,1e3", "1,2", "",
+          "1,2,3,4", "1,,2", "null,2,3", "[1],2,3", "1,2,٣",
+          "true,1,2", "-,1,2", "1e,2,3"]
+
+
+def regex_columns(stitches):
+    valid = []
+    invalid = []
+    for i, stitch in enumerate(stitches):
+        parsed = parse_stitch_string(stitch)
+        if parsed is None:
+            invalid.append(i)
+        else:
+            valid.append(parsed)
+    return valid, invalid
+
+
+def signs(values):
+    return [str(v) for v in values]
+
+
+def check(stitches):
+    valid, invalid = regex_columns(stitches)
+    xs, ys, cmds, binvalid = parse_stitch_columns(stitches, cache=None)
+    assert binvalid == invalid
+    assert list(zip(xs, ys, cmds)) == valid
+    # also the signs of zeros have to match
+    assert signs(xs) == signs(v[0] for v in valid)
+    assert signs(ys) == signs(v[1] for v in valid)
+
+
+def test_all_valid():
+    rnd = random.Random(0)
+    check([format_stitch(rnd.uniform(-2000, 2000), rnd.randint(-20, 20),
+                         rnd.choice((0, 1, 2))) for _ in range(1000)])
+
+
+def test_tricky_rows():
+    for stitch in TRICKY:
+        check([stitch])
+        check(["1,2,3", stitch, "4.5,-6,7"])
+    check(TRICKY)
+    check(list(reversed(TRICKY)))
+
+
+def test_misaligned_rows():
+    check(["1,2", "3,4,5,6"])
+    check(["1,2,3,4", "5,6"])
+
+
+def test_cache():
+    cache = LRUCache(4)
+    stitches = ["1.5,2,3", "4,5.5,6"]
+    first = parse_stitch_columns(stitches, cache)
+    first[0].append(99.0)
+    second = parse_stitch_columns(list(stitches), cache)
+    assert cache.hits == 1
+    assert list(second[0]) == [1.5, 4.0]
+    # the separator inside a single row must not hit the two-row entry
+    joined = "\n".join(stitches)
+    assert parse_stitch_columns([joined], cache)[3] == [0]
+    assert cache.hits == 1
+
+
+def test_large_commands():
+    # order bits of a thread change, beyond 2^31 and beyond 2^63
+    stitches = ["1,2,3372220421", "1,2,99999999999",
+                "1,2,99999999999999999999", "4,5,6"]
+    xs, ys, cmds, invalid = parse_stitch_columns(stitches, None)
+    assert list(cmds) == [3372220421, 99999999999, 6]
+    assert list(xs) == [1.0, 1.0, 4.0]
+    assert invalid == [2]
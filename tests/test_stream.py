@@ -0,0 +1,97 @@
+"""
+Tests of the streaming DST decoder against pyembroidery.read().
+"""
+
+import random
+
+import pyembroidery
+import pytest
+
+from pyembroiderygh import iter_dst_chunks, read_buffered
+
+CHUNKSIZES = (1, 7, 64, 65536)
+
+
+def make_design(seed):
+    # stitches, long moves, trims, runs of jumps and color changes
+    rnd = random.Random(seed)
+    pattern = pyembroidery.EmbPattern()
+    x = y = 0
+    for b in range(rnd.randint(1, 4)):
+        pattern.add_thread(pyembroidery.EmbThread(rnd.randint(0, 0xffffff)))
+        for i in range(rnd.randint(20, 200)):
+            r = rnd.random()
+            if r < 0.05:
+                pattern.add_command(pyembroidery.TRIM)
+            elif r < 0.1:
+                x += rnd.randint(-600, 600)
+                y += rnd.randint(-600, 600)
+                pattern.add_stitch_absolute(pyembroidery.JUMP, x, y)
+            elif r < 0.12:
+                # jumps without displacement
+                for _ in range(rnd.randint(1, 4)):
+                    pattern.add_stitch_absolute(pyembroidery.JUMP, x, y)
+            else:
+                x += rnd.randint(-120, 120)
+                y += rnd.randint(-120, 120)
+                pattern.add_stitch_absolute(pyembroidery.STITCH, x, y)
+        pattern.add_command(pyembroidery.COLOR_BREAK)
+    pattern.end()
+    return pattern
+
+
+def stitch_list(stitches):
+    return [[x, y, cmd] for x, y, cmd in stitches]
+
+
+def write_design(tmp_path, seed):
+    path = str(tmp_path / "d{}.dst".format(seed))
+    pyembroidery.write_dst(make_design(seed), path)
+    return path
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("chunksize", CHUNKSIZES)
+def test_chunks_equal_read(tmp_path, seed, chunksize):
+    path = write_design(tmp_path, seed)
+    expected = pyembroidery.read(path).stitches
+    stitches = []
+    for chunk in iter_dst_chunks(path, chunksize):
+        stitches.extend(stitch_list(chunk))
+    assert stitches == expected
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_read_buffered_equals_read(tmp_path, seed):
+    path = write_design(tmp_path, seed)
+    pattern = pyembroidery.read(path)
+    buffered = read_buffered(path, 16)
+    assert stitch_list(buffered.stitches) == pattern.stitches
+    assert [t.color for t in buffered.threadlist] == [
+        t.color for t in pattern.threadlist]
+
+
+@pytest.mark.parametrize("cut", [3, 4, 5])
+def test_truncated_file(tmp_path, cut):
+    # no end record and an incomplete last record
+    path = write_design(tmp_path, 1)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-cut])
+    expected = pyembroidery.read(path).stitches
+    for chunksize in CHUNKSIZES:
+        stitches = []
+        for chunk in iter_dst_chunks(path, chunksize):
+            stitches.extend(stitch_list(chunk))
+        assert stitches == expected
+
+
+def test_columns_equal_stitches(tmp_path):
+    path = write_design(tmp_path, 2)
+    buffered = read_buffered(path)
+    buffered.stitches.append(0, 0, pyembroidery.encode_thread_change(
+        pyembroidery.COLOR_CHANGE, 3, 2, 200))
+    columns = buffered.get_as_columns()
+    expected = list(zip(*buffered.get_as_stitches()))[1:]
+    assert [list(c) for c in columns] == [list(c) for c in expected]
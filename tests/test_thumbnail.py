@@ -0,0 +1,52 @@
+"""
+Tests of the headless thumbnail renderer.
+"""
+
+import os
+
+import pyembroidery
+import pytest
+
+from pyembroiderygh import render_thumbnails, thumbnail_targets
+
+
+def write_design(path):
+    pattern = pyembroidery.EmbPattern()
+    for i in range(20):
+        pattern.add_stitch_absolute(pyembroidery.STITCH, i * 10, (i % 2) * 50)
+    pattern.end()
+    pyembroidery.write(pattern, path)
+
+
+def test_same_stem_different_format(tmp_path):
+    paths = [str(tmp_path / "d0.dst"), str(tmp_path / "d0.pes")]
+    for path in paths:
+        write_design(path)
+    directory = str(tmp_path / "th")
+    results = render_thumbnails(paths, directory, size=32, workers=1)
+    targets = [target for _, target, _ in results]
+    assert all(error is None for _, _, error in results)
+    assert [os.path.basename(t) for t in targets] == ["d0.dst.png",
+                                                      "d0.pes.png"]
+    assert all(os.path.isfile(t) for t in targets)
+
+
+def test_same_name_different_folders(tmp_path):
+    paths = [str(tmp_path / "a" / "d0.dst"), str(tmp_path / "b" / "d0.dst"),
+             str(tmp_path / "a" / "d1.dst")]
+    with pytest.warns(RuntimeWarning):
+        targets = thumbnail_targets(paths, "th")
+    assert len(set(targets)) == 3
+    assert targets[2] == os.path.join("th", "d1.dst.png")
+    # the names do not depend on the order of the paths
+    with pytest.warns(RuntimeWarning):
+        assert thumbnail_targets(paths[::-1], "th") == targets[::-1]
+
+
+def test_missing_directory_is_created(tmp_path):
+    path = str(tmp_path / "d0.dst")
+    write_design(path)
+    directory = str(tmp_path / "missing" / "th")
+    results = render_thumbnails([path], directory, size=32, workers=1)
+    assert results[0][2] is None
+    assert os.path.isfile(results[0][1])
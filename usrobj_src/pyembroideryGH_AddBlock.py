@@ -5,8 +5,9 @@ pyembroidery.EmbPattern instance
         Pattern: The pattern to be modified as
                  pyembroidery.EmbPattern instance.
                  {item, EmbPattern}
-        Stitches: The block(s) of stitches to add to the pattern. If a
-                  tree is supplied, each branch will be treated as one block.
+        Stitches: The block(s) of stitches to add to the pattern, as
+                  StitchBuffer or Stitch-Strings. If a tree is supplied,
+                  each branch will be treated as one block.
                   {list, str}
         Thread: The threads for the pattern, corresponding to
                 the blocks of stitches. This is optional, If no thread is
@@ -19,12 +20,11 @@ pyembroidery.EmbPattern instance
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201104
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
 from __future__ import division
-import re
 
 # GHPYTHON SDK IMPORTS
 from ghpythonlib.componentbase import executingcomponent as component
@@ -48,6 +48,14 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import add_block, coerce_stitches
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class AddBlock(component):
 
     def RunScript(self, input_pattern, Stitches, Thread):
@@ -63,24 +71,14 @@ class AddBlock(component):
             else:
                 # copy input pattern to avoid changing the original
                 Pattern = input_pattern.copy()
-                # regex pattern for matching stitch strings
-                regex = re.compile(r'^([+-]?(\d+([.]\d*)?([eE][+-]?\d+)?|[.]\d+([eE][+-]?\d+)?)[,]){2}[-+]?[0-9]+$')
                 # check and extract stitches, compile valid_stitches
-                valid_stitches = []
-                for i, stitch in enumerate(Stitches):
-                    if bool(regex.match(stitch)):
-                        # convert the stitch
-                        stitch = stitch.split(",")
-                        stitch = (float(stitch[0]),
-                                  float(stitch[1]),
-                                  int(stitch[2]))
-                        valid_stitches.append(stitch)
-                    else:
-                        rml = self.RuntimeMessageLevel.Warning
-                        errMsg = ("{}. stitch at index {} is not a " +
-                                  "valid stitch string! Skipping this stitch!")
-                        errMsg = errMsg.format(i, self.RunCount)
-                        self.AddRuntimeMessage(rml, errMsg)
+                valid_stitches, invalid = coerce_stitches(Stitches)
+                for i in invalid:
+                    rml = self.RuntimeMessageLevel.Warning
+                    errMsg = ("{}. stitch at index {} is not a " +
+                              "valid stitch string! Skipping this stitch!")
+                    errMsg = errMsg.format(i, self.RunCount)
+                    self.AddRuntimeMessage(rml, errMsg)
                 if Thread != None:
                     if not isinstance(Thread, pyembroidery.EmbThread):
                         raise TypeError("The supplied thread is not a valid " +
@@ -92,7 +90,7 @@ class AddBlock(component):
                     errMsg = errMsg.format(self.RunCount)
                     self.AddRuntimeMessage(rml, errMsg)
                 # add the block and thread to the pattern
-                Pattern.add_block(valid_stitches, Thread)
+                add_block(Pattern, valid_stitches, Thread)
         else:
             rml = self.RuntimeMessageLevel.Warning
             if not Stitches:
@@ -13,7 +13,7 @@ pyembroidery.EmbPattern instance
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201030
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
@@ -41,53 +41,6 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
-class StitchBlock(object):
-    
-    def __init__(self, stitches, thread):
-        self._set_stitches(stitches)
-        self._set_thread(thread)
-    
-    def __getitem__(self, item):
-        return (self.stitches, self.thread)[item]
-    
-    def get_stitches_iter(self):
-        for s in self._stitches:
-            yield s
-    
-    def _get_stitches(self):
-        return self._stitches
-    
-    def _set_stitches(self, stitches):
-        if isinstance(stitches, list):
-            self._stitches = stitches
-        elif isinstance(stitches, tuple):
-            self._stitches = list(stitches)
-        else:
-            raise ValueError("Supplied data for stitches is not a valid list " +
-                             "of stitches!")
-    
-    stitches = property(_get_stitches, _set_stitches, None,
-                        "The stitches of this StitchBlock")
-    
-    def _get_thread(self):
-        return self._thread
-    
-    def _set_thread(self, thread):
-        if isinstance(thread, pyembroidery.EmbThread):
-            self._thread = thread
-        else:
-            raise ValueError("Supplied thread is not a valid EmbThread " + 
-                             "instance!")
-    
-    thread = property(_get_thread, _set_thread, None,
-                      "The thread of this StitchBlock")
-    
-    def ToString(self):
-        descr = "StitchBlock ({} Stitches, EmbThread {})"
-        color = self.thread.hex_color()
-        descr = descr.format(len(self.stitches), color)
-        return descr
-
 class AddStitchBlock(component):
 
     def RunScript(self, pattern_in, stitchblock):
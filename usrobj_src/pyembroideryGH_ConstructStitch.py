@@ -1,18 +1,23 @@
 """
-Constructs a Stitch-String in the format (PtX, PtY, Cmd) by pairing each input
-coordinate with an input command.
+Constructs stitches by pairing each input coordinate with an input command.
+The stitches are output as Stitch-Strings in the format (PtX, PtY, Cmd), or
+optionally as a compact StitchBuffer.
     Inputs:
         Pt: The input coordinate (point) for the stitch.
             {list, point3d}
         Cmd: The corresponding command integer for each point coordinate.
              {list, int}
+        AsBuffer: If True, output the stitches as a single StitchBuffer
+                  instead of Stitch-Strings. Both use pyembroidery units
+                  (1/10 mm, y axis pointing down). Defaults to False.
+                  {item, bool}
     Output:
-        Stitch: The constructed stitch as String.
-                {item/list/tree, str}
+        Stitch: The constructed stitches as Strings or StitchBuffer.
+                {item/list/tree, str/StitchBuffer}
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201022
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
@@ -31,44 +36,28 @@ ghenv.Component.NickName = "CS"
 ghenv.Component.Category = "pyembroideryGH"
 ghenv.Component.SubCategory = "3 Pattern Creation"
 
+# LOCAL MODULE IMPORTS
+try:
+    from pyembroiderygh import StitchBuffer, points_to_stitches
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class ConstructStitch(component):
 
-    def RunScript(self, Pt, Cmd):
+    def RunScript(self, Pt, Cmd, AsBuffer):
         # initialize ouputs
         Stitches = []
         
         # only act if there is some data to begin with
         if Pt and Cmd:
-            # list of points is longer or equal to list of commands, so we
-            # loop over the list of points
-            if len(Pt) >= len(Cmd):
-                for i, pt in enumerate(Pt):
-                    # extract command with failsafe
-                    if i <= len(Cmd) - 1:
-                        command = Cmd[i]
-                    else:
-                        command = Cmd[-1]
-                    # compile stitch string
-                    stitch_str = ",".join([str(pt.X * 10), 
-                                           str(pt.Y * -10),
-                                           str(command)])
-                    # append to list of stitches
-                    Stitches.append(stitch_str)
-            # list of commands is longer than list of points, so we have to
-            # loop over the list of commands
-            elif len(Pt) < len(Cmd):
-                for j, command in enumerate(Cmd):
-                    # extract coordinate with failsafe
-                    if j <= len(Pt) - 1:
-                        pt = Pt[j]
-                    else:
-                        pt = Pt[-1]
-                    # compile stitch string
-                    stitch_str = ",".join([str(pt.X * 10),
-                                           str(pt.Y * -10),
-                                           str(command)])
-                    # append to list of stitches
-                    Stitches.append(stitch_str)
+            # pair points and commands using longest list matching
+            if AsBuffer:
+                Stitches = StitchBuffer.from_points(Pt, Cmd)
+            else:
+                Stitches = points_to_stitches(Pt, Cmd)[1]
         else:
             rml = self.RuntimeMessageLevel.Warning
             if not Pt:
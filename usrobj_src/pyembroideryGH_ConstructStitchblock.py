@@ -1,7 +1,8 @@
 """
 Compile a StitchBlock from a list of stitches and a thread.
     Inputs:
-        Stitches: The stitches to compile into a stitchblock.
+        Stitches: The stitches to compile into a stitchblock, as StitchBuffer
+                  or Stitch-Strings.
                   {list, stitch}
         Thread: The thread to be attached to the stitchblock.
                 {item, EmbThread}
@@ -12,12 +13,11 @@ Compile a StitchBlock from a list of stitches and a thread.
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201030
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
 from __future__ import division
-import re
 
 # GHPYTHON SDK IMPORTS
 from ghpythonlib.componentbase import executingcomponent as component
@@ -42,75 +42,27 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
-class StitchBlock(object):
-    
-    def __init__(self, stitches, thread):
-        self._set_stitches(stitches)
-        self._set_thread(thread)
-    
-    def __getitem__(self, item):
-        return (self.stitches, self.thread)[item]
-    
-    def get_stitches_iter(self):
-        for s in self._stitches:
-            yield s
-    
-    def _get_stitches(self):
-        return self._stitches
-    
-    def _set_stitches(self, stitches):
-        if isinstance(stitches, list):
-            self._stitches = stitches
-        elif isinstance(stitches, tuple):
-            self._stitches = list(stitches)
-        else:
-            raise ValueError("Supplied data for stitches is not a valid list " +
-                             "of stitches!")
-    
-    stitches = property(_get_stitches, _set_stitches, None,
-                        "The stitches of this StitchBlock")
-    
-    def _get_thread(self):
-        return self._thread
-    
-    def _set_thread(self, thread):
-        if isinstance(thread, pyembroidery.EmbThread):
-            self._thread = thread
-        else:
-            raise ValueError("Supplied thread is not a valid EmbThread " + 
-                             "instance!")
-    
-    thread = property(_get_thread, _set_thread, None,
-                      "The thread of this StitchBlock")
-    
-    def ToString(self):
-        descr = "StitchBlock ({} Stitches, EmbThread {})"
-        color = self.thread.hex_color()
-        descr = descr.format(len(self.stitches), color)
-        return descr
+try:
+    from pyembroiderygh import StitchBlock, coerce_stitches
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
 
 class ConstructStitchBlock(component):
     
     def RunScript(self, Stitches, Thread):
         
         if Stitches and Thread:
-            # regex pattern for matching stitch strings
-            regex = re.compile(r'^([+-]?(\d+([.]\d*)?([eE][+-]?\d+)?|[.]\d+([eE][+-]?\d+)?)[,]){2}[-+]?[0-9]+$')
-            
             # check and extract stitches, compile valid_stitches
-            valid_stitches = []
-            for i, stitch in enumerate(Stitches):
-                if bool(regex.match(stitch)):
-                    # convert the stitch
-                    stitch = stitch.split(",")
-                    stitch = (float(stitch[0]), float(stitch[1]), int(stitch[2]))
-                    valid_stitches.append(stitch)
-                else:
-                    rml = self.RuntimeMessageLevel.Warning
-                    errMsg = ("{}. stitch at index {} is not a " +
-                              "valid stitch string! Skipping this stitch!")
-                    errMsg = errMsg.format(i, self.RunCount)
-                    self.AddRuntimeMessage(rml, errMsg)
+            valid_stitches, invalid = coerce_stitches(Stitches)
+            for i in invalid:
+                rml = self.RuntimeMessageLevel.Warning
+                errMsg = ("{}. stitch at index {} is not a " +
+                          "valid stitch string! Skipping this stitch!")
+                errMsg = errMsg.format(i, self.RunCount)
+                self.AddRuntimeMessage(rml, errMsg)
             
             # create stitchblock
             try:
@@ -118,7 +70,7 @@ class ConstructStitchBlock(component):
             except Exception, e:
                 rml = self.RuntimeMessageLevel.Warning
                 errMsg = "Could not create StitchBlock at index {}!"
-                errMsg = " ".join([errMsg, e]).format(self.RunCount)
+                errMsg = " ".join([errMsg, str(e)]).format(self.RunCount)
                 self.AddRuntimeMessage(rml, errMsg)
                 sblock = None
         else:
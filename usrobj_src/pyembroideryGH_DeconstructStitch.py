@@ -1,8 +1,13 @@
 """
-Deconstructs a stitch-string into its component parts, which are x and y
-coordinates as well as an integer identifying the command.
+Deconstructs a stitch-string or a StitchBuffer into its component parts,
+which are x and y coordinates as well as an integer identifying the command.
+The coordinates are output as they are stored: StitchBuffers and views
+always hold pyembroidery units (1/10 mm, y axis pointing down), the
+Stitch-Strings of PatternColorBlocks and PatternStitchBlocks use Rhino
+units.
     Inputs:
-        Stitch: The stitch to deconstruct, formatted as string
+        Stitch: The stitch to deconstruct, formatted as string or a
+                StitchBuffer holding many stitches.
                 {tree, str}
     Output:
         X: The X-Coordinate of the stitch as float.
@@ -14,12 +19,11 @@ coordinates as well as an integer identifying the command.
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201022
+        Version: 261018
 """
 
 # GHPYTHON SDK IMPORTS
 from __future__ import division
-import re
 
 # GHPYTHON SDK IMPORTS
 from ghpythonlib.componentbase import executingcomponent as component
@@ -43,6 +47,16 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import (is_stitch_container,
+                                parse_stitch_columns,
+                                parse_stitch_string)
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class DeconstructStitch(component):
 
     def RunScript(self, StitchTree):
@@ -51,24 +65,46 @@ class DeconstructStitch(component):
         Y = Grasshopper.DataTree[object]()
         Cmd = Grasshopper.DataTree[object]()
         
-        # regex pattern for matching stitch strings
-        regex = re.compile(r'^([+-]?(\d+([.]\d*)?([eE][+-]?\d+)?|[.]\d+([eE][+-]?\d+)?)[,]){2}[-+]?[0-9]+$')
-        
         # only do something if there is an incoming stitch-string to begin with
         if StitchTree != None:
             # loop through all branches of the tree
             for i, branch in enumerate(StitchTree.Branches):
                 branch_path = StitchTree.Path(i)
                 
+                # branches of stitch strings are parsed in one batch
+                if not any(is_stitch_container(s) for s in branch):
+                    xs, ys, cmds, invalid = parse_stitch_columns(branch)
+                    if invalid:
+                        xs, ys, cmds = list(xs), list(ys), list(cmds)
+                    for j in invalid:
+                        rml = self.RuntimeMessageLevel.Warning
+                        errMsg = ("Item at branch {}, index {} is not a " +
+                                  "valid stitch string! A Null item will " +
+                                  "be inserted into the output tree!")
+                        errMsg = errMsg.format(i, j)
+                        self.AddRuntimeMessage(rml, errMsg)
+                        xs.insert(j, None)
+                        ys.insert(j, None)
+                        cmds.insert(j, None)
+                    X.AddRange(xs, branch_path)
+                    Y.AddRange(ys, branch_path)
+                    Cmd.AddRange(cmds, branch_path)
+                    continue
+                
                 # loop through all items in the current branch
                 for j, stitch_string in enumerate(branch):
-                    if bool(regex.match(stitch_string)):
-                        # split the string in its components
-                        parts = stitch_string.split(',')
+                    # stitchbuffers and views are added column by column
+                    if is_stitch_container(stitch_string):
+                        X.AddRange(stitch_string.xs, branch_path)
+                        Y.AddRange(stitch_string.ys, branch_path)
+                        Cmd.AddRange(stitch_string.cmds, branch_path)
+                        continue
+                    parts = parse_stitch_string(stitch_string)
+                    if parts is not None:
                         # add each component to its respective output tree
-                        X.Add(float(parts[0]), branch_path)
-                        Y.Add(float(parts[1]), branch_path)
-                        Cmd.Add(int(parts[2]), branch_path)
+                        X.Add(parts[0], branch_path)
+                        Y.Add(parts[1], branch_path)
+                        Cmd.Add(parts[2], branch_path)
                     else:
                         rml = self.RuntimeMessageLevel.Warning
                         errMsg = ("Item at branch {}, index {} is not a " +
@@ -79,7 +115,6 @@ class DeconstructStitch(component):
                         X.Add(None, branch_path)
                         Y.Add(None, branch_path)
                         Cmd.Add(None, branch_path)
-                        continue
         
         # return outputs if you have them; here I try it for you:
         return X, Y, Cmd
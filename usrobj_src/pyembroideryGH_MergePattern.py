@@ -15,7 +15,7 @@ Any prepended thread change command to the merging pattern is suppressed.
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201030
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
@@ -43,6 +43,14 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import merge_patterns
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class MergePattern(component):
 
     def RunScript(self, Patterns):
@@ -50,22 +58,16 @@ class MergePattern(component):
         MergedPattern = Grasshopper.DataTree[object]()
         
         if Patterns:
-            for i, pat in enumerate(Patterns):
-                # check input data correctness
-                if isinstance(pat, pyembroidery.EmbPattern):
-                    # copy first pattern to the merged pattern
-                    if i == 0:
-                        MergedPattern = pat.copy()
-                    else:
-                        MergedPattern = MergedPattern + pat
-                else:
-                    rml = self.RuntimeMessageLevel.Warning
-                    errMsg = ("Supplied pattern at branch {0}, index {1} is no "
-                              "valid instance of pyembroidery.EmbPattern! It was "
-                              "skipped during the merge!")
-                    errMsg = errMsg.format(self.RunCount, i)
-                    self.AddRuntimeMessage(rml, errMsg)
-                    continue
+            merged, skipped = merge_patterns(Patterns)
+            if merged is not None:
+                MergedPattern = merged
+            for i in skipped:
+                rml = self.RuntimeMessageLevel.Warning
+                errMsg = ("Supplied pattern at branch {0}, index {1} is no "
+                          "valid instance of pyembroidery.EmbPattern! It was "
+                          "skipped during the merge!")
+                errMsg = errMsg.format(self.RunCount, i)
+                self.AddRuntimeMessage(rml, errMsg)
         else:
             rml = self.RuntimeMessageLevel.Warning
             errMsg = ("Input Pattern failed to collect data!")
@@ -4,6 +4,10 @@ colorblocks. The pattern has to be supplied as an instance of
 pyembroidery.EmbPattern.
     Inputs:
         Pattern: Pattern as pyembroidery.EmbPattern instance
+        AsBuffer: If True, output one StitchView per block instead of
+        Stitch-Strings in Rhino units. The view references the stitches of
+        the pattern without copying them and keeps pyembroidery units
+        (1/10 mm, y axis pointing down). Defaults to False.
     Output:
         Stitch: The stitch(es) formatted as colorblocks
         Thread: The thread, corresponding to the colorblock
@@ -11,7 +15,7 @@ pyembroidery.EmbPattern.
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201030
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
@@ -39,9 +43,17 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import pattern_colorblocks
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class PatternColorBlocks(component):
     
-    def RunScript(self, PatternTree):
+    def RunScript(self, PatternTree, AsBuffer):
         # initialize outputs
         Stitch = Grasshopper.DataTree[object]()
         Thread = Grasshopper.DataTree[object]()
@@ -74,21 +86,10 @@ class PatternColorBlocks(component):
                         continue
                     
                     # get the colorblocks of the pattern
-                    stitchblock = zip(*list(pattern.get_as_colorblocks()))
-                    blocks = stitchblock[0]
-                    threads = stitchblock[1]
+                    blocks, threads = pattern_colorblocks(pattern)
                     
                     # loop through all of the blocks of stitches
-                    for u, block in enumerate(blocks):
-                        stitches = list(block)
-                        for k, stitch in enumerate(stitches):
-                            stitch = [stitch[0] * 0.1,
-                                      stitch[1] * -0.1,
-                                      stitch[2]]
-                            stitch = [str(s) for s in stitch]
-                            stitch = ",".join(stitch)
-                            stitches[k] = stitch
-                        
+                    for u, stitches in enumerate(blocks):
                         # create the new tree path by modding the original path
                         path = list(branch_path)
                         path.append(j)
@@ -96,7 +97,10 @@ class PatternColorBlocks(component):
                         path = Grasshopper.Kernel.Data.GH_Path(*path)
                         
                         # add all the stitches to the output tree
-                        Stitch.AddRange(stitches, path)
+                        if AsBuffer:
+                            Stitch.Add(stitches, path)
+                        else:
+                            Stitch.AddRange(stitches.to_strings(True), path)
                     
                     # loop through all of the threads
                     for u, thread in enumerate(threads):
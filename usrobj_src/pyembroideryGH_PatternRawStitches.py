@@ -1,8 +1,9 @@
 """
 Get all the raw stitches of a pattern. The pattern has to be supplied
-as an instance of pyembroidery.EmbPattern.
+as an instance of pyembroidery.EmbPattern or as a BufferedPattern.
     Inputs:
-        Pattern: Pattern as pyembroidery EmbPattern instance
+        Pattern: Pattern as pyembroidery EmbPattern or BufferedPattern
+                 instance
     Output:
         X: The X-Coordinate of the stitch
         Y: The Y-Coordinate of the stitch
@@ -13,7 +14,7 @@ as an instance of pyembroidery.EmbPattern.
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201030
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
@@ -41,6 +42,14 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import BufferedPattern
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class PatternRawStitches(component):
 
     def RunScript(self, Pattern):
@@ -55,23 +64,28 @@ class PatternRawStitches(component):
         # only do something if there is an input to begin with
         if Pattern != None:
             # make sure supplied pattern is really a valid pattern
-            if not isinstance(Pattern, pyembroidery.EmbPattern):
+            if not isinstance(Pattern, (pyembroidery.EmbPattern,
+                                        BufferedPattern)):
                 rml = self.RuntimeMessageLevel.Error
                 errMsg = ("The supplied pattern is not a valid" +
-                          "pyembroidery.EmbPattern instance!")
+                          "pyembroidery.EmbPattern or BufferedPattern " +
+                          "instance!")
                 self.AddRuntimeMessage(rml, errMsg)
                 return (X, Y, Cmd, Thread, Needle, Order)
             
-            # Get the stitches of the pattern
-            stitches = zip(*list(Pattern.get_as_stitches()))
+            # Get the stitches of the pattern, the columns of a
+            # BufferedPattern are read directly so its stitches are never
+            # materialized as a list of tuples
+            if isinstance(Pattern, BufferedPattern):
+                xs, ys, Cmd, Thread, Needle, Order = Pattern.get_as_columns()
+            else:
+                stitches = zip(*list(Pattern.get_as_stitches()))
+                xs, ys = stitches[1], stitches[2]
+                Cmd, Thread, Needle, Order = stitches[3:7]
             
             # collect the relevant data and assign it to the outputs
-            X = tuple([s * 0.1 for s in stitches[1]])
-            Y = tuple([s * -0.1 for s in stitches[2]])
-            Cmd = stitches[3]
-            Thread = stitches[4]
-            Needle = stitches[5]
-            Order = stitches[6]
+            X = tuple([s * 0.1 for s in xs])
+            Y = tuple([s * -0.1 for s in ys])
         else:
             rml = self.RuntimeMessageLevel.Warning
             errMsg = ("Input Pattern failed to collect data!")
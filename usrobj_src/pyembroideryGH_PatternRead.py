@@ -1,21 +1,46 @@
 """
 Reads any readable embroidery format and returns the
-pattern as an instance of pyembroidery.EmbPattern
+pattern as an instance of pyembroidery.EmbPattern.
+A whole list or tree of files is read as one batch, the files are decoded
+in parallel on a pool of workers.
+Decoded patterns are kept in a persistent cache on disk, unchanged files are
+loaded from there instead of being decoded again, also in later sessions.
     Inputs:
-        FilePath: Filepath of the embroidery pattern file.
-                  {item, path}
+        FilePath: Filepaths of the embroidery pattern files.
+                  {tree, path}
+        Workers: Number of workers used to read the files in parallel. 0
+                 uses one worker per processor core, 1 reads the files one
+                 after another. Defaults to 0.
+                 {item, int}
+        MetadataOnly: If True, only the stitch count, extents, color count,
+                      threads and metadata of the files are read and output
+                      as PatternInfo instead of decoding the patterns. The
+                      stitches are only counted while streaming through the
+                      files, much faster for indexing design libraries.
+                      Defaults to False.
+                      {item, bool}
+        Buffered: If True, the stitches are decoded into compact arrays and
+                  output as BufferedPattern instead of EmbPattern. DST files
+                  are streamed from a memory-mapped file, which keeps the
+                  memory low for very large files. BufferedPatterns can be
+                  supplied to RenderPattern and PatternRawStitches directly.
+                  Defaults to False.
+                  {item, bool}
     Output:
-        Pattern: The embroidery pattern as pyembroidery.EmbPattern instance.
-                 {item/list/tree, EmbPattern}
+        Pattern: The embroidery patterns as pyembroidery.EmbPattern
+                 instances (or PatternInfo in MetadataOnly mode,
+                 BufferedPattern in Buffered mode), in the same tree
+                 structure as FilePath. Files that could not be
+                 read result in Null items.
+                 {tree, EmbPattern}
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 201030
+        Version: 261018
 """
 
 # PYTHON STANDARD LIBRARY IMPORTS
 from __future__ import division
-from os import path
 
 # GHPYTHON SDK IMPORTS
 from ghpythonlib.componentbase import executingcomponent as component
@@ -39,22 +64,66 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import PATTERN_CACHE
+    from pyembroiderygh import read_buffered_patterns
+    from pyembroiderygh import read_infos
+    from pyembroiderygh import read_patterns
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class PatternRead(component):
 
-    def RunScript(self, FilePath):
+    def RunScript(self, FilePath, Workers, MetadataOnly, Buffered):
         # Initialize output
         Pattern = Grasshopper.DataTree[object]()
         
         # only do something if input is defined
-        if FilePath != None:
-            try:
-                Pattern = pyembroidery.read(path.normpath(
-                                                    FilePath.strip("\n\r")))
-            except Exception as e:
-                rml = self.RuntimeMessageLevel.Error
-                errMsg = ("Could not read embroidery file!" +
-                          "Please check if format is readable.")
-                self.AddRuntimeMessage(rml, errMsg)
+        if FilePath != None and FilePath.DataCount:
+            if Workers is None:
+                Workers = 0
+            
+            # collect all paths of the tree with their location
+            jobs = []
+            for i, branch in enumerate(FilePath.Branches):
+                branch_path = FilePath.Path(i)
+                for j, filepath in enumerate(branch):
+                    jobs.append((branch_path, j, filepath))
+            
+            # read all files as one batch, the results are in input order
+            filepaths = [fp for _, _, fp in jobs if fp is not None]
+            if MetadataOnly:
+                results = read_infos(filepaths, Workers)
+            elif Buffered:
+                results = read_buffered_patterns(filepaths, Workers)
+            else:
+                hits, misses = PATTERN_CACHE.hits, PATTERN_CACHE.misses
+                results = read_patterns(filepaths,
+                                        Workers,
+                                        cache=PATTERN_CACHE)
+                rml = self.RuntimeMessageLevel.Remark
+                msg = "Pattern cache: {} hits, {} misses"
+                msg = msg.format(PATTERN_CACHE.hits - hits,
+                                 PATTERN_CACHE.misses - misses)
+                self.AddRuntimeMessage(rml, msg)
+            results = iter(results)
+            
+            # fill the output tree and report all files that failed
+            for branch_path, j, filepath in jobs:
+                if filepath is None:
+                    Pattern.Add(None, branch_path)
+                    continue
+                pattern, error = next(results)
+                if error:
+                    rml = self.RuntimeMessageLevel.Error
+                    errMsg = (error + " File at branch {}, index {}: " +
+                              "'{}'")
+                    errMsg = errMsg.format(branch_path, j, filepath)
+                    self.AddRuntimeMessage(rml, errMsg)
+                Pattern.Add(pattern, branch_path)
         else:
             rml = self.RuntimeMessageLevel.Warning
             errMsg = ("Input FilePath failed to collect data!")
@@ -1,16 +1,32 @@
 """
-Render an embroidery pattern to the Rhino viewport.
+Render an embroidery pattern to the Rhino viewport. The preview geometry is
+prepared once per solution, batched per thread color and drawn with one
+draw call per color. The bounding box of the pattern is collected in the
+same pass and used as clipping box. Colors outside of the view are
+skipped while drawing, if a color is only partly visible, only its visible
+colorblocks are drawn.
+Very large patterns are previewed at a level of detail matching the zoom of
+the viewport: decimated polylines are prepared for several tolerances and
+the coarsest level whose tolerance stays below the size of one pixel is
+drawn. Full detail is only drawn when zoomed in.
+The geometry is cached as long as the same pattern is supplied, so moving
+a slider connected to Start or End only changes which stitches are drawn.
     Inputs:
         Pattern: The embroidery patter to render.
                  {item, EmbPattern}
+        Start: Index of the first stitch to draw. Defaults to the first
+               stitch of the pattern.
+               {item, int}
+        End: Index of the last stitch to draw. Defaults to the last stitch
+             of the pattern.
+             {item, int}
     Remarks:
         Author: Max Eschenbach
         License: MIT License
-        Version: 211129
+        Version: 261018
 """
 # PYTHON STANDARD LIBRARY IMPORTS
 from __future__ import division
-from collections import deque
 
 # GHPYTHON SDK IMPORTS
 from ghpythonlib.componentbase import executingcomponent as component
@@ -34,86 +50,154 @@ except ImportError:
               "path, see README for instructions!.")
     raise ImportError(errMsg)
 
+try:
+    from pyembroiderygh import LOD_TOLERANCES
+    from pyembroiderygh import render_batches
+    from pyembroiderygh import render_levels
+    from pyembroiderygh import select_level
+    from pyembroiderygh import stitch_range
+except ImportError:
+    errMsg = ("The pyembroiderygh core module seems to be not correctly " +
+              "installed! Please make sure the module is in you search " +
+              "path, see README for instructions!.")
+    raise ImportError(errMsg)
+
 class RenderPattern(component):
     
     def __init__(self):
         super(RenderPattern, self).__init__()
-        self.drawing_curves = []
+        self.drawing_levels = []
+        self.clipping_box = Rhino.Geometry.BoundingBox.Empty
+        self.lod_center = Rhino.Geometry.Point3d.Origin
+        self.pattern = None
+        self.stitch_count = 0
+        self.stitch_range = None
     
     def get_ClippingBox(self):
-        return Rhino.Geometry.BoundingBox()
+        return self.clipping_box
     
     def DrawViewportWires(self, args):
         try:
             # get display from args
             display = args.Display
             
-            # draw all catalogued curves
-            for crv in self.drawing_curves:
-                display.DrawCurve(crv[0].ToNurbsCurve(), crv[1], 2)
+            if not self.drawing_levels:
+                return
+            
+            # size of one pixel in model units at the pattern
+            viewport = args.Viewport
+            success, scale = viewport.GetWorldToScreenScale(self.lod_center)
+            if success and scale > 0:
+                level = select_level(LOD_TOLERANCES, 1.0 / scale)
+            else:
+                level = 0
+            
+            # draw all prepared lines of the level, one call per color,
+            # skipping colors outside of the view
+            drawing_batches = self.drawing_levels[level]
+            for lines, color, bbox, starts, ends, parts in drawing_batches:
+                if not viewport.IsVisible(bbox):
+                    continue
+                if self.stitch_range is None:
+                    first, stop = 0, lines.Length
+                else:
+                    # only draw the lines within the stitch range
+                    first, stop = stitch_range(starts, ends,
+                                               *self.stitch_range)
+                if stop <= first:
+                    continue
+                visible = [viewport.IsVisible(box) for box, a, b in parts]
+                if all(visible):
+                    self.draw_lines(display, lines, first, stop, color)
+                    continue
+                # only draw the visible colorblocks of the color
+                for (box, a, b), isvisible in zip(parts, visible):
+                    if isvisible and min(b, stop) > max(a, first):
+                        self.draw_lines(display, lines, max(a, first),
+                                        min(b, stop), color)
         
         except Exception, e:
             System.Windows.Forms.MessageBox.Show(str(e),
                                                  "Error while drawing preview!")
     
-    def RunScript(self, Pattern):
+    def draw_lines(self, display, lines, first, stop, color):
+        # draw a range of the prepared lines, as a view into the array
+        if first == 0 and stop == lines.Length:
+            display.DrawLines(lines, color, 2)
+        else:
+            segment = System.ArraySegment[Rhino.Geometry.Line](
+                                                lines, first, stop - first)
+            display.DrawLines(segment, color, 2)
+    
+    def RunScript(self, Pattern, Start, End):
         
         # INITIALIZATION ------------------------------------------------------
         
         if Pattern:
-            # split the pattern into colorblocks
-            PCB = list(Pattern.get_as_colorblocks())
-            
-            simulation_pts = []
-            simulation_curves = []
+            # the prepared geometry is reused as long as the pattern does not
+            # change, only the drawn stitch range is updated
+            stitch_count = len(Pattern.stitches)
+            if (Pattern is not self.pattern or
+                    stitch_count != self.stitch_count):
+                self.prepare_geometry(Pattern)
+                self.pattern = Pattern
+                self.stitch_count = stitch_count
             
-            # loop through all colorblocks
-            for i, cb in enumerate(PCB):
-                """
-                if i > 0:
-                    break
-                """
-                stitches = cb[0]
-                thread = cb[1]
-                color = System.Drawing.Color.FromArgb(thread.get_red(),
-                                                      thread.get_green(),
-                                                      thread.get_blue())
-                
-                # loop over all stitches in the colorblock
-                simcrv = Rhino.Geometry.Polyline()
-                for j, stitch in enumerate(stitches):
-                    pt = Rhino.Geometry.Point3d(stitch[0] * 0.1, stitch[1] * -0.1, 0)
-                    cmd = stitch[2]
-                    
-                    """
-                    if cmd != 0:
-                        print cmd
-                    """
-                    
-                    # if no command, continue
-                    if cmd == -1:
-                        continue
-                    # add point and end curve on trim command
-                    if cmd == 2:
-                        # trim at this coordinate and begin a new curve
-                        simcrv.Add(pt)
-                        simulation_curves.append((simcrv, color))
-                        simcrv = Rhino.Geometry.Polyline()
-                    # end curve on color break command
-                    elif cmd == 226:
-                        continue
-                        simulation_curves.append((simcrv, color))
-                        simcrv = Rhino.Geometry.Polyline()
-                    # normal operation, ad points to the curve
-                    else:
-                        simcrv.Add(pt)
-                        if j == len(stitches) - 1:
-                            simulation_curves.append((simcrv, color))
-            
-            self.drawing_curves = simulation_curves
+            if Start is None and End is None:
+                self.stitch_range = None
+            else:
+                if Start is None:
+                    Start = 0
+                if End is None:
+                    End = stitch_count - 1
+                self.stitch_range = (Start, End)
         
         else:
             rml = self.RuntimeMessageLevel.Warning
             errMsg = ("Input Pattern failed to collect data!")
             self.AddRuntimeMessage(rml, errMsg)
-            self.drawing_curves = []
+            self.drawing_levels = []
+            self.clipping_box = Rhino.Geometry.BoundingBox.Empty
+            self.pattern = None
+            self.stitch_count = 0
+            self.stitch_range = None
+    
+    def prepare_geometry(self, Pattern):
+        # prepare the preview geometry of the pattern once for every level of
+        # detail as one array of lines per thread color, together with the
+        # ascending stitch indices of the start and end point of every line
+        # and the bounding box and line range of every colorblock
+        drawing_levels = []
+        clipping_box = Rhino.Geometry.BoundingBox.Empty
+        for tol, blocks in render_levels(Pattern, LOD_TOLERANCES):
+            drawing_batches = []
+            for rgb, polylines, indices, parts in render_batches(blocks):
+                color = System.Drawing.Color.FromArgb(*rgb)
+                lines = []
+                starts = []
+                ends = []
+                for pts, idx in zip(polylines, indices):
+                    lines.extend(Rhino.Geometry.Line(a, b) for a, b
+                                 in zip(pts[:-1], pts[1:]))
+                    starts.extend(idx[:-1])
+                    ends.extend(idx[1:])
+                lines = System.Array[Rhino.Geometry.Line](lines)
+                boxes = []
+                bbox = Rhino.Geometry.BoundingBox.Empty
+                for (minx, miny, maxx, maxy), first, stop in parts:
+                    box = Rhino.Geometry.BoundingBox(minx, miny, 0,
+                                                     maxx, maxy, 0)
+                    boxes.append((box, first, stop))
+                    bbox = Rhino.Geometry.BoundingBox.Union(bbox, box)
+                drawing_batches.append((lines, color, bbox, starts, ends,
+                                        boxes))
+                if tol == 0:
+                    clipping_box = Rhino.Geometry.BoundingBox.Union(
+                                                    clipping_box, bbox)
+            drawing_levels.append(drawing_batches)
+        
+        # the view scale is measured at the center of the pattern
+        if clipping_box.IsValid:
+            self.lod_center = clipping_box.Center
+        self.clipping_box = clipping_box
+        self.drawing_levels = drawing_levels